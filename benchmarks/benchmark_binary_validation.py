@@ -0,0 +1,62 @@
+"""
+Benchmark validating that binary observations are represented with 0 or 1, comparing the original approach of building
+a python `set` of the observations against the vectorised check in `_check_experiment_inputs`.
+
+Usage:
+    python -m benchmarks.benchmark_binary_validation --n-observations 50000000
+"""
+
+# Standard library imports
+import argparse
+import timeit
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from ds_utils.hypothesis_testing import _check_experiment_inputs
+
+
+def _validate_with_python_set(experiment_observations: np.ndarray) -> None:
+    """Original implementation, which boxes every observation into a python object."""
+
+    if not set(experiment_observations).issubset({0, 1}):
+        raise ValueError('Invalid observations.')
+
+
+def main(n_observations: int, repeats: int) -> None:
+    """Time both approaches on valid observations stored with a number of different data types."""
+
+    conversions = np.random.default_rng(0).binomial(n=1, p=0.1, size=n_observations)
+
+    observations_by_type = {
+        'int64': conversions,
+        'float64': conversions.astype(float),
+        'bool': conversions.astype(bool),
+        'Int64 (nullable)': pd.Series(conversions, dtype='Int64'),
+    }
+
+    print(f'Validating {n_observations:,} observations (best of {repeats})\n')
+    print(f"{'data type':<20}{'python set (s)':>16}{'vectorised (s)':>16}{'speedup':>10}")
+
+    for data_type, observations in observations_by_type.items():
+        set_seconds = min(timeit.repeat(lambda: _validate_with_python_set(observations), number=1, repeat=repeats))
+        vectorised_seconds = min(timeit.repeat(
+            lambda: _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(observations),
+            number=1,
+            repeat=repeats,
+        ))
+
+        print(
+            f'{data_type:<20}{set_seconds:>16.3f}{vectorised_seconds:>16.3f}{set_seconds / vectorised_seconds:>9.0f}x'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-observations', type=int, default=10_000_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    arguments = parser.parse_args()
+
+    main(n_observations=arguments.n_observations, repeats=arguments.repeats)
@@ -0,0 +1,98 @@
+"""
+Benchmark the size on disk and load throughput of typical fitted estimators saved with `sk_io`, comparing the plain
+pickle format against the artifact format uncompressed, memory-mapped and with each available compression codec.
+
+Usage:
+    python -m benchmarks.benchmark_sklearn_compression --n-observations 100000
+"""
+
+# Standard library imports
+import argparse
+import os
+from os import path
+import tempfile
+import timeit
+
+# Third party imports
+import numpy as np
+from sklearn import ensemble, linear_model, preprocessing
+
+# Local application imports
+from ds_utils.sklearn_utils import _artifact_format, sk_io
+
+
+def _fitted_estimators(n_observations: int) -> dict:
+    """Fit a selection of estimators of different sizes on random data."""
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(n_observations, 50))
+    target = (features[:, 0] + rng.normal(size=n_observations) > 0).astype(int)
+
+    return {
+        'StandardScaler': preprocessing.StandardScaler().fit(features),
+        'LogisticRegression': linear_model.LogisticRegression(max_iter=200).fit(features, target),
+        'RandomForest': ensemble.RandomForestClassifier(n_estimators=50, random_state=0).fit(features, target),
+    }
+
+
+def _available_codecs() -> list:
+    """Codecs whose packages are installed."""
+
+    available_codecs = []
+    for codec in _artifact_format.CODECS:
+        try:
+            _artifact_format.get_codec(codec)
+            available_codecs.append(codec)
+        except ImportError:
+            pass
+
+    return available_codecs
+
+
+def main(n_observations: int, repeats: int) -> None:
+    """Save each estimator in each format, and time loading it back."""
+
+    # (label, save keyword arguments, load keyword arguments)
+    formats = [
+        ('pickle', {}, {}),
+        ('artifact', {'file_format': 'artifact'}, {}),
+        ('artifact mmap', {'file_format': 'artifact'}, {'mmap_mode': 'r'}),
+    ] + [
+        (f'artifact {codec}', {'file_format': 'artifact', 'compression': codec}, {}) for codec in _available_codecs()
+    ]
+
+    print(f'Estimators fitted on {n_observations:,} observations (best of {repeats} loads)')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for estimator_name, estimator in _fitted_estimators(n_observations).items():
+            print(f"\n{estimator_name}\n{'format':<20}{'size (KB)':>12}{'ratio':>8}{'load (s)':>12}{'load (MB/s)':>14}")
+
+            uncompressed_size = None  # size of the plain pickle, in KB
+
+            for label, save_arguments, load_arguments in formats:
+                file_path = path.join(directory, f'{estimator_name} {label}')
+                sk_io.save_pickled_sklearn_object_and_version(estimator, file_path, overwrite=True, **save_arguments)
+
+                kilobytes = os.stat(file_path).st_size / 2 ** 10
+                uncompressed_size = uncompressed_size or kilobytes
+
+                load_seconds = min(timeit.repeat(
+                    lambda file_path=file_path, load_arguments=load_arguments:
+                    sk_io.load_pickled_sklearn_object_and_version(file_path, **load_arguments),
+                    number=1,
+                    repeat=repeats,
+                ))
+
+                print(
+                    f'{label:<20}{kilobytes:>12.1f}{uncompressed_size / kilobytes:>7.1f}x{load_seconds:>12.4f}'
+                    f'{uncompressed_size / 2 ** 10 / load_seconds:>14.0f}'
+                )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-observations', type=int, default=100_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    arguments = parser.parse_args()
+
+    main(n_observations=arguments.n_observations, repeats=arguments.repeats)
@@ -0,0 +1,46 @@
+"""
+Benchmark stratified assignment of a population to sample groups, which shuffles the whole population once rather
+than once per stratum.
+
+Usage:
+    python -m benchmarks.benchmark_stratified_assignment --n-records 10000000 --n-strata 10000
+"""
+
+# Standard library imports
+import argparse
+import time
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from ds_utils.hypothesis_testing import set_up_experiment
+
+
+def main(n_records: int, n_strata: int) -> None:
+    """Time stratified and non-stratified assignment of the same population."""
+
+    random_generator = np.random.default_rng(0)
+    population = pd.DataFrame({
+        'stratum': random_generator.integers(0, n_strata, size=n_records),
+        'spend': random_generator.exponential(scale=20, size=n_records),
+    })
+
+    sample_groups = {'control': 0.5, 'treatment': 0.5}
+
+    print(f'Assigning {n_records:,} records across {n_strata:,} strata\n')
+
+    for description, stratify_by in [('global shuffle', None), ('stratified', 'stratum')]:
+        start_time = time.perf_counter()
+        set_up_experiment.assign_sample_groups(population, sample_groups, stratify_by=stratify_by)
+        print(f'{description:<16}{time.perf_counter() - start_time:>8.2f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-records', type=int, default=10_000_000)
+    parser.add_argument('--n-strata', type=int, default=10_000)
+    arguments = parser.parse_args()
+
+    main(n_records=arguments.n_records, n_strata=arguments.n_strata)
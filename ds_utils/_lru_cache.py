@@ -0,0 +1,161 @@
+"""
+Internal, process-level least-recently-used cache shared by the subpackages (e.g. for sample sizes and loaded sklearn
+objects).
+"""
+
+# Standard library imports
+import collections
+from concurrent import futures
+import threading
+from typing import Callable, Dict, List, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe cache which evicts the least recently used entries once their total size exceeds a limit, keeping count
+    of hits, misses and evictions.
+
+    The size of each entry is given in whatever unit the limit is, e.g. the estimated bytes of a loaded object, or 1 so
+    that the limit is a number of entries.
+
+    Each entry can be stored against a key along with a stamp (e.g. the modification time and size of the file it was
+    loaded from). A stored value is only returned if its stamp matches, otherwise it is loaded again and replaced.
+
+    Loading is single-flight: if several threads request the same key while it is being loaded, only the first loads
+    it and the others wait for, and share, its result.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum total size of the entries to hold. A size of 0 disables caching.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.current_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key: (stamp, value, size)
+        self._entries = collections.OrderedDict()
+        # key: (stamp, future resolving to the value once loaded)
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: tuple, load: Callable[[], Tuple[object, int]], stamp: tuple = None):
+        """
+        Return the value stored for `key` if its stamp matches, or wait for a matching load already in progress, or
+        otherwise load, store and return it.
+
+        Parameters
+        ----------
+        key : tuple
+            Identifies the value, e.g. the path of the file it is loaded from.
+        load : Callable
+            Loads the value, returning the value and its size.
+        stamp : tuple (default is None)
+            Identifies the version of the value, e.g. the modification time and size of the file.
+
+        Returns
+        -------
+        object
+            Cached or freshly loaded value.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            self.misses += 1
+
+            in_progress = self._loading.get(key)
+            if in_progress is not None and in_progress[0] == stamp:
+                future = in_progress[1]
+                is_loader = False
+            else:
+                future = futures.Future()
+                self._loading[key] = (stamp, future)
+                is_loader = True
+
+        if not is_loader:
+            return future.result()
+
+        try:
+            value, size = load()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(value)
+            self.put(key, value, size, stamp)
+        finally:
+            with self._lock:
+                if self._loading.get(key, (None, None))[1] is future:
+                    del self._loading[key]
+
+        return value
+
+    def put(self, key: tuple, value, size: int = 1, stamp: tuple = None) -> None:
+        """Store a value, replacing any previous version and evicting the least recently used entries if required."""
+
+        with self._lock:
+            previous_entry = self._entries.pop(key, None)
+            if previous_entry is not None:
+                self.current_size -= previous_entry[2]
+
+            # Values which could never fit are not stored, rather than evicting everything else to make room
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (stamp, value, size)
+            self.current_size += size
+            self._evict_to(self.max_size)
+
+    def resize(self, max_size: int) -> None:
+        """Change the maximum total size, evicting the least recently used entries if required."""
+
+        with self._lock:
+            self.max_size = max_size
+            self._evict_to(max_size)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self.current_size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def items(self) -> List[tuple]:
+        """Every (key, value) pair, from least to most recently used."""
+
+        with self._lock:
+            return [(key, value) for key, (_, value, _) in self._entries.items()]
+
+    def info(self) -> Dict[str, int]:
+        """Statistics for the cache, including the number of 'entries' and their total size ('current_size')."""
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'current_size': self.current_size,
+                'max_size': self.max_size,
+            }
+
+    def _evict_to(self, max_size: int) -> None:
+        """Evict the least recently used entries until their total size is within `max_size`. Requires the lock."""
+
+        while self.current_size > max_size:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.current_size -= size
+            self.evictions += 1
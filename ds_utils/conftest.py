@@ -0,0 +1,42 @@
+"""
+Fixtures shared by the tests of every subpackage.
+"""
+
+# Standard library imports
+import os
+from os import path
+import subprocess
+import sys
+from typing import Callable, Set, Tuple
+
+# Third party imports
+import pytest
+
+
+@pytest.fixture
+def modules_imported_by() -> Callable[[str], Tuple[Set[str], str]]:
+    """
+    Function which runs a statement in a fresh interpreter, and returns the name of every module it imported along with
+    the raw '-X importtime' report (useful as an assertion message).
+
+    The interpreter runs from the repository root with the same import path as the tests, so ds_utils is importable
+    however pytest was launched.
+    """
+
+    repository_root = path.dirname(path.dirname(path.abspath(__file__)))
+    environment = {**os.environ, 'PYTHONPATH': os.pathsep.join([repository_root] + sys.path)}
+
+    def run(statement: str) -> Tuple[Set[str], str]:
+        import_times = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            capture_output=True,
+            check=True,
+            cwd=repository_root,
+            env=environment,
+            text=True,
+        ).stderr
+
+        # Each line is 'import time: <self us> | <cumulative us> | <indented module name>'
+        return {line.split('|')[-1].strip() for line in import_times.splitlines()[1:]}, import_times
+
+    return run
@@ -3,12 +3,18 @@ Internal checks within the package to ensure that the parameters provided when s
 valid.
 """
 
+from __future__ import annotations
+
 # Standard library imports
-from typing import Dict, Union
+import numbers
+from typing import TYPE_CHECKING, Dict, Union
 
 # Third party imports
 import numpy as np
-import pandas as pd
+
+# pandas takes a second to import, so is imported within the functions which use it
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def check_if_sample_sizes_are_proportions_or_absolute(sample_groups: Dict[str, Union[float, int]]) -> str:
@@ -53,15 +59,19 @@ def check_if_sample_sizes_are_proportions_or_absolute(sample_groups: Dict[str, U
         )
 
 
-def validate_experiment_parameter_between_0_and_1(parameter_value: float, experiment_parameter: str) -> None:
+def validate_experiment_parameter_between_0_and_1(
+        parameter_value: Union[float, np.ndarray],
+        experiment_parameter: str,
+) -> None:
     """
     Raises exception if a parameter for the experiment e.g. power, or significance level is not in the correct range
     0 < parameter_value < 1.
 
     Parameters
     ----------
-    parameter_value :
-        Value provided for the parameter e.g. 0.05 to represent a 5% significance level.
+    parameter_value : float or numpy array_like
+        Value provided for the parameter e.g. 0.05 to represent a 5% significance level. If an array is provided, every
+        value must be in the correct range.
     experiment_parameter :
         What type of parameter has been provided e.g. 'significance_level' / 'power' / 'sample_size_proportions'.
 
@@ -70,7 +80,9 @@ def validate_experiment_parameter_between_0_and_1(parameter_value: float, experi
     ValueError
         If 0 < parameter_value < 1 not satisfied.
     """
-    if not 0 < parameter_value < 1:
+    parameter_value = np.asarray(parameter_value)
+
+    if not np.all((0 < parameter_value) & (parameter_value < 1)):
         raise ValueError(f"{experiment_parameter} must adhere to 0 < {experiment_parameter} < 1.")
 
 
@@ -94,15 +106,82 @@ def validate_measurement_type_is_valid(measurement_type: str) -> None:
         raise ValueError("The experiment must be measuring a 'proportion' or 'mean'.")
 
 
-def validate_binary_events_are_represented_with_0_or_1(experiment_observations: np.ndarray) -> None:
+def validate_alternative_hypothesis_is_valid(alternative_hypothesis: str) -> None:
+    """
+    Check that the alternative hypothesis of the experiment has been correctly specified.
+
+    Parameters
+    ----------
+    alternative_hypothesis : str
+        Whether the test is 'two-sided', or checking whether the new metric will be 'smaller' or 'larger'.
+
+    Raises
+    ------
+    ValueError
+        If `alternative_hypothesis` not in ['two-sided', 'larger', 'smaller'].
+    """
+
+    if alternative_hypothesis not in ['two-sided', 'larger', 'smaller']:
+        raise ValueError("The alternative hypothesis must be 'two-sided', 'larger' or 'smaller'.")
+
+
+def validate_multiple_comparison_correction_is_valid(correction: str) -> None:
+    """
+    Check that the correction for comparing many groups at once has been correctly specified.
+
+    Parameters
+    ----------
+    correction : str or None
+        How p-values are adjusted for multiple comparisons, if at all.
+
+    Raises
+    ------
+    ValueError
+        If `correction` not in ['bonferroni', 'holm', 'benjamini-hochberg', None].
+    """
+
+    if correction not in ['bonferroni', 'holm', 'benjamini-hochberg', None]:
+        raise ValueError("The correction must be 'bonferroni', 'holm', 'benjamini-hochberg' or None.")
+
+
+def validate_sample_group_names_are_unique(sample_groups: list) -> None:
+    """
+    Check that the names of the sample groups are distinct, as records assigned to groups with the same name could not
+    be told apart.
+
+    Parameters
+    ----------
+    sample_groups : list[str]
+        Names of each sample group.
+
+    Raises
+    ------
+    ValueError
+        If any name appears more than once.
+    """
+
+    if len(set(sample_groups)) != len(sample_groups):
+        raise ValueError('The names of the sample groups must be unique.')
+
+
+def validate_binary_events_are_represented_with_0_or_1(
+        experiment_observations: Union[np.ndarray, pd.Series],
+        block_size: int = 2 ** 20,
+) -> None:
     """
     When the experiment is evaluating whether a proportion has changed, the raw observations should be encoded as
     0 (non-event) or 1 (event).
 
+    The observations are checked in vectorised blocks, so that the check stops early at the block containing the first
+    invalid value rather than scanning every observation.
+
     Parameters
     ----------
-    experiment_observations : numpy array_like
-        Observations for specific group in the experiment.
+    experiment_observations : numpy array_like or pd.Series
+        Observations for specific group in the experiment. Pandas nullable (e.g. 'Int64', 'boolean') and Arrow-backed
+        data types are supported, but missing values are not valid events.
+    block_size : int (default is 2 ** 20)
+        Number of observations to check at a time.
 
     Raises
     ------
@@ -110,17 +189,63 @@ def validate_binary_events_are_represented_with_0_or_1(experiment_observations:
         If the observations are not all represented by 0's and 1's only.
     """
 
-    valid_values = {0, 1}
-    observed_values = set(experiment_observations)
+    observations = _binary_observations_as_numpy(experiment_observations)
+
+    # Booleans can only ever represent an event or non-event
+    if observations.dtype == bool:
+        return
+
+    observations = observations.ravel()
+
+    for block_start in range(0, observations.size, block_size):
+        block = observations[block_start: block_start + block_size]
+
+        if not np.all((block == 0) | (block == 1)):
+            raise ValueError(
+                'When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event.'
+            )
+
+
+def _binary_observations_as_numpy(experiment_observations: Union[np.ndarray, pd.Series]) -> np.ndarray:
+    """
+    Convert observations into a numpy array without boxing each value, so that they can be validated in a vectorised
+    manner.
+
+    Parameters
+    ----------
+    experiment_observations : numpy array_like or pd.Series
+        Observations for specific group in the experiment.
 
-    if not observed_values.issubset(valid_values):
+    Returns
+    -------
+    numpy.ndarray
+        Observations as a numpy array, using the numpy equivalent of any pandas extension data type.
+
+    Raises
+    ------
+    ValueError
+        If a pandas extension data type contains missing values.
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if isinstance(experiment_observations, (pd.Series, pd.Index)):
+        experiment_observations = experiment_observations.array
+
+    if not isinstance(experiment_observations, pd.api.extensions.ExtensionArray):
+        return np.asarray(experiment_observations)
+
+    # Missing values in nullable or Arrow-backed data types cannot be converted to a numpy integer/boolean array
+    if experiment_observations.isna().any():
         raise ValueError(
             'When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event.'
         )
 
+    return experiment_observations.to_numpy(dtype=getattr(experiment_observations.dtype, 'numpy_dtype', None))
+
 
 def validate_sample_size_values_are_appropriate(
-        original_population: pd.DataFrame,
+        original_population: Union[pd.DataFrame, int],
         sample_groups: Dict[str, Union[float, int]],
         size_type: str,
 ) -> None:
@@ -130,8 +255,8 @@ def validate_sample_size_values_are_appropriate(
 
     Parameters
     ----------
-    original_population : pd.DataFrame
-        The total dataset from which samples will be drawn.
+    original_population : pd.DataFrame or int
+        The total dataset from which samples will be drawn, or the number of records it contains.
     sample_groups : dict[str, float] or dict[str, int]
         Keys: The names of each sample group
         Values: How big they should be.
@@ -159,7 +284,10 @@ def validate_sample_size_values_are_appropriate(
 
     elif size_type == 'absolute':
 
-        if sum(sample_groups.values()) > original_population.shape[0]:
+        population_size = \
+            original_population if isinstance(original_population, numbers.Integral) else original_population.shape[0]
+
+        if sum(sample_groups.values()) > population_size:
             raise ValueError(
                 "The sum of all sample sizes should not exceed that of the original population that you are sampling."
             )
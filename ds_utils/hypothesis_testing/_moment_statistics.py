@@ -0,0 +1,370 @@
+"""
+Internal, vectorised calculations which evaluate experiments from summary moments (number of observations, means and
+sums of squared deviations) rather than the raw observations themselves.
+
+Each function accepts numpy array_likes which broadcast against one another, so that many metrics (or segments) can be
+tested in a single call.
+"""
+
+# Standard library imports
+from typing import Tuple
+
+# Third party imports
+import numpy as np
+
+
+def p_value_from_test_statistic(
+        test_statistic: np.ndarray,
+        alternative_hypothesis: str,
+        degrees_of_freedom: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Convert test statistics into p-values using either the normal distribution (z-test) or Student's t distribution
+    (t-test).
+
+    Parameters
+    ----------
+    test_statistic : numpy array_like
+        Test statistics for each comparison.
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether the test is 'two-sided', or checking whether the first group is 'smaller' or 'larger' than the second.
+    degrees_of_freedom : numpy array_like (default is None)
+        Degrees of freedom of the t distribution. If None, the normal distribution is used instead.
+
+    Returns
+    -------
+    numpy.ndarray
+        p-value for each test statistic.
+    """
+
+    from scipy import stats  # pylint: disable=import-outside-toplevel
+
+    distribution = stats.norm if degrees_of_freedom is None else stats.t(degrees_of_freedom)
+
+    if alternative_hypothesis == 'two-sided':
+        return 2 * distribution.sf(np.abs(test_statistic))
+    if alternative_hypothesis == 'larger':
+        return distribution.sf(test_statistic)
+
+    # alternative_hypothesis == 'smaller'
+    return distribution.cdf(test_statistic)
+
+
+def adjust_p_values_for_multiple_comparisons(p_values: np.ndarray, correction: str) -> np.ndarray:
+    """
+    Adjust p-values for testing many hypotheses at once, along the last axis, so that each row of comparisons is
+    corrected separately.
+
+    Missing (nan) p-values are left as nan and do not count towards the number of comparisons.
+
+    Parameters
+    ----------
+    p_values : numpy array_like
+        p-value of each comparison.
+    correction : str 'bonferroni', 'holm', 'benjamini-hochberg'
+        Bonferroni and Holm control the family-wise error rate (Holm being uniformly more powerful), whilst
+        Benjamini-Hochberg controls the false discovery rate.
+
+    Returns
+    -------
+    numpy.ndarray
+        Adjusted p-values, which can be compared directly against the significance level.
+    """
+
+    p_values = np.asarray(p_values, dtype=float)
+    missing = np.isnan(p_values)
+    n_comparisons = np.sum(~missing, axis=-1, keepdims=True)
+
+    if correction == 'bonferroni':
+        return np.minimum(p_values * n_comparisons, 1)
+
+    # Missing p-values are sorted last, so they never affect the running maximum/minimum of the others
+    order = np.argsort(p_values, axis=-1)
+    sorted_p_values = np.take_along_axis(p_values, order, axis=-1)
+    rank = np.arange(1, p_values.shape[-1] + 1)
+
+    with np.errstate(invalid='ignore'):
+        if correction == 'holm':
+            sorted_adjusted = np.maximum.accumulate(
+                np.nan_to_num(sorted_p_values * (n_comparisons - rank + 1), nan=-np.inf), axis=-1
+            )
+        else:  # correction == 'benjamini-hochberg'
+            sorted_adjusted = np.flip(np.minimum.accumulate(
+                np.flip(np.nan_to_num(sorted_p_values * n_comparisons / rank, nan=np.inf), axis=-1), axis=-1
+            ), axis=-1)
+
+    adjusted = np.empty_like(p_values)
+    np.put_along_axis(adjusted, order, np.minimum(sorted_adjusted, 1), axis=-1)
+
+    return np.where(missing, np.nan, adjusted)
+
+
+def two_sample_test_from_moments(
+        group_1_nobs: np.ndarray,
+        group_1_mean: np.ndarray,
+        group_1_sum_of_squared_deviations: np.ndarray,
+        group_2_nobs: np.ndarray,
+        group_2_mean: np.ndarray,
+        group_2_sum_of_squared_deviations: np.ndarray,
+        measurement_type: str,
+        alternative_hypothesis: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two sample test using a pooled variance estimate, matching the results of statsmodels' `weightstats.ttest_ind`
+    (when measuring means) and `weightstats.ztest` (when measuring proportions) on the underlying raw observations.
+
+    Parameters
+    ----------
+    group_1_nobs : numpy array_like
+        Number of observations in the first group.
+    group_1_mean : numpy array_like
+        Mean of the observations in the first group.
+    group_1_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of each observation from the mean of the first group.
+    group_2_nobs : numpy array_like
+        Number of observations in the second group.
+    group_2_mean : numpy array_like
+        Mean of the observations in the second group.
+    group_2_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of each observation from the mean of the second group.
+    measurement_type : str 'proportion', 'mean'
+        Whether to perform a z-test ('proportion') or t-test ('mean').
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether the test is 'two-sided', or checking whether the first group is 'smaller' or 'larger' than the second.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        (1st value) p-values.
+        (2nd value) test-statistics.
+    """
+
+    group_1_nobs = np.asarray(group_1_nobs, dtype=float)
+    group_2_nobs = np.asarray(group_2_nobs, dtype=float)
+
+    degrees_of_freedom = group_1_nobs + group_2_nobs - 2
+
+    # Degenerate comparisons (e.g. no variance in either group) yield nan/inf rather than warnings, in the same way
+    # that a single failed comparison should not interrupt a batch of thousands
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled_variance = \
+            (np.asarray(group_1_sum_of_squared_deviations) + np.asarray(group_2_sum_of_squared_deviations)) \
+            / degrees_of_freedom
+
+        standard_error = np.sqrt(pooled_variance * (1 / group_1_nobs + 1 / group_2_nobs))
+        test_statistic = (np.asarray(group_1_mean) - np.asarray(group_2_mean)) / standard_error
+
+        p_value = p_value_from_test_statistic(
+            test_statistic=test_statistic,
+            alternative_hypothesis=alternative_hypothesis,
+            degrees_of_freedom=degrees_of_freedom if measurement_type == 'mean' else None,
+        )
+
+    return p_value, test_statistic
+
+
+def covariate_adjusted_test_from_moments(
+        group_1_nobs: np.ndarray,
+        group_1_mean: np.ndarray,
+        group_1_sum_of_squared_deviations: np.ndarray,
+        group_1_covariate_mean: np.ndarray,
+        group_1_covariate_sum_of_squared_deviations: np.ndarray,
+        group_1_sum_of_cross_deviations: np.ndarray,
+        group_2_nobs: np.ndarray,
+        group_2_mean: np.ndarray,
+        group_2_sum_of_squared_deviations: np.ndarray,
+        group_2_covariate_mean: np.ndarray,
+        group_2_covariate_sum_of_squared_deviations: np.ndarray,
+        group_2_sum_of_cross_deviations: np.ndarray,
+        alternative_hypothesis: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two sample t-test on the difference between the groups after adjusting for a covariate (CUPED), matching the
+    t-test on the group coefficient of an ordinary least squares regression of the metric on the group and covariate
+    (ANCOVA).
+
+    The adjustment uses the within-group slope of the metric on the covariate, pooled across both groups, which is the
+    CUPED coefficient theta estimated without being affected by the difference between the groups.
+
+    Parameters
+    ----------
+    group_1_nobs, group_2_nobs : numpy array_like
+        Number of observations in each group.
+    group_1_mean, group_2_mean : numpy array_like
+        Mean of the metric in each group.
+    group_1_sum_of_squared_deviations, group_2_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of the metric from its mean in each group.
+    group_1_covariate_mean, group_2_covariate_mean : numpy array_like
+        Mean of the covariate in each group.
+    group_1_covariate_sum_of_squared_deviations, group_2_covariate_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of the covariate from its mean in each group.
+    group_1_sum_of_cross_deviations, group_2_sum_of_cross_deviations : numpy array_like
+        Sum of the products of the deviations of the metric and covariate from their means in each group.
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether the test is 'two-sided', or checking whether the first group is 'smaller' or 'larger' than the second.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        (1st value) p-values.
+        (2nd value) test-statistics.
+    """
+
+    group_1_nobs = np.asarray(group_1_nobs, dtype=float)
+    group_2_nobs = np.asarray(group_2_nobs, dtype=float)
+
+    # One further degree of freedom is used by estimating the slope on the covariate
+    degrees_of_freedom = group_1_nobs + group_2_nobs - 3
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariate_sum_of_squared_deviations = np.asarray(group_1_covariate_sum_of_squared_deviations) \
+            + np.asarray(group_2_covariate_sum_of_squared_deviations)
+        sum_of_cross_deviations = np.asarray(group_1_sum_of_cross_deviations) \
+            + np.asarray(group_2_sum_of_cross_deviations)
+        theta = sum_of_cross_deviations / covariate_sum_of_squared_deviations
+
+        covariate_difference = np.asarray(group_1_covariate_mean) - np.asarray(group_2_covariate_mean)
+        adjusted_difference = np.asarray(group_1_mean) - np.asarray(group_2_mean) - theta * covariate_difference
+
+        residual_variance = (
+            np.asarray(group_1_sum_of_squared_deviations) + np.asarray(group_2_sum_of_squared_deviations)
+            - theta * sum_of_cross_deviations
+        ) / degrees_of_freedom
+
+        standard_error = np.sqrt(residual_variance * (
+            1 / group_1_nobs + 1 / group_2_nobs + covariate_difference ** 2 / covariate_sum_of_squared_deviations
+        ))
+        test_statistic = adjusted_difference / standard_error
+
+        p_value = p_value_from_test_statistic(
+            test_statistic=test_statistic,
+            alternative_hypothesis=alternative_hypothesis,
+            degrees_of_freedom=degrees_of_freedom,
+        )
+
+    return p_value, test_statistic
+
+
+def ratio_test_from_moments(
+        group_1_nobs: np.ndarray,
+        group_1_numerator_mean: np.ndarray,
+        group_1_numerator_sum_of_squared_deviations: np.ndarray,
+        group_1_denominator_mean: np.ndarray,
+        group_1_denominator_sum_of_squared_deviations: np.ndarray,
+        group_1_sum_of_cross_deviations: np.ndarray,
+        group_2_nobs: np.ndarray,
+        group_2_numerator_mean: np.ndarray,
+        group_2_numerator_sum_of_squared_deviations: np.ndarray,
+        group_2_denominator_mean: np.ndarray,
+        group_2_denominator_sum_of_squared_deviations: np.ndarray,
+        group_2_sum_of_cross_deviations: np.ndarray,
+        alternative_hypothesis: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two sample z-test on the difference between ratio metrics (sum of numerators / sum of denominators) of the groups,
+    using the delta method to estimate the variance of each ratio from the moments of its numerator and denominator.
+
+    Parameters
+    ----------
+    group_1_nobs, group_2_nobs : numpy array_like
+        Number of units (e.g. users) in each group.
+    group_1_numerator_mean, group_2_numerator_mean : numpy array_like
+        Mean of the numerator (e.g. revenue) per unit in each group.
+    group_1_numerator_sum_of_squared_deviations, group_2_numerator_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of the numerator from its mean in each group.
+    group_1_denominator_mean, group_2_denominator_mean : numpy array_like
+        Mean of the denominator (e.g. sessions) per unit in each group.
+    group_1_denominator_sum_of_squared_deviations, group_2_denominator_sum_of_squared_deviations : numpy array_like
+        Sum of the squared deviations of the denominator from its mean in each group.
+    group_1_sum_of_cross_deviations, group_2_sum_of_cross_deviations : numpy array_like
+        Sum of the products of the deviations of the numerator and denominator from their means in each group.
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether the test is 'two-sided', or checking whether the first group is 'smaller' or 'larger' than the second.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        (1st value) p-values.
+        (2nd value) test-statistics.
+    """
+
+    ratios = []
+    ratio_variances = []
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for nobs, numerator_mean, numerator_ssd, denominator_mean, denominator_ssd, cross_deviations in [
+            (group_1_nobs, group_1_numerator_mean, group_1_numerator_sum_of_squared_deviations,
+             group_1_denominator_mean, group_1_denominator_sum_of_squared_deviations, group_1_sum_of_cross_deviations),
+            (group_2_nobs, group_2_numerator_mean, group_2_numerator_sum_of_squared_deviations,
+             group_2_denominator_mean, group_2_denominator_sum_of_squared_deviations, group_2_sum_of_cross_deviations),
+        ]:
+            nobs = np.asarray(nobs, dtype=float)
+            denominator_mean = np.asarray(denominator_mean, dtype=float)
+            ratio = np.asarray(numerator_mean, dtype=float) / denominator_mean
+
+            # Variance of the linearised ratio, (numerator - ratio * denominator) / denominator_mean, per unit
+            unit_variance = (
+                np.asarray(numerator_ssd) - 2 * ratio * np.asarray(cross_deviations)
+                + ratio ** 2 * np.asarray(denominator_ssd)
+            ) / (nobs - 1) / denominator_mean ** 2
+
+            ratios.append(ratio)
+            ratio_variances.append(unit_variance / nobs)
+
+        test_statistic = (ratios[0] - ratios[1]) / np.sqrt(ratio_variances[0] + ratio_variances[1])
+
+        p_value = p_value_from_test_statistic(
+            test_statistic=test_statistic,
+            alternative_hypothesis=alternative_hypothesis,
+        )
+
+    return p_value, test_statistic
+
+
+def moments_of_observations(observations: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the moments required for a two sample test along the first axis of the observations.
+
+    Parameters
+    ----------
+    observations : numpy array_like
+        1-D array of observations, or 2-D array of shape (observations, metrics).
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        (1st value) Number of observations.
+        (2nd value) Mean.
+        (3rd value) Sum of squared deviations from the mean.
+    """
+
+    observations = np.asarray(observations, dtype=float)
+
+    nobs = np.full(observations.shape[1:], observations.shape[0], dtype=float)
+    mean = observations.mean(axis=0)
+    sum_of_squared_deviations = ((observations - mean) ** 2).sum(axis=0)
+
+    return nobs, mean, sum_of_squared_deviations
+
+
+def sum_of_cross_deviations(observations: np.ndarray, covariates: np.ndarray) -> np.ndarray:
+    """
+    Sum of the products of the deviations of the observations and covariates from their means, along the first axis.
+
+    Parameters
+    ----------
+    observations : numpy array_like
+        1-D array of observations, or 2-D array of shape (observations, metrics).
+    covariates : numpy array_like
+        Covariate of each observation, of the same shape as `observations`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sum of the cross deviations.
+    """
+
+    observations = np.asarray(observations, dtype=float)
+    covariates = np.asarray(covariates, dtype=float)
+
+    return ((observations - observations.mean(axis=0)) * (covariates - covariates.mean(axis=0))).sum(axis=0)
@@ -2,15 +2,21 @@
 Analyse the outcome of an experiment and test for significance.
 """
 
+from __future__ import annotations
+
 # Standard library imports
-from typing import Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 # Third party imports
 import numpy as np
-from statsmodels.stats import weightstats
+
+# pandas and statsmodels take seconds to import, so are imported within the functions which use them
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Local application imports
-from ds_utils.hypothesis_testing import _check_experiment_inputs
+from ds_utils.hypothesis_testing import _check_experiment_inputs, _moment_statistics
+from ds_utils.hypothesis_testing.streaming import GroupAccumulator
 
 
 def parametric_significance_test_on_raw_observations(
@@ -20,6 +26,7 @@ def parametric_significance_test_on_raw_observations(
         alternative_hypothesis: str = 'two-sided',
         significance_level: float = 0.05,
         verbose: bool = True,
+        validate_observations: bool = True,
 ) -> Tuple[float, float]:
     """
     Tests for a significant difference between the observations recorded for two experimental groups.
@@ -41,6 +48,9 @@ def parametric_significance_test_on_raw_observations(
         the Null Hypothesis when it is in fact true). Default value of 5% is commonly used but you should consider what
         is appropriate given the business context.
     verbose : bool
+    validate_observations : bool (default is True)
+        Whether to check that observations are all represented as 0 or 1 when measuring proportions. Only disable this
+        for trusted pipelines where the observations are known to be valid, to avoid scanning them an additional time.
 
     Returns
     -------
@@ -56,6 +66,8 @@ def parametric_significance_test_on_raw_observations(
         If the experiment metric is a proportion, but the individual observations are not all represented as 0 or 1.
     """
 
+    from statsmodels.stats import weightstats  # pylint: disable=import-outside-toplevel
+
     # Validate parameters of the experiment are appropriate
     _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
     _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
@@ -72,8 +84,9 @@ def parametric_significance_test_on_raw_observations(
     # Perform z-test for proportions
     elif measurement_type == 'proportion':
 
-        for observations in [group_1_observations, group_2_observations]:
-            _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(observations)
+        if validate_observations:
+            for observations in [group_1_observations, group_2_observations]:
+                _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(observations)
 
         test_statistic, p_value = weightstats.ztest(
             x1=group_1_observations,
@@ -88,6 +101,1105 @@ def parametric_significance_test_on_raw_observations(
     return p_value, test_statistic
 
 
+def parametric_significance_test_on_sufficient_statistics(
+        group_1_count: float,
+        group_1_sum: float,
+        group_2_count: float,
+        group_2_sum: float,
+        measurement_type: str,
+        *,
+        group_1_sum_of_squares: float = None,
+        group_2_sum_of_squares: float = None,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups using only summary statistics of their
+    observations, e.g. when the observations have been aggregated upstream in SQL or Spark. The results match those of
+    `parametric_significance_test_on_raw_observations` on the underlying observations.
+
+    Array-likes can also be provided for each statistic to test many metrics at once, in which case arrays of p-values
+    and test-statistics are returned.
+
+    The variance of each group is derived from its sum of squares minus count * mean ** 2, which loses precision when
+    the mean is large compared to the spread of the observations (e.g. timestamps), and is clipped at 0 if rounding
+    makes it negative. In that case, subtract a constant (such as a typical value) from every observation before
+    summing, which leaves the difference in means unchanged, or accumulate the observations with
+    :py:class:`ds_utils.hypothesis_testing.streaming.GroupAccumulator` instead.
+
+    Parameters
+    ----------
+    group_1_count : float or numpy array_like
+        Number of observations for specific group in the experiment.
+    group_1_sum : float or numpy array_like
+        Sum of the observations for specific group in the experiment. When measuring proportions, this is the number of
+        events (observations marked as 1).
+    group_2_count : float or numpy array_like
+        Number of observations for other group in the experiment which group_1 will be compared against.
+    group_2_sum : float or numpy array_like
+        Sum of the observations for other group in the experiment. When measuring proportions, this is the number of
+        events (observations marked as 1).
+    measurement_type : str 'proportion', 'mean'
+        Whether the metric is a proportion (e.g. % conversion rate) or mean (e.g. average spend).
+    group_1_sum_of_squares : float or numpy array_like (default is None)
+        Sum of the squared observations for specific group in the experiment. Only needs to be set if
+        `measurement_type` is 'mean'.
+    group_2_sum_of_squares : float or numpy array_like (default is None)
+        Sum of the squared observations for other group in the experiment. Only needs to be set if `measurement_type`
+        is 'mean'.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) test-statistic, which applies to z-test when measuring proportions, and t-test for means.
+
+    Raises
+    ------
+    TypeError
+        If `measurement_type` is 'mean' but the sums of squares are not provided for both groups.
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If the experiment metric is a proportion, but the number of events is negative or exceeds the number of
+        observations.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    moments_by_group = []
+    for count, total, sum_of_squares in [
+        (group_1_count, group_1_sum, group_1_sum_of_squares),
+        (group_2_count, group_2_sum, group_2_sum_of_squares),
+    ]:
+        count = np.asarray(count, dtype=float)
+        total = np.asarray(total, dtype=float)
+
+        if measurement_type == 'mean':
+            if sum_of_squares is None:
+                raise TypeError(
+                    "When measuring a mean for your test, you must also specify the sum of squares for both groups."
+                )
+
+        # Every observation is 0 or 1 for proportions, so the sum of squares is the number of events
+        elif measurement_type == 'proportion':
+            if np.any((total < 0) | (total > count)):
+                raise ValueError(
+                    'When testing proportions, the number of events must be between 0 and the number of observations.'
+                )
+            sum_of_squares = total
+
+        moments_by_group.extend([
+            count, total / count, _sum_of_squared_deviations_from_sums(count, total, sum_of_squares)
+        ])
+
+    p_value, test_statistic = _moment_statistics.two_sample_test_from_moments(
+        *moments_by_group,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    # Return plain floats when testing a single metric, in line with the other tests in this module
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_with_covariate_on_raw_observations(
+        group_1_observations: np.ndarray,
+        group_1_covariates: np.ndarray,
+        group_2_observations: np.ndarray,
+        group_2_covariates: np.ndarray,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups after adjusting each observation for a
+    pre-experiment covariate (CUPED), such as the same metric measured for each unit before the experiment started.
+
+    The more the covariate is correlated with the metric, the more variance is removed, so smaller differences can be
+    detected with the same number of observations (see the `covariate_correlation` parameter of
+    :py:func:`ds_utils.hypothesis_testing.set_up_experiment.calculate_required_sample_size`). The results match the
+    t-test on the group coefficient of an ordinary least squares regression of the metric on the group and covariate.
+
+    Parameters
+    ----------
+    group_1_observations : numpy array_like
+        Observations for specific group in the experiment. 2-D arrays of shape (observations, metrics) test many
+        metrics at once.
+    group_1_covariates : numpy array_like
+        Pre-experiment covariate of each observation in group_1, of the same shape as `group_1_observations`.
+    group_2_observations : numpy array_like
+        Observations for other group in the experiment which group_1 will be compared against.
+    group_2_covariates : numpy array_like
+        Pre-experiment covariate of each observation in group_2, of the same shape as `group_2_observations`.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) t-test statistic of the adjusted difference between the groups.
+        Arrays are returned instead if testing many metrics.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If the covariates are not the same shape as the observations of their group.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    moments_by_group = []
+    for observations, covariates in [
+        (group_1_observations, group_1_covariates),
+        (group_2_observations, group_2_covariates),
+    ]:
+        if np.shape(observations) != np.shape(covariates):
+            raise ValueError('The covariates must be the same shape as the observations of their group.')
+
+        moments_by_group.extend(_paired_moments_of_observations(observations, covariates))
+
+    p_value, test_statistic = _moment_statistics.covariate_adjusted_test_from_moments(
+        *moments_by_group,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_with_covariate_on_sufficient_statistics(
+        group_1_count: float,
+        group_1_sum: float,
+        group_1_sum_of_squares: float,
+        group_1_covariate_sum: float,
+        group_1_covariate_sum_of_squares: float,
+        group_1_sum_of_products: float,
+        group_2_count: float,
+        group_2_sum: float,
+        group_2_sum_of_squares: float,
+        group_2_covariate_sum: float,
+        group_2_covariate_sum_of_squares: float,
+        group_2_sum_of_products: float,
+        *,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups after adjusting for a pre-experiment covariate
+    (CUPED), using only sums of the observations and covariates, e.g. when they have been aggregated upstream in SQL or
+    Spark. Sums can be added together across chunks or partitions, so can be built up as the results arrive. The
+    results match those of `parametric_significance_test_with_covariate_on_raw_observations`.
+
+    Variances and covariances are derived from the sums, e.g. sum of squares minus count * mean ** 2, which loses
+    precision when the means are large compared to the spread of the values. Subtracting a constant from every
+    observation, and another from every covariate, before summing leaves the result unchanged while avoiding this.
+
+    Array-likes can also be provided for each statistic to test many metrics at once, in which case arrays of p-values
+    and test-statistics are returned.
+
+    Parameters
+    ----------
+    group_1_count : float or numpy array_like
+        Number of observations for specific group in the experiment.
+    group_1_sum : float or numpy array_like
+        Sum of the observations for specific group in the experiment.
+    group_1_sum_of_squares : float or numpy array_like
+        Sum of the squared observations for specific group in the experiment.
+    group_1_covariate_sum : float or numpy array_like
+        Sum of the covariates for specific group in the experiment.
+    group_1_covariate_sum_of_squares : float or numpy array_like
+        Sum of the squared covariates for specific group in the experiment.
+    group_1_sum_of_products : float or numpy array_like
+        Sum of each observation multiplied by its covariate for specific group in the experiment.
+    group_2_count, group_2_sum, group_2_sum_of_squares : float or numpy array_like
+        As above, for other group in the experiment which group_1 will be compared against.
+    group_2_covariate_sum, group_2_covariate_sum_of_squares, group_2_sum_of_products : float or numpy array_like
+        As above, for other group in the experiment which group_1 will be compared against.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) t-test statistic of the adjusted difference between the groups.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    p_value, test_statistic = _moment_statistics.covariate_adjusted_test_from_moments(
+        *_paired_moments_from_sums(
+            group_1_count, group_1_sum, group_1_sum_of_squares, group_1_covariate_sum,
+            group_1_covariate_sum_of_squares, group_1_sum_of_products,
+        ),
+        *_paired_moments_from_sums(
+            group_2_count, group_2_sum, group_2_sum_of_squares, group_2_covariate_sum,
+            group_2_covariate_sum_of_squares, group_2_sum_of_products,
+        ),
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_of_ratio_on_raw_observations(
+        group_1_numerators: np.ndarray,
+        group_1_denominators: np.ndarray,
+        group_2_numerators: np.ndarray,
+        group_2_denominators: np.ndarray,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups in a ratio metric, such as revenue per session,
+    which is the sum of a numerator divided by the sum of a denominator over every unit (e.g. user) in the group.
+
+    Units, rather than the events they are made up of, are what is randomised into groups, so the events of a unit are
+    not independent of one another. The variance of each ratio is therefore estimated with the delta method from the
+    per-unit numerators and denominators, rather than by treating each event (or each unit's own ratio) as an
+    observation.
+
+    Parameters
+    ----------
+    group_1_numerators : numpy array_like
+        Numerator (e.g. revenue) of each unit for specific group in the experiment. 2-D arrays of shape
+        (units, metrics) test many ratio metrics at once.
+    group_1_denominators : numpy array_like
+        Denominator (e.g. number of sessions) of each unit in group_1, of the same shape as `group_1_numerators`.
+    group_2_numerators : numpy array_like
+        Numerator of each unit for other group in the experiment which group_1 will be compared against.
+    group_2_denominators : numpy array_like
+        Denominator of each unit in group_2, of the same shape as `group_2_numerators`.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) z-test statistic of the difference between the ratios of the groups.
+        Arrays are returned instead if testing many metrics.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If the denominators are not the same shape as the numerators of their group.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    moments_by_group = []
+    for numerators, denominators in [
+        (group_1_numerators, group_1_denominators),
+        (group_2_numerators, group_2_denominators),
+    ]:
+        if np.shape(numerators) != np.shape(denominators):
+            raise ValueError('The denominators must be the same shape as the numerators of their group.')
+
+        moments_by_group.extend(_paired_moments_of_observations(numerators, denominators))
+
+    p_value, test_statistic = _moment_statistics.ratio_test_from_moments(
+        *moments_by_group,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_of_ratio_on_sufficient_statistics(
+        group_1_count: float,
+        group_1_numerator_sum: float,
+        group_1_numerator_sum_of_squares: float,
+        group_1_denominator_sum: float,
+        group_1_denominator_sum_of_squares: float,
+        group_1_sum_of_products: float,
+        group_2_count: float,
+        group_2_numerator_sum: float,
+        group_2_numerator_sum_of_squares: float,
+        group_2_denominator_sum: float,
+        group_2_denominator_sum_of_squares: float,
+        group_2_sum_of_products: float,
+        *,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups in a ratio metric using only sums of the
+    per-unit numerators and denominators, e.g. when they have been aggregated upstream in SQL or Spark. The results
+    match those of `parametric_significance_test_of_ratio_on_raw_observations`.
+
+    Variances and the covariance of the numerators and denominators are derived from the sums, e.g. sum of squares minus
+    count * mean ** 2, so lose precision when the per-unit values are large compared to their spread.
+
+    Array-likes can also be provided for each statistic to test many ratio metrics at once, in which case arrays of
+    p-values and test-statistics are returned.
+
+    Parameters
+    ----------
+    group_1_count : float or numpy array_like
+        Number of units for specific group in the experiment.
+    group_1_numerator_sum : float or numpy array_like
+        Sum of the numerator of each unit for specific group in the experiment.
+    group_1_numerator_sum_of_squares : float or numpy array_like
+        Sum of the squared numerator of each unit for specific group in the experiment.
+    group_1_denominator_sum : float or numpy array_like
+        Sum of the denominator of each unit for specific group in the experiment.
+    group_1_denominator_sum_of_squares : float or numpy array_like
+        Sum of the squared denominator of each unit for specific group in the experiment.
+    group_1_sum_of_products : float or numpy array_like
+        Sum of the numerator multiplied by the denominator of each unit for specific group in the experiment.
+    group_2_count, group_2_numerator_sum, group_2_numerator_sum_of_squares : float or numpy array_like
+        As above, for other group in the experiment which group_1 will be compared against.
+    group_2_denominator_sum, group_2_denominator_sum_of_squares, group_2_sum_of_products : float or numpy array_like
+        As above, for other group in the experiment which group_1 will be compared against.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) z-test statistic of the difference between the ratios of the groups.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    p_value, test_statistic = _moment_statistics.ratio_test_from_moments(
+        *_paired_moments_from_sums(
+            group_1_count, group_1_numerator_sum, group_1_numerator_sum_of_squares, group_1_denominator_sum,
+            group_1_denominator_sum_of_squares, group_1_sum_of_products,
+        ),
+        *_paired_moments_from_sums(
+            group_2_count, group_2_numerator_sum, group_2_numerator_sum_of_squares, group_2_denominator_sum,
+            group_2_denominator_sum_of_squares, group_2_sum_of_products,
+        ),
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_on_accumulators(
+        group_1_accumulator: GroupAccumulator,
+        group_2_accumulator: GroupAccumulator,
+        measurement_type: str,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between two experimental groups whose observations have been accumulated
+    incrementally, giving the same results as `parametric_significance_test_on_raw_observations` on the full set of
+    observations.
+
+    Parameters
+    ----------
+    group_1_accumulator : GroupAccumulator
+        Running moments of the observations for specific group in the experiment.
+    group_2_accumulator : GroupAccumulator
+        Running moments of the observations for other group in the experiment which group_1 will be compared against.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metric is a proportion (e.g. % conversion rate) or mean (e.g. average spend).
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive (incorrectly rejecting
+        the Null Hypothesis when it is in fact true).
+    verbose : bool
+        Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) test-statistic, which applies to z-test when measuring proportions, and t-test for means.
+        Arrays are returned instead if the accumulators track many metrics.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If the experiment metric is a proportion, but the observations of either group were not all 0 or 1.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    if measurement_type == 'proportion':
+        for accumulator in [group_1_accumulator, group_2_accumulator]:
+            if not np.all(accumulator.is_binary):
+                raise ValueError(
+                    'When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event.'
+                )
+
+    p_value, test_statistic = _moment_statistics.two_sample_test_from_moments(
+        group_1_accumulator.count,
+        group_1_accumulator.mean,
+        group_1_accumulator.sum_of_squared_deviations,
+        group_2_accumulator.count,
+        group_2_accumulator.mean,
+        group_2_accumulator.sum_of_squared_deviations,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if np.ndim(p_value) == 0:
+        p_value, test_statistic = float(p_value), float(test_statistic)
+
+        if verbose:
+            _print_interpretation_of_p_value(p_value, significance_level)
+
+    return p_value, test_statistic
+
+
+def parametric_significance_test_on_observation_matrices(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        measurement_type: str,
+        alternative_hypothesis: str = 'two-sided',
+        validate_observations: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tests for a significant difference between two experimental groups across many metrics at once, giving the same
+    results as calling `parametric_significance_test_on_raw_observations` for each metric in turn.
+
+    Parameters
+    ----------
+    group_1_observations : numpy array_like of shape (observations, metrics)
+        Observations for specific group in the experiment, with one column per metric.
+    group_2_observations : numpy array_like of shape (observations, metrics)
+        Observations for other group in the experiment which group_1 will be compared against, with the metrics in the
+        same column order as `group_1_observations`.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metrics are proportions (e.g. % conversion rate) or means (e.g. average spend).
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    validate_observations : bool (default is True)
+        Whether to check that observations are all represented as 0 or 1 when measuring proportions. Only disable this
+        for trusted pipelines where the observations are known to be valid, to avoid scanning them an additional time.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        (1st value) p-value for each metric.
+        (2nd value) test-statistic for each metric, which applies to z-test when measuring proportions, and t-test for
+        means.
+
+    Raises
+    ------
+    ValueError
+        If the two groups do not have the same number of metrics.
+    ValueError
+        If the experiment metric is a proportion, but the individual observations are not all represented as 0 or 1.
+    """
+
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    group_1_observations = np.asarray(group_1_observations)
+    group_2_observations = np.asarray(group_2_observations)
+
+    if group_1_observations.shape[1:] != group_2_observations.shape[1:]:
+        raise ValueError('Both groups must contain observations for the same number of metrics.')
+
+    if measurement_type == 'proportion' and validate_observations:
+        for observations in [group_1_observations, group_2_observations]:
+            _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(observations)
+
+    group_1_moments = _moment_statistics.moments_of_observations(group_1_observations)
+    group_2_moments = _moment_statistics.moments_of_observations(group_2_observations)
+
+    return _moment_statistics.two_sample_test_from_moments(
+        *group_1_moments,
+        *group_2_moments,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+
+def parametric_significance_test_on_long_format_observations(
+        observations: pd.DataFrame,
+        group_column: str,
+        metric_column: str,
+        value_column: str,
+        group_1: str,
+        group_2: str,
+        measurement_type: str,
+        alternative_hypothesis: str = 'two-sided',
+        metrics: List[str] = None,
+        validate_observations: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tests for a significant difference between two experimental groups across many metrics at once, when the
+    observations are stored in long format (one row per observation per metric).
+
+    Parameters
+    ----------
+    observations : pd.DataFrame
+        Observations for every group and metric in the experiment.
+    group_column : str
+        Column denoting the experimental group of each observation.
+    metric_column : str
+        Column denoting which metric each observation belongs to.
+    value_column : str
+        Column containing the value of each observation. Missing values are ignored.
+    group_1 : str
+        Name of specific group in the experiment.
+    group_2 : str
+        Name of other group in the experiment which group_1 will be compared against.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metrics are proportions (e.g. % conversion rate) or means (e.g. average spend).
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    metrics : list[str] (default is None)
+        Which metrics to test, and the order of the results. If None, every metric is tested in sorted order.
+    validate_observations : bool (default is True)
+        Whether to check that observations are all represented as 0 or 1 when measuring proportions. Only disable this
+        for trusted pipelines where the observations are known to be valid, to avoid scanning them an additional time.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        (1st value) p-value for each metric.
+        (2nd value) test-statistic for each metric, which applies to z-test when measuring proportions, and t-test for
+        means.
+        Metrics which have no observations for one of the groups have a p-value and test-statistic of nan.
+
+    Raises
+    ------
+    ValueError
+        If the experiment metric is a proportion, but the individual observations are not all represented as 0 or 1.
+    """
+
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    experiment_groups = observations.loc[observations[group_column].isin([group_1, group_2])]
+
+    if measurement_type == 'proportion' and validate_observations:
+        _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(
+            experiment_groups[value_column].dropna()
+        )
+
+    if metrics is None:
+        metrics = np.sort(observations[metric_column].unique())
+
+    # Calculate the moments for every group and metric in a single pass
+    group_moments = _moments_by_group(experiment_groups, [group_column, metric_column], value_column)
+
+    moments_by_group = []
+    for group in [group_1, group_2]:
+        moments = group_moments \
+            .loc[group_moments.index.get_level_values(group_column) == group] \
+            .droplevel(group_column) \
+            .reindex(metrics)
+
+        moments_by_group.extend([
+            moments['count'].to_numpy(dtype=float),
+            moments['mean'].to_numpy(dtype=float),
+            moments['sum_of_squared_deviations'].to_numpy(dtype=float),
+        ])
+
+    return _moment_statistics.two_sample_test_from_moments(
+        *moments_by_group,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+
+def parametric_significance_test_on_multiple_groups(
+        observations: pd.DataFrame,
+        metric_column: str,
+        measurement_type: str,
+        group_column: str = 'sample_group',
+        control_group: str = None,
+        alternative_hypothesis: str = 'two-sided',
+        correction: str = 'holm',
+        significance_level: float = 0.05,
+        validate_observations: bool = True,
+) -> pd.DataFrame:
+    """
+    Tests for significant differences between many experimental groups at once, either comparing every group against
+    a control group or every pair of groups, and adjusts the p-values for the number of comparisons.
+
+    The moments of each group are calculated once, so the cost of the tests does not grow with the number of
+    observations however many comparisons are made.
+
+    Parameters
+    ----------
+    observations : pd.DataFrame
+        Observations for every group in the experiment, such as the output of
+        :py:func:`ds_utils.hypothesis_testing.set_up_experiment.create_sample_groups` with the metric added.
+    metric_column : str
+        Column containing the value of each observation. Missing values are ignored.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metric is a proportion (e.g. % conversion rate) or mean (e.g. average spend).
+    group_column : str (default is 'sample_group')
+        Column denoting the experimental group of each observation.
+    control_group : str (default is None)
+        Group which every other group is compared against. If None, every pair of groups is compared.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the metric of `group_1` in each comparison will
+        be 'smaller' or 'larger' than that of `group_2`.
+    correction : str 'bonferroni', 'holm' (default), 'benjamini-hochberg' or None
+        How to adjust the p-values for the number of comparisons. Bonferroni and Holm control the probability of any
+        false positive, whilst Benjamini-Hochberg controls the proportion of false positives amongst the significant
+        results. If None, the p-values are not adjusted.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, which the adjusted p-values are compared against.
+    validate_observations : bool (default is True)
+        Whether to check that observations are all represented as 0 or 1 when measuring proportions.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per comparison, with columns:
+            'group_1', 'group_2': groups being compared (`group_2` is the control group, if there is one).
+            'group_1_mean', 'group_2_mean': mean of the metric in each group.
+            'test_statistic': z-test statistic when measuring proportions, and t-test statistic for means.
+            'p_value': p-value of the comparison on its own.
+            'adjusted_p_value': p-value adjusted for the number of comparisons.
+            'significant': whether the adjusted p-value is below the significance level.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If `measurement_type`, `alternative_hypothesis` or `correction` are not valid.
+    ValueError
+        If `control_group` does not have any observations.
+    ValueError
+        If the experiment metric is a proportion, but the individual observations are not all represented as 0 or 1.
+
+    Examples
+    --------
+    >>> experiment = set_up_experiment.create_sample_groups(customers, sample_groups=['control', 'a', 'b', 'c'])
+    >>> experiment['spend'] = ...
+    >>> parametric_significance_test_on_multiple_groups(
+    >>>     experiment, metric_column='spend', measurement_type='mean', control_group='control'
+    >>> )
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+    _check_experiment_inputs.validate_multiple_comparison_correction_is_valid(correction)
+
+    if measurement_type == 'proportion' and validate_observations:
+        _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(
+            observations[metric_column].dropna()
+        )
+
+    group_moments = _moments_by_group(observations, [group_column], metric_column)
+    groups = group_moments.index.to_numpy()
+
+    if control_group is None:
+        group_1_positions, group_2_positions = np.triu_indices(len(groups), k=1)
+    else:
+        if control_group not in group_moments.index:
+            raise ValueError(f'The control group {control_group!r} does not have any observations.')
+
+        control_position = group_moments.index.get_loc(control_group)
+        group_1_positions = np.delete(np.arange(len(groups)), control_position)
+        group_2_positions = np.full_like(group_1_positions, control_position)
+
+    counts = group_moments['count'].to_numpy(dtype=float)
+    means = group_moments['mean'].to_numpy(dtype=float)
+    sums_of_squared_deviations = group_moments['sum_of_squared_deviations'].to_numpy(dtype=float)
+
+    p_values, test_statistics = _moment_statistics.two_sample_test_from_moments(
+        counts[group_1_positions],
+        means[group_1_positions],
+        sums_of_squared_deviations[group_1_positions],
+        counts[group_2_positions],
+        means[group_2_positions],
+        sums_of_squared_deviations[group_2_positions],
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if correction is None:
+        adjusted_p_values = p_values
+    else:
+        adjusted_p_values = _moment_statistics.adjust_p_values_for_multiple_comparisons(p_values, correction)
+
+    return pd.DataFrame({
+        'group_1': groups[group_1_positions],
+        'group_2': groups[group_2_positions],
+        'group_1_mean': means[group_1_positions],
+        'group_2_mean': means[group_2_positions],
+        'test_statistic': test_statistics,
+        'p_value': p_values,
+        'adjusted_p_value': adjusted_p_values,
+        'significant': adjusted_p_values < significance_level,
+    })
+
+
+def parametric_significance_test_by_segment(
+        observations: pd.DataFrame,
+        segment_columns: List[str],
+        metric_column: str,
+        group_1: str,
+        group_2: str,
+        measurement_type: str,
+        group_column: str = 'sample_group',
+        alternative_hypothesis: str = 'two-sided',
+        correction: str = None,
+        significance_level: float = 0.05,
+        validate_observations: bool = True,
+) -> pd.DataFrame:
+    """
+    Tests for a significant difference between two experimental groups within every segment (e.g. each combination of
+    country and platform) at once, giving the same results as filtering the observations to each segment in turn and
+    calling `parametric_significance_test_on_raw_observations`.
+
+    The moments of every segment and group are calculated in a single groupby pass, and every segment is then tested
+    in a single vectorised calculation.
+
+    Parameters
+    ----------
+    observations : pd.DataFrame
+        Observations for every group and segment in the experiment.
+    segment_columns : list[str]
+        Columns whose combinations of values define the segments.
+    metric_column : str
+        Column containing the value of each observation. Missing values are ignored.
+    group_1 : str
+        Name of specific group in the experiment.
+    group_2 : str
+        Name of other group in the experiment which group_1 will be compared against.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metric is a proportion (e.g. % conversion rate) or mean (e.g. average spend).
+    group_column : str (default is 'sample_group')
+        Column denoting the experimental group of each observation.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    correction : str 'bonferroni', 'holm', 'benjamini-hochberg' or None (default)
+        How to adjust the p-values for the number of segments tested, as per
+        `parametric_significance_test_on_multiple_groups`. If None, the p-values are not adjusted.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, which the adjusted p-values are compared against.
+    validate_observations : bool (default is True)
+        Whether to check that observations are all represented as 0 or 1 when measuring proportions.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per segment, with the segment columns followed by:
+            'group_1_count', 'group_2_count': number of observations of each group in the segment.
+            'group_1_mean', 'group_2_mean': mean of the metric for each group in the segment.
+            'test_statistic': z-test statistic when measuring proportions, and t-test statistic for means.
+            'p_value': p-value for the segment on its own.
+            'adjusted_p_value': p-value adjusted for the number of segments.
+            'significant': whether the adjusted p-value is below the significance level.
+        Segments with no observations for one of the groups have a p-value and test-statistic of nan.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If `measurement_type`, `alternative_hypothesis` or `correction` are not valid.
+    ValueError
+        If the experiment metric is a proportion, but the individual observations are not all represented as 0 or 1.
+
+    Examples
+    --------
+    >>> parametric_significance_test_by_segment(
+    >>>     experiment,
+    >>>     segment_columns=['country', 'platform'],
+    >>>     metric_column='spend',
+    >>>     group_1='treatment',
+    >>>     group_2='control',
+    >>>     measurement_type='mean',
+    >>> )
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+    _check_experiment_inputs.validate_multiple_comparison_correction_is_valid(correction)
+
+    if measurement_type == 'proportion' and validate_observations:
+        _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(
+            observations[metric_column].dropna()
+        )
+
+    # Grouping every record (rather than filtering to the two groups first) avoids copying the observations
+    group_moments = _moments_by_group(observations, list(segment_columns) + [group_column], metric_column)
+
+    moments_by_group = [
+        group_moments.loc[group_moments.index.get_level_values(group_column) == group].droplevel(group_column)
+        for group in [group_1, group_2]
+    ]
+    segments = moments_by_group[0].index.union(moments_by_group[1].index)
+    group_1_moments, group_2_moments = [moments.reindex(segments) for moments in moments_by_group]
+
+    p_values, test_statistics = _moment_statistics.two_sample_test_from_moments(
+        group_1_moments['count'].to_numpy(dtype=float),
+        group_1_moments['mean'].to_numpy(dtype=float),
+        group_1_moments['sum_of_squared_deviations'].to_numpy(dtype=float),
+        group_2_moments['count'].to_numpy(dtype=float),
+        group_2_moments['mean'].to_numpy(dtype=float),
+        group_2_moments['sum_of_squared_deviations'].to_numpy(dtype=float),
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    if correction is None:
+        adjusted_p_values = p_values
+    else:
+        adjusted_p_values = _moment_statistics.adjust_p_values_for_multiple_comparisons(p_values, correction)
+
+    results = group_1_moments[['count', 'mean']].add_prefix('group_1_').join(
+        group_2_moments[['count', 'mean']].add_prefix('group_2_')
+    )
+    results = results[['group_1_count', 'group_2_count', 'group_1_mean', 'group_2_mean']].fillna(
+        {'group_1_count': 0, 'group_2_count': 0}
+    )
+    results['test_statistic'] = test_statistics
+    results['p_value'] = p_values
+    results['adjusted_p_value'] = adjusted_p_values
+    results['significant'] = adjusted_p_values < significance_level
+
+    return results.reset_index()
+
+
+def _moments_by_group(observations: pd.DataFrame, group_columns: List[str], value_column: str) -> pd.DataFrame:
+    """
+    Calculate the moments required for a two sample test for every combination of the group columns, in a single
+    groupby pass.
+
+    Parameters
+    ----------
+    observations : pd.DataFrame
+        Observations for every group.
+    group_columns : list[str]
+        Columns to group by, such as the experimental group and metric or segment.
+    value_column : str
+        Column containing the value of each observation. Missing values are ignored.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'count', 'mean' and 'sum_of_squared_deviations', indexed by each combination of the group columns which
+        has observations.
+    """
+
+    group_moments = observations \
+        .groupby(group_columns[0] if len(group_columns) == 1 else group_columns, observed=True)[value_column] \
+        .agg(['count', 'mean', 'var'])
+
+    group_moments['sum_of_squared_deviations'] = \
+        (group_moments['var'] * (group_moments['count'] - 1)).where(group_moments['count'] > 1, 0.0)
+
+    return group_moments.loc[group_moments['count'] > 0, ['count', 'mean', 'sum_of_squared_deviations']]
+
+
+def _paired_moments_of_observations(first_values: np.ndarray, second_values: np.ndarray) -> List[np.ndarray]:
+    """
+    Calculate the moments of two values recorded for every observation (e.g. a metric and its covariate, or the
+    numerator and denominator of a ratio), along with their cross deviations.
+
+    Parameters
+    ----------
+    first_values : numpy array_like
+        1-D array of the first value of each observation, or 2-D array of shape (observations, metrics).
+    second_values : numpy array_like
+        Second value of each observation, of the same shape as `first_values`.
+
+    Returns
+    -------
+    list[numpy.ndarray]
+        Number of observations, then the mean and sum of squared deviations of the first values, then those of the
+        second values, and finally the sum of their cross deviations.
+    """
+
+    nobs, first_mean, first_sum_of_squared_deviations = _moment_statistics.moments_of_observations(first_values)
+    _, second_mean, second_sum_of_squared_deviations = _moment_statistics.moments_of_observations(second_values)
+
+    return [
+        nobs, first_mean, first_sum_of_squared_deviations, second_mean, second_sum_of_squared_deviations,
+        _moment_statistics.sum_of_cross_deviations(first_values, second_values),
+    ]
+
+
+def _paired_moments_from_sums(
+        count: np.ndarray,
+        first_sum: np.ndarray,
+        first_sum_of_squares: np.ndarray,
+        second_sum: np.ndarray,
+        second_sum_of_squares: np.ndarray,
+        sum_of_products: np.ndarray,
+) -> List[np.ndarray]:
+    """
+    Convert the sums of two values recorded for every observation into the moments returned by
+    `_paired_moments_of_observations`.
+
+    Parameters
+    ----------
+    count : numpy array_like
+        Number of observations.
+    first_sum, first_sum_of_squares : numpy array_like
+        Sum, and sum of squares, of the first values.
+    second_sum, second_sum_of_squares : numpy array_like
+        Sum, and sum of squares, of the second values.
+    sum_of_products : numpy array_like
+        Sum of the first value multiplied by the second value of each observation.
+
+    Returns
+    -------
+    list[numpy.ndarray]
+        Number of observations, then the mean and sum of squared deviations of the first values, then those of the
+        second values, and finally the sum of their cross deviations.
+    """
+
+    count = np.asarray(count, dtype=float)
+    first_sum = np.asarray(first_sum, dtype=float)
+    second_sum = np.asarray(second_sum, dtype=float)
+
+    first_sum_of_squared_deviations = _sum_of_squared_deviations_from_sums(count, first_sum, first_sum_of_squares)
+    second_sum_of_squared_deviations = _sum_of_squared_deviations_from_sums(count, second_sum, second_sum_of_squares)
+
+    # Rounding error is bounded in the same way, as the cross deviations can be no larger than allowed by the
+    # Cauchy-Schwarz inequality
+    largest_cross_deviations = np.sqrt(first_sum_of_squared_deviations * second_sum_of_squared_deviations)
+    sum_of_cross_deviations = np.clip(
+        np.asarray(sum_of_products, dtype=float) - first_sum * second_sum / count,
+        -largest_cross_deviations,
+        largest_cross_deviations,
+    )
+
+    return [
+        count,
+        first_sum / count,
+        first_sum_of_squared_deviations,
+        second_sum / count,
+        second_sum_of_squared_deviations,
+        sum_of_cross_deviations,
+    ]
+
+
+def _sum_of_squared_deviations_from_sums(
+        count: np.ndarray,
+        total: np.ndarray,
+        sum_of_squares: np.ndarray,
+) -> np.ndarray:
+    """
+    Sum of the squared deviations of the observations from their mean, given only their sum and sum of squares.
+
+    Subtracting count * mean ** 2 from the sum of squares cancels most of their significant digits when the mean is
+    large compared to the spread of the observations, and the rounding error left can make the result negative, in
+    which case it is clipped at 0. Observations accumulated with Welford's algorithm (e.g. in
+    :py:class:`ds_utils.hypothesis_testing.streaming.GroupAccumulator`) avoid this.
+
+    Parameters
+    ----------
+    count : numpy array_like
+        Number of observations.
+    total : numpy array_like
+        Sum of the observations.
+    sum_of_squares : numpy array_like
+        Sum of the squared observations.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sum of squared deviations from the mean.
+    """
+
+    total = np.asarray(total, dtype=float)
+
+    return np.maximum(np.asarray(sum_of_squares, dtype=float) - total * total / np.asarray(count, dtype=float), 0.0)
+
+
 def _print_interpretation_of_p_value(p_value: float, significance_level: float) -> None:
     """
     Prints message for the user indicating whether the differences observed in the experiment can be deemed significant.
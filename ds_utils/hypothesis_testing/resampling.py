@@ -0,0 +1,533 @@
+"""
+Test for significance using resampling (permutation and bootstrap) rather than parametric assumptions, which suits
+heavy-tailed metrics such as revenue per user.
+
+Replicates are drawn in chunks of a fixed size, each with an independent random stream spawned from a single seed, and
+chunks are grouped into vectorised blocks sized to a memory budget. Results are therefore reproducible for a given
+`random_state` regardless of the memory budget, and of whether the blocks are run in a single process or spread across
+a pool of processes.
+"""
+
+# Standard library imports
+from concurrent import futures
+import os
+from typing import Callable, List, Tuple, Union
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from ds_utils.hypothesis_testing import _check_experiment_inputs, evaluation
+
+
+# Number of replicates drawn from each random stream, fixed so that results do not depend on how they are blocked
+_REPLICATES_PER_STREAM = 16
+
+
+def permutation_significance_test_on_raw_observations(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        n_resamples: int = 10_000,
+        random_state: Union[int, np.random.SeedSequence] = None,
+        memory_budget_bytes: int = 2 ** 27,
+        n_jobs: int = 1,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between the means of the observations recorded for two experimental groups, by
+    comparing the observed difference against the differences obtained when the observations are randomly reassigned
+    between the groups.
+
+    Makes no assumption about the distribution of the observations, so is appropriate for heavy-tailed metrics where
+    a t-test may be unreliable.
+
+    Parameters
+    ----------
+    group_1_observations : numpy array_like
+        Observations for specific group in the experiment.
+    group_2_observations : numpy array_like
+        Observations for other group in the experiment which group_1 will be compared against.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive.
+    n_resamples : int (default is 10,000)
+        Number of random permutations. The smallest attainable p-value is 1 / (n_resamples + 1).
+    random_state : int or numpy.random.SeedSequence (default is None)
+        Seed for the random permutations. If None, fresh entropy is used and results are not reproducible.
+    memory_budget_bytes : int (default is 2 ** 27, i.e. 128 MiB)
+        Approximate memory used by each block of permutations (in each process, if `n_jobs` is not 1). Blocks hold
+        at least 16 permutations, so may exceed a very small budget.
+    n_jobs : int (default is 1)
+        Number of processes to spread the blocks across. -1 uses every CPU.
+    verbose : bool (default is True)
+        Whether to print an interpretation of the p-value.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) test-statistic, which is the difference between the mean of group_1 and the mean of group_2.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If `alternative_hypothesis` is not valid, or `n_resamples` is not positive.
+    ValueError
+        If either group is empty, or contains missing (nan) or infinite values.
+    """
+
+    group_1_observations, group_2_observations = _validate_resampling_inputs(
+        group_1_observations, group_2_observations, alternative_hypothesis, significance_level, n_resamples
+    )
+
+    observed_difference = group_1_observations.mean() - group_2_observations.mean()
+
+    # Each replicate holds the indices of the smaller group, and the observations gathered with them (the random keys
+    # from which the indices are drawn are only held for one chunk of replicates at a time)
+    bytes_per_replicate = max(1, min(group_1_observations.size, group_2_observations.size)) * (8 + 8)
+
+    null_differences = _resample_in_blocks(
+        resample_block=_permutation_block,
+        observations=(np.concatenate([group_1_observations, group_2_observations]), group_1_observations.size),
+        n_resamples=n_resamples,
+        random_state=random_state,
+        replicates_per_block=max(1, memory_budget_bytes // bytes_per_replicate),
+        n_jobs=n_jobs,
+    )
+
+    p_value = _p_value_from_null_distribution(observed_difference, null_differences, alternative_hypothesis)
+
+    if verbose:
+        evaluation._print_interpretation_of_p_value(p_value, significance_level)  # pylint: disable=protected-access
+
+    return p_value, observed_difference
+
+
+def bootstrap_significance_test_on_raw_observations(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        alternative_hypothesis: str = 'two-sided',
+        significance_level: float = 0.05,
+        n_resamples: int = 10_000,
+        random_state: Union[int, np.random.SeedSequence] = None,
+        memory_budget_bytes: int = 2 ** 27,
+        n_jobs: int = 1,
+        verbose: bool = True,
+) -> Tuple[float, float]:
+    """
+    Tests for a significant difference between the means of the observations recorded for two experimental groups, by
+    comparing the observed difference against the differences between bootstrap resamples of each group, after
+    shifting both groups to the same mean so that the null hypothesis holds.
+
+    Unlike the permutation test, the groups are resampled separately, so this remains valid when the groups have
+    different variances or shapes.
+
+    Parameters
+    ----------
+    group_1_observations : numpy array_like
+        Observations for specific group in the experiment.
+    group_2_observations : numpy array_like
+        Observations for other group in the experiment which group_1 will be compared against.
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, i.e. likelihood of a false positive.
+    n_resamples : int (default is 10,000)
+        Number of bootstrap resamples. The smallest attainable p-value is 1 / (n_resamples + 1).
+    random_state : int or numpy.random.SeedSequence (default is None)
+        Seed for the resamples. If None, fresh entropy is used and results are not reproducible.
+    memory_budget_bytes : int (default is 2 ** 27, i.e. 128 MiB)
+        Approximate memory used by each block of resamples (in each process, if `n_jobs` is not 1). Blocks hold at
+        least 16 resamples, so may exceed a very small budget.
+    n_jobs : int (default is 1)
+        Number of processes to spread the blocks across. -1 uses every CPU.
+    verbose : bool (default is True)
+        Whether to print an interpretation of the p-value.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) p-value, i.e. the probability of obtaining results as extreme as the observed result.
+        (2nd value) test-statistic, which is the difference between the mean of group_1 and the mean of group_2.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If `alternative_hypothesis` is not valid, or `n_resamples` is not positive.
+    ValueError
+        If either group is empty, or contains missing (nan) or infinite values.
+    """
+
+    group_1_observations, group_2_observations = _validate_resampling_inputs(
+        group_1_observations, group_2_observations, alternative_hypothesis, significance_level, n_resamples
+    )
+
+    observed_difference = group_1_observations.mean() - group_2_observations.mean()
+
+    null_differences = _resample_in_blocks(
+        resample_block=_bootstrap_block,
+        observations=(group_1_observations - group_1_observations.mean(),
+                      group_2_observations - group_2_observations.mean()),
+        n_resamples=n_resamples,
+        random_state=random_state,
+        replicates_per_block=_bootstrap_replicates_per_block(
+            group_1_observations, group_2_observations, memory_budget_bytes
+        ),
+        n_jobs=n_jobs,
+    )
+
+    p_value = _p_value_from_null_distribution(observed_difference, null_differences, alternative_hypothesis)
+
+    if verbose:
+        evaluation._print_interpretation_of_p_value(p_value, significance_level)  # pylint: disable=protected-access
+
+    return p_value, observed_difference
+
+
+def bootstrap_confidence_interval(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        confidence_level: float = 0.95,
+        n_resamples: int = 10_000,
+        random_state: Union[int, np.random.SeedSequence] = None,
+        memory_budget_bytes: int = 2 ** 27,
+        n_jobs: int = 1,
+) -> Tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval for the difference between the mean of group_1 and the mean of group_2.
+
+    Parameters
+    ----------
+    group_1_observations : numpy array_like
+        Observations for specific group in the experiment.
+    group_2_observations : numpy array_like
+        Observations for other group in the experiment which group_1 will be compared against.
+    confidence_level : float in interval (0,1) (default is 0.95)
+        Probability that the interval contains the true difference.
+    n_resamples : int (default is 10,000)
+        Number of bootstrap resamples.
+    random_state : int or numpy.random.SeedSequence (default is None)
+        Seed for the resamples. If None, fresh entropy is used and results are not reproducible.
+    memory_budget_bytes : int (default is 2 ** 27, i.e. 128 MiB)
+        Approximate memory used by each block of resamples (in each process, if `n_jobs` is not 1). Blocks hold at
+        least 16 resamples, so may exceed a very small budget.
+    n_jobs : int (default is 1)
+        Number of processes to spread the blocks across. -1 uses every CPU.
+
+    Returns
+    -------
+    Tuple[float, float]
+        (1st value) Lower bound of the interval.
+        (2nd value) Upper bound of the interval.
+
+    Raises
+    ------
+    ValueError
+        If `confidence_level` does not adhere to 0 < confidence_level < 1, or `n_resamples` is not positive.
+    ValueError
+        If either group is empty, or contains missing (nan) or infinite values.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(confidence_level, 'confidence_level')
+    group_1_observations, group_2_observations = _validate_resampling_inputs(
+        group_1_observations, group_2_observations, 'two-sided', 1 - confidence_level, n_resamples
+    )
+
+    differences = _resample_in_blocks(
+        resample_block=_bootstrap_block,
+        observations=(group_1_observations, group_2_observations),
+        n_resamples=n_resamples,
+        random_state=random_state,
+        replicates_per_block=_bootstrap_replicates_per_block(
+            group_1_observations, group_2_observations, memory_budget_bytes
+        ),
+        n_jobs=n_jobs,
+    )
+
+    lower_bound, upper_bound = np.quantile(differences, [(1 - confidence_level) / 2, (1 + confidence_level) / 2])
+
+    return lower_bound, upper_bound
+
+
+def _validate_resampling_inputs(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        alternative_hypothesis: str,
+        significance_level: float,
+        n_resamples: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Check the parameters of a resampling test are valid, and convert the observations to 1-D float arrays.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1.
+    ValueError
+        If `alternative_hypothesis` is not valid, or `n_resamples` is not positive.
+    ValueError
+        If either group is empty, or contains missing (nan) or infinite values.
+    """
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    if n_resamples < 1:
+        raise ValueError('The number of resamples must be positive.')
+
+    group_1_observations = np.ravel(np.asarray(group_1_observations, dtype=float))
+    group_2_observations = np.ravel(np.asarray(group_2_observations, dtype=float))
+
+    # A missing or infinite observation makes the observed difference nan, which no replicate would count as extreme,
+    # wrongly giving the smallest possible p-value
+    for observations in [group_1_observations, group_2_observations]:
+        if observations.size == 0:
+            raise ValueError('Both groups must contain at least one observation.')
+        if not np.isfinite(observations).all():
+            raise ValueError('Observations must not contain missing (nan) or infinite values.')
+
+    return group_1_observations, group_2_observations
+
+
+def _bootstrap_replicates_per_block(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        memory_budget_bytes: int,
+) -> int:
+    """Number of bootstrap replicates which fit within the memory budget, given each holds indices and values."""
+
+    bytes_per_replicate = max(1, group_1_observations.size + group_2_observations.size) * (8 + 8)
+
+    return max(1, memory_budget_bytes // bytes_per_replicate)
+
+
+def _p_value_from_null_distribution(
+        observed_difference: float,
+        null_differences: np.ndarray,
+        alternative_hypothesis: str,
+) -> float:
+    """
+    Proportion of the replicates under the null hypothesis at least as extreme as the observed difference, counting
+    the observed difference itself so that the p-value is never 0 (as per Phipson & Smyth, 2010).
+
+    Parameters
+    ----------
+    observed_difference : float
+        Difference between the means of the groups.
+    null_differences : numpy.ndarray
+        Differences between the means of each replicate under the null hypothesis.
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether the test is 'two-sided', or checking whether the first group is 'smaller' or 'larger' than the second.
+
+    Returns
+    -------
+    float
+        p-value.
+    """
+
+    # Tolerance so that replicates equal to the observed difference, other than by rounding, count as extreme
+    tolerance = 1e-12 * max(1.0, abs(observed_difference))
+
+    if alternative_hypothesis == 'larger':
+        n_extreme = np.count_nonzero(null_differences >= observed_difference - tolerance)
+    elif alternative_hypothesis == 'smaller':
+        n_extreme = np.count_nonzero(null_differences <= observed_difference + tolerance)
+    else:
+        n_extreme = np.count_nonzero(np.abs(null_differences) >= abs(observed_difference) - tolerance)
+
+    return (n_extreme + 1) / (null_differences.size + 1)
+
+
+def _resample_in_blocks(
+        resample_block: Callable,
+        observations: tuple,
+        n_resamples: int,
+        random_state: Union[int, np.random.SeedSequence],
+        replicates_per_block: int,
+        n_jobs: int,
+) -> np.ndarray:
+    """
+    Generate replicates in chunks of `_REPLICATES_PER_STREAM`, each with an independent random stream spawned from
+    `random_state`, grouping the chunks into blocks which are optionally spread across a pool of processes.
+
+    Each chunk draws the same replicates whichever block it falls in, so the results are the same however many
+    replicates are in each block and however many processes are used.
+
+    Parameters
+    ----------
+    resample_block : Callable
+        Function generating a block of replicates, given the `observations`, then a random generator and the number of
+        replicates for each chunk in the block.
+    observations : tuple
+        Arguments passed to `resample_block` ahead of the chunks, sent to each process only once.
+    n_resamples : int
+        Total number of replicates.
+    random_state : int or numpy.random.SeedSequence
+        Seed from which the stream of each chunk is spawned.
+    replicates_per_block : int
+        Number of replicates in each block, rounded down to whole chunks (of which there is at least one).
+    n_jobs : int
+        Number of processes, where 1 runs in the current process and -1 uses every CPU.
+
+    Returns
+    -------
+    numpy.ndarray
+        Statistic of each replicate.
+    """
+
+    chunk_sizes = [_REPLICATES_PER_STREAM] * (n_resamples // _REPLICATES_PER_STREAM)
+    if n_resamples % _REPLICATES_PER_STREAM:
+        chunk_sizes.append(n_resamples % _REPLICATES_PER_STREAM)
+
+    seed_sequence = random_state if isinstance(random_state, np.random.SeedSequence) \
+        else np.random.SeedSequence(random_state)
+    chunk_seeds = seed_sequence.spawn(len(chunk_sizes))
+
+    chunks_per_block = max(1, replicates_per_block // _REPLICATES_PER_STREAM)
+    block_starts = range(0, len(chunk_sizes), chunks_per_block)
+    block_seeds = [chunk_seeds[start:start + chunks_per_block] for start in block_starts]
+    block_sizes = [chunk_sizes[start:start + chunks_per_block] for start in block_starts]
+
+    if n_jobs == 1:
+        blocks = [
+            _resample_block_from_seeds(resample_block, observations, seeds, sizes)
+            for seeds, sizes in zip(block_seeds, block_sizes)
+        ]
+    else:
+        with futures.ProcessPoolExecutor(
+                max_workers=os.cpu_count() if n_jobs == -1 else n_jobs,
+                initializer=_set_worker_observations,
+                initargs=observations,
+        ) as executor:
+            blocks = list(executor.map(_resample_block_in_worker, [resample_block] * len(block_sizes), block_seeds,
+                                       block_sizes))
+
+    return np.concatenate(blocks)
+
+
+def _resample_block_from_seeds(
+        resample_block: Callable,
+        observations: tuple,
+        chunk_seeds: List[np.random.SeedSequence],
+        chunk_sizes: List[int],
+) -> np.ndarray:
+    """Generate a block of replicates, with a random generator created from the seed of each chunk in the block."""
+
+    random_generators = [np.random.default_rng(chunk_seed) for chunk_seed in chunk_seeds]
+
+    return resample_block(*observations, random_generators, chunk_sizes)
+
+
+# Observations shared by every block run within a worker process, set once when the process starts
+_WORKER_OBSERVATIONS: tuple = ()
+
+
+def _set_worker_observations(*observations) -> None:
+    """Store the observations within a worker process, so that they are not sent again with every block."""
+
+    global _WORKER_OBSERVATIONS  # pylint: disable=global-statement
+    _WORKER_OBSERVATIONS = observations
+
+
+def _resample_block_in_worker(
+        resample_block: Callable,
+        chunk_seeds: List[np.random.SeedSequence],
+        chunk_sizes: List[int],
+) -> np.ndarray:
+    """Generate a block of replicates within a worker process, using the observations stored when it started."""
+
+    return _resample_block_from_seeds(resample_block, _WORKER_OBSERVATIONS, chunk_seeds, chunk_sizes)
+
+
+def _permutation_block(
+        pooled_observations: np.ndarray,
+        group_1_size: int,
+        random_generators: List[np.random.Generator],
+        chunk_sizes: List[int],
+) -> np.ndarray:
+    """
+    Difference in means between the groups for a block of random reassignments of the pooled observations.
+
+    Parameters
+    ----------
+    pooled_observations : numpy.ndarray
+        Observations of group_1 followed by those of group_2.
+    group_1_size : int
+        Number of observations in group_1.
+    random_generators : List[numpy.random.Generator]
+        Source of randomness for each chunk in this block.
+    chunk_sizes : List[int]
+        Number of permutations in each chunk.
+
+    Returns
+    -------
+    numpy.ndarray
+        Difference in means for each permutation.
+    """
+
+    pooled_size = pooled_observations.size
+    smaller_group_size = min(group_1_size, pooled_size - group_1_size)
+
+    # Only the smaller group needs drawing (without replacement). Each row of a chunk takes the positions of its
+    # smallest random keys, which is a uniformly random subset, so every chunk is drawn in a single call to its random
+    # generator before the sums are gathered for the whole block at once
+    sampled_indices = np.concatenate([
+        random_generator.random((chunk_size, pooled_size)).argpartition(smaller_group_size - 1, axis=1)[
+            :, :smaller_group_size
+        ]
+        for random_generator, chunk_size in zip(random_generators, chunk_sizes)
+    ])
+
+    smaller_group_sums = pooled_observations[sampled_indices].sum(axis=1)
+    if smaller_group_size == group_1_size:
+        group_1_sums = smaller_group_sums
+    else:
+        group_1_sums = pooled_observations.sum() - smaller_group_sums
+    group_2_sums = pooled_observations.sum() - group_1_sums
+
+    return group_1_sums / group_1_size - group_2_sums / (pooled_size - group_1_size)
+
+
+def _bootstrap_block(
+        group_1_observations: np.ndarray,
+        group_2_observations: np.ndarray,
+        random_generators: List[np.random.Generator],
+        chunk_sizes: List[int],
+) -> np.ndarray:
+    """
+    Difference in means between bootstrap resamples (with replacement) of each group, for a block of resamples.
+
+    Parameters
+    ----------
+    group_1_observations : numpy.ndarray
+        Observations for group_1.
+    group_2_observations : numpy.ndarray
+        Observations for group_2.
+    random_generators : List[numpy.random.Generator]
+        Source of randomness for each chunk in this block.
+    chunk_sizes : List[int]
+        Number of resamples in each chunk.
+
+    Returns
+    -------
+    numpy.ndarray
+        Difference in means for each resample.
+    """
+
+    group_means: List[np.ndarray] = []
+
+    for observations in (group_1_observations, group_2_observations):
+        resampled_indices = np.concatenate([
+            random_generator.integers(0, observations.size, size=(chunk_size, observations.size))
+            for random_generator, chunk_size in zip(random_generators, chunk_sizes)
+        ])
+        group_means.append(observations[resampled_indices].mean(axis=1))
+
+    return group_means[0] - group_means[1]
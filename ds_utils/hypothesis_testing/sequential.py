@@ -0,0 +1,179 @@
+"""
+Evaluate an experiment repeatedly as its results arrive, using always-valid p-values and confidence sequences so that
+the experiment can be checked at any time (and stopped early) without inflating the rate of false positives.
+"""
+
+# Standard library imports
+from typing import Tuple
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from ds_utils.hypothesis_testing import _check_experiment_inputs, evaluation
+from ds_utils.hypothesis_testing.streaming import GroupAccumulator
+
+
+class SequentialTest:
+    """
+    Two-sided mixture sequential probability ratio test (mSPRT) for the difference between the means of two groups, as
+    per Johari et al., "Always Valid Inference: Continuous Monitoring of A/B Tests" (2017).
+
+    Only the running moments of each group are kept (see
+    :py:class:`ds_utils.hypothesis_testing.streaming.GroupAccumulator`), so each look at the experiment costs time in
+    proportion to the new observations rather than every observation so far. Unlike calling
+    :py:func:`ds_utils.hypothesis_testing.evaluation.parametric_significance_test_on_raw_observations` after every
+    look, the p-value remains valid however often (and whenever) the experiment is checked, so the experiment can be
+    stopped as soon as the p-value drops below the significance level.
+
+    Observations can be 1-D (a single metric) or 2-D of shape (observations, metrics) to track many metrics at once.
+
+    Parameters
+    ----------
+    mixing_variance : float
+        Variance of the normal prior over the difference between the groups (often denoted tau squared). The test is
+        most powerful for differences of around its square root, so set it to the square of the effect size you
+        expect (or the minimum effect you care about), fixed before the experiment starts.
+    significance_level : float in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error, used for the confidence sequence and interpretation.
+
+    Attributes
+    ----------
+    group_1_accumulator : GroupAccumulator
+        Running moments of the observations for specific group in the experiment.
+    group_2_accumulator : GroupAccumulator
+        Running moments of the observations for other group in the experiment which group_1 will be compared against.
+    p_value : numpy.ndarray
+        Always-valid p-value, which never increases from one look to the next.
+    confidence_sequence : Tuple[numpy.ndarray, numpy.ndarray]
+        Lower and upper bound for the difference between the mean of group_1 and the mean of group_2, which contains
+        the true difference at every look with probability 1 - `significance_level`, and never widens.
+    n_looks : int
+        Number of times the experiment has been evaluated.
+
+    Raises
+    ------
+    ValueError
+        If `significance_level` does not adhere to 0 < significance_level < 1, or `mixing_variance` is not positive.
+
+    Examples
+    --------
+    >>> sequential_test = SequentialTest(mixing_variance=0.5 ** 2)
+    >>> for control_spend, treatment_spend in daily_results:
+    >>>     sequential_test.update(control_spend, treatment_spend)
+    >>>     p_value, (lower_bound, upper_bound) = sequential_test.evaluate()
+    >>>     if sequential_test.is_significant:
+    >>>         break
+    """
+
+    def __init__(self, mixing_variance: float, significance_level: float = 0.05):
+        _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+
+        if mixing_variance <= 0:
+            raise ValueError('The mixing variance must be positive.')
+
+        self.mixing_variance = mixing_variance
+        self.significance_level = significance_level
+        self.group_1_accumulator = GroupAccumulator()
+        self.group_2_accumulator = GroupAccumulator()
+        self.p_value = np.asarray(1.0)
+        self.confidence_sequence = (np.asarray(-np.inf), np.asarray(np.inf))
+        self.n_looks = 0
+
+    def __repr__(self) -> str:
+        return f'SequentialTest(mixing_variance={self.mixing_variance}, n_looks={self.n_looks}, p_value={self.p_value})'
+
+    @property
+    def is_significant(self) -> np.ndarray:
+        """Whether the always-valid p-value is below the significance level, at which point the test can stop."""
+        return self.p_value < self.significance_level
+
+    def update(
+            self,
+            group_1_observations: np.ndarray = None,
+            group_2_observations: np.ndarray = None,
+    ) -> 'SequentialTest':
+        """
+        Add the observations which have arrived since the last update.
+
+        Parameters
+        ----------
+        group_1_observations : numpy array_like (default is None)
+            New observations for group_1, if any.
+        group_2_observations : numpy array_like (default is None)
+            New observations for group_2, if any.
+
+        Returns
+        -------
+        SequentialTest
+            The same test, so that updates can be chained.
+        """
+
+        if group_1_observations is not None:
+            self.group_1_accumulator.update(group_1_observations)
+        if group_2_observations is not None:
+            self.group_2_accumulator.update(group_2_observations)
+
+        return self
+
+    def evaluate(self, verbose: bool = True) -> Tuple[float, Tuple[float, float]]:
+        """
+        Look at the experiment given the observations so far, updating the always-valid p-value and confidence
+        sequence.
+
+        Until each group has at least two observations, the variance of the difference is unknown and the look leaves
+        the p-value and confidence sequence unchanged.
+
+        Parameters
+        ----------
+        verbose : bool (default is True)
+            Whether to display an interpretation of the p-value. Only applies when testing a single metric.
+
+        Returns
+        -------
+        Tuple[float, Tuple[float, float]]
+            (1st value) Always-valid p-value.
+            (2nd value) Lower and upper bound of the confidence sequence for the difference between the mean of group_1
+            and the mean of group_2.
+            Arrays are returned instead if many metrics are being tracked.
+        """
+
+        difference = self.group_1_accumulator.mean - self.group_2_accumulator.mean
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            difference_variance = self.group_1_accumulator.variance / self.group_1_accumulator.count \
+                + self.group_2_accumulator.variance / self.group_2_accumulator.count
+            mixture_variance = difference_variance + self.mixing_variance
+
+            # Logarithm of the mixture likelihood ratio against no difference between the groups
+            log_likelihood_ratio = 0.5 * np.log(difference_variance / mixture_variance) \
+                + difference ** 2 * self.mixing_variance / (2 * difference_variance * mixture_variance)
+
+            # Differences whose likelihood ratio is below 1 / significance_level
+            half_width = np.sqrt(
+                difference_variance * mixture_variance / self.mixing_variance
+                * (np.log(mixture_variance / difference_variance) - 2 * np.log(self.significance_level))
+            )
+
+        known_variance = np.isfinite(difference_variance) & (difference_variance > 0)
+
+        self.p_value = np.where(
+            known_variance, np.minimum(self.p_value, np.exp(-np.maximum(log_likelihood_ratio, 0))), self.p_value
+        )
+        self.confidence_sequence = (
+            np.where(known_variance, np.maximum(self.confidence_sequence[0], difference - half_width),
+                     self.confidence_sequence[0]),
+            np.where(known_variance, np.minimum(self.confidence_sequence[1], difference + half_width),
+                     self.confidence_sequence[1]),
+        )
+        self.n_looks += 1
+
+        if np.ndim(self.p_value) == 0:
+            if verbose:
+                evaluation._print_interpretation_of_p_value(  # pylint: disable=protected-access
+                    float(self.p_value), self.significance_level
+                )
+
+            return float(self.p_value), (float(self.confidence_sequence[0]), float(self.confidence_sequence[1]))
+
+        return self.p_value, self.confidence_sequence
@@ -2,16 +2,26 @@
 Helper functions when setting up an experiment.
 """
 
+from __future__ import annotations
+
 # Standard library imports
-from typing import Union
+import hashlib
+import json
+import os
+from os import path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, Union
+import uuid
 
 # Third party imports
 import numpy as np
 from numpy import random
-import pandas as pd
-from statsmodels.stats import power as stats_power
+
+# pandas, scipy.stats and statsmodels take seconds to import, so are imported within the functions which use them
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Internal modules
+from ds_utils import _lru_cache
 from ds_utils.hypothesis_testing import _check_experiment_inputs
 
 
@@ -93,11 +103,23 @@ def calculate_required_sample_size(
         power: float = 0.8,
         significance_level: float = 0.05,
         standard_deviation: float = None,
+        covariate_correlation: float = None,
+        use_cache: bool = True,
 ) -> int:
     """
     Calculate the required sample size for an experiment given a certain degree of change that we want to confidently
     detect.
 
+    If the experiment will be evaluated with a pre-experiment covariate (CUPED, see
+    :py:func:`ds_utils.hypothesis_testing.evaluation.parametric_significance_test_with_covariate_on_raw_observations`),
+    set `covariate_correlation` to account for the variance it removes, which reduces the required sample size by a
+    factor of 1 - `covariate_correlation` ** 2.
+
+    Results are memoised in a bounded, least-recently-used cache by default (`use_cache=True`), so repeated calls with
+    the same parameters (e.g. from an interactive dashboard) do not repeat the underlying numerical solver. Parameters
+    which agree to 12 significant figures share a result, so set `use_cache=False` to always solve afresh. See
+    `configure_sample_size_cache`.
+
     Parameters
     ----------
     baseline_metric_value : float
@@ -122,6 +144,11 @@ def calculate_required_sample_size(
         is appropriate given the business context.
     standard_deviation : float (default is none)
         Standard deviation for the metric being tested. Only needs to be set if `measurement_type` is 'mean'.
+    covariate_correlation : float in interval (-1,1) (default is None)
+        Expected correlation between the metric and the pre-experiment covariate used to adjust it, e.g. as measured
+        between the metric in two consecutive periods before the experiment. If None, no adjustment is expected.
+    use_cache : bool (default is True)
+        Whether to look up (and store) the result in the sample size cache, which is enabled by default.
 
     Returns
     -------
@@ -134,6 +161,8 @@ def calculate_required_sample_size(
         If `measurement_type` is 'mean' but no `standard_deviation` provided.
     ValueError
         If `significance_level` or `power` not in range (0,1).
+    ValueError
+        If `covariate_correlation` not in range (-1,1).
     ValueError
         If `measurement_type` not in ['proportion', 'mean'].
     """
@@ -146,6 +175,74 @@ def calculate_required_sample_size(
     _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(power, 'power')
     _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
 
+    if covariate_correlation is not None and not -1 < covariate_correlation < 1:
+        raise ValueError('covariate_correlation must adhere to -1 < covariate_correlation < 1.')
+
+    def solve_required_sample_size() -> int:
+        return _solve_required_sample_size(
+            baseline_metric_value, new_metric_value, measurement_type, alternative_hypothesis, power,
+            significance_level, standard_deviation, covariate_correlation,
+        )
+
+    if not use_cache:
+        return solve_required_sample_size()
+
+    # Normalise the parameters so that equivalent values (e.g. 0.8 and np.float64(0.8)) share the same cache entry,
+    # whilst the sample size is still solved for with the values provided
+    cache_key = (
+        _normalise_cache_parameter(baseline_metric_value),
+        _normalise_cache_parameter(new_metric_value),
+        measurement_type,
+        alternative_hypothesis,
+        _normalise_cache_parameter(power),
+        _normalise_cache_parameter(significance_level),
+        _normalise_cache_parameter(standard_deviation) if measurement_type == 'mean' else None,
+        _normalise_cache_parameter(covariate_correlation or None),
+    )
+
+    return _SAMPLE_SIZE_CACHE.get_or_load(key=cache_key, load=lambda: (solve_required_sample_size(), 1))
+
+
+def _solve_required_sample_size(
+        baseline_metric_value: float,
+        new_metric_value: float,
+        measurement_type: str,
+        alternative_hypothesis: str,
+        power: float,
+        significance_level: float,
+        standard_deviation: float,
+        covariate_correlation: float = None,
+) -> int:
+    """
+    Solve for the required sample size of an experiment with statsmodels, once its parameters have been validated.
+
+    Parameters
+    ----------
+    baseline_metric_value : float
+        Baseline value that reflects the current metric we are trying to change.
+    new_metric_value : float
+        The smallest meaningful effect that we wish to be able to detect.
+    measurement_type : str 'proportion', 'mean'
+        Whether the metric is a proportion or mean.
+    alternative_hypothesis : str 'two-sided', 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or checking whether the new metric will be 'smaller' or 'larger'.
+    power : float in interval (0,1)
+        Probability that the test correctly rejects the Null Hypothesis if the Alternative Hypothesis is true.
+    significance_level : float in interval (0,1)
+        The significance level/probability of a type I error.
+    standard_deviation : float
+        Standard deviation for the metric being tested, when `measurement_type` is 'mean'.
+    covariate_correlation : float in interval (-1,1) (default is None)
+        Expected correlation between the metric and the covariate it will be adjusted with, if any.
+
+    Returns
+    -------
+    int
+        Minimum sample size required to satisfy experiment criteria.
+    """
+
+    from statsmodels.stats import power as stats_power  # pylint: disable=import-outside-toplevel
+
     # Calculate sample size required if measuring difference between two proportions and will therefore use a z-test
     if measurement_type == 'proportion':
 
@@ -155,12 +252,7 @@ def calculate_required_sample_size(
             new_proportion=new_metric_value
         )
 
-        required_sample_size = stats_power.zt_ind_solve_power(
-            effect_size=effect_size,
-            alpha=significance_level,
-            power=power,
-            alternative=alternative_hypothesis,
-        )
+        solve_power = stats_power.zt_ind_solve_power
 
     # Calculate sample size required if measuring difference between two means and will therefore use a t-test
     elif measurement_type == 'mean':
@@ -172,17 +264,434 @@ def calculate_required_sample_size(
             standard_deviation=standard_deviation
         )
 
-        required_sample_size = stats_power.tt_ind_solve_power(
+        solve_power = stats_power.tt_ind_solve_power
+
+    # Adjusting for a covariate removes a proportion of the variance equal to its squared correlation with the metric
+    if covariate_correlation:
+        effect_size = effect_size / np.sqrt(1 - covariate_correlation ** 2)
+
+    required_sample_size = solve_power(
+        effect_size=effect_size,
+        alpha=significance_level,
+        power=power,
+        alternative=alternative_hypothesis,
+    )
+
+    return int(required_sample_size)
+
+
+# Every result counts as a size of 1, so the maximum size is a number of results
+_SAMPLE_SIZE_CACHE = _lru_cache.LRUCache(max_size=1024)
+
+
+def configure_sample_size_cache(max_size: int = 1024) -> None:
+    """
+    Set the maximum number of results held by the cache used by `calculate_required_sample_size`.
+
+    Parameters
+    ----------
+    max_size : int (default is 1024)
+        Maximum number of results to hold, beyond which the least recently used results are evicted. Set to 0 to
+        disable caching.
+
+    Raises
+    ------
+    ValueError
+        If `max_size` is negative.
+    """
+
+    if max_size < 0:
+        raise ValueError('The `max_size` of the cache cannot be negative.')
+
+    _SAMPLE_SIZE_CACHE.resize(max_size)
+
+
+def sample_size_cache_info() -> Dict[str, int]:
+    """
+    Statistics for the cache used by `calculate_required_sample_size`.
+
+    Returns
+    -------
+    dict[str, int]
+        'hits', 'misses' and 'evictions' since the cache was last cleared, along with its current 'size' and 'max_size'.
+    """
+
+    cache_info = _SAMPLE_SIZE_CACHE.info()
+
+    return {
+        'hits': cache_info['hits'],
+        'misses': cache_info['misses'],
+        'evictions': cache_info['evictions'],
+        'size': cache_info['entries'],
+        'max_size': cache_info['max_size'],
+    }
+
+
+def clear_sample_size_cache() -> None:
+    """Remove every result from the cache used by `calculate_required_sample_size`, and reset its statistics."""
+
+    _SAMPLE_SIZE_CACHE.clear()
+
+
+def save_sample_size_cache(filename_or_path: str) -> None:
+    """
+    Save the results held by the cache used by `calculate_required_sample_size` to a JSON file, so that they can be
+    reloaded in a later session with `load_sample_size_cache`.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Target where the cached results will be saved. Any existing file is overwritten, atomically, so an interrupted
+        save never leaves a partially written file behind.
+    """
+
+    # If a full filepath has been provided, and the directory does not already exist, then create it
+    directory = path.dirname(filename_or_path)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+
+    # Written to a hidden temporary file, unique to this writer, which only replaces the target once complete
+    temporary_path = path.join(directory, f'.{path.basename(filename_or_path)}.{uuid.uuid4().hex}.tmp')
+
+    try:
+        with open(temporary_path, 'w', encoding='utf-8') as target_destination:
+            json.dump([[list(key), value] for key, value in _SAMPLE_SIZE_CACHE.items()], target_destination)
+            target_destination.flush()
+            os.fsync(target_destination.fileno())
+
+        os.replace(temporary_path, filename_or_path)
+
+    finally:
+        if path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def load_sample_size_cache(filename_or_path: str) -> None:
+    """
+    Add the results saved with `save_sample_size_cache` to the cache used by `calculate_required_sample_size`.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the saved results.
+    """
+
+    with open(filename_or_path, 'r', encoding='utf-8') as file_to_load:
+        saved_entries = json.load(file_to_load)
+
+    for key, value in saved_entries:
+        _SAMPLE_SIZE_CACHE.put(tuple(key), value)
+
+
+def _normalise_cache_parameter(parameter_value: float) -> Union[float, None]:
+    """
+    Represent a numeric parameter consistently regardless of its type (e.g. int, float or numpy scalar), ignoring
+    floating point noise beyond 12 significant figures.
+
+    Parameters
+    ----------
+    parameter_value : float
+        Value of the parameter.
+
+    Returns
+    -------
+    float or None
+        Normalised value, or None if no value was provided.
+    """
+
+    return None if parameter_value is None else float(f'{float(parameter_value):.12g}')
+
+
+def calculate_required_sample_size_grid(
+        baseline_metric_value: Union[float, np.ndarray],
+        new_metric_value: Union[float, np.ndarray],
+        measurement_type: str,
+        *,
+        alternative_hypothesis: str = 'two-sided',
+        power: Union[float, np.ndarray] = 0.8,
+        significance_level: Union[float, np.ndarray] = 0.05,
+        standard_deviation: Union[float, np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calculate the required sample size for many combinations of experiment parameters at once, e.g. when sweeping a
+    grid of baseline values, lifts, powers and significance levels during planning.
+
+    Any of `baseline_metric_value`, `new_metric_value`, `power`, `significance_level` and `standard_deviation` can be
+    arrays, which are broadcast against each other as per numpy's broadcasting rules. The results match those of
+    `calculate_required_sample_size` for each combination, but are solved in a vectorised manner: in closed form (with
+    Newton refinement for two-sided tests) for the z-test, and with a vectorised, bracketed root finder for the t-test.
+
+    Parameters
+    ----------
+    baseline_metric_value : float or numpy array_like
+        Baseline value that reflects the current metric we are trying to change e.g. the existing retention rate.
+    new_metric_value : float or numpy array_like
+        The smallest meaningful effect that we wish to be able to detect.
+    measurement_type : str (must be 'proportion' or 'mean')
+        Whether the metric is a proportion (e.g. % conversion rate) or mean (e.g. average spend).
+    alternative_hypothesis : str 'two-sided' (default), 'larger', 'smaller'
+        Whether you are running a 'two-sided' test, or a one-sided test checking whether the new metric will be
+        'smaller' or 'larger'. Both one-sided alternatives are solved for an effect of the magnitude specified.
+    power : float or numpy array_like in interval (0,1) (default is 0.8)
+        Probability that the test correctly rejects the Null Hypothesis if the Alternative Hypothesis is true.
+    significance_level : float or numpy array_like in interval (0,1) (default is 0.05)
+        The significance level/probability of a type I error.
+    standard_deviation : float or numpy array_like (default is none)
+        Standard deviation for the metric being tested. Only needs to be set if `measurement_type` is 'mean'.
+
+    Returns
+    -------
+    numpy.ndarray
+        Minimum sample size required (for each group) to satisfy the experiment criteria, with the broadcast shape of
+        the parameters. When measuring a mean, this is at least 2, the smallest sample for which a t-test can be run.
+
+    Raises
+    ----------
+    TypeError
+        If `measurement_type` is 'mean' but no `standard_deviation` provided.
+    ValueError
+        If any `significance_level` or `power` not in range (0,1).
+    ValueError
+        If `measurement_type` not in ['proportion', 'mean'].
+    ValueError
+        If any `baseline_metric_value` is the same as its `new_metric_value`, as no sample is large enough to detect a
+        difference of zero.
+    ValueError
+        If the sample size of a t-test cannot be solved for any set of parameters.
+    """
+
+    from scipy import stats  # pylint: disable=import-outside-toplevel
+
+    # Validate that experiment's parameters are appropriate
+    if measurement_type == 'mean' and standard_deviation is None:
+        raise TypeError("When measuring a mean for your test, you must also specify its existing `standard_deviation`.")
+
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(significance_level, 'significance_level')
+    _check_experiment_inputs.validate_experiment_parameter_between_0_and_1(power, 'power')
+    _check_experiment_inputs.validate_measurement_type_is_valid(measurement_type)
+    _check_experiment_inputs.validate_alternative_hypothesis_is_valid(alternative_hypothesis)
+
+    # How big is the shift we want to capture
+    if measurement_type == 'proportion':
+        effect_size = _calculate_effect_size_proportions(
+            baseline_proportion=np.asarray(baseline_metric_value, dtype=float),
+            new_proportion=np.asarray(new_metric_value, dtype=float),
+        )
+    else:
+        effect_size = _calculate_effect_size_means(
+            baseline_mean=np.asarray(baseline_metric_value, dtype=float),
+            new_mean=np.asarray(new_metric_value, dtype=float),
+            standard_deviation=np.asarray(standard_deviation, dtype=float),
+        )
+
+    if np.any(effect_size == 0):
+        raise ValueError('The `new_metric_value` must be different to the `baseline_metric_value`.')
+
+    effect_size, power, significance_level = np.broadcast_arrays(effect_size, power, significance_level)
+    is_two_sided = alternative_hypothesis == 'two-sided'
+
+    # Normal approximation, ignoring the (negligible) chance of rejecting in the wrong tail of a two-sided test
+    critical_value = stats.norm.isf(significance_level / 2 if is_two_sided else significance_level)
+    required_sample_size = 2 * ((critical_value + stats.norm.ppf(power)) / effect_size) ** 2
+
+    if measurement_type == 'proportion':
+        if is_two_sided:
+            required_sample_size = _solve_two_sided_z_test_sample_size(
+                initial_sample_size=required_sample_size,
+                effect_size=effect_size,
+                critical_value=critical_value,
+                power=power,
+            )
+
+    else:
+        required_sample_size = _solve_t_test_sample_size(
+            initial_sample_size=required_sample_size + critical_value ** 2 / 4,
             effect_size=effect_size,
-            alpha=significance_level,
+            significance_level=significance_level,
             power=power,
-            alternative=alternative_hypothesis,
+            is_two_sided=is_two_sided,
         )
 
-    return int(required_sample_size)
+    return np.floor(required_sample_size).astype(int)
+
+
+def _solve_two_sided_z_test_sample_size(
+        initial_sample_size: np.ndarray,
+        effect_size: np.ndarray,
+        critical_value: np.ndarray,
+        power: np.ndarray,
+        n_iterations: int = 5,
+) -> np.ndarray:
+    """
+    Refine the normal approximation of the sample size for a two-sided z-test with Newton's method, accounting for the
+    power contributed by the opposite tail.
+
+    Parameters
+    ----------
+    initial_sample_size : numpy.ndarray
+        Starting estimate of the sample size for each group.
+    effect_size : numpy.ndarray
+        Cohen's h for each set of parameters.
+    critical_value : numpy.ndarray
+        Critical value of the standard normal distribution for each significance level.
+    power : numpy.ndarray
+        Required power for each set of parameters.
+    n_iterations : int (default is 5)
+        Number of Newton iterations, which converges far quicker than required as the initial estimate is very close.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sample size for each group.
+    """
+
+    from scipy import stats  # pylint: disable=import-outside-toplevel
+
+    sample_size = initial_sample_size
+
+    for _ in range(n_iterations):
+        standardised_effect = effect_size * np.sqrt(sample_size / 2)
+
+        upper_tail = standardised_effect - critical_value
+        lower_tail = -standardised_effect - critical_value
+
+        attained_power = stats.norm.cdf(upper_tail) + stats.norm.cdf(lower_tail)
+        power_gradient = \
+            (stats.norm.pdf(upper_tail) - stats.norm.pdf(lower_tail)) * standardised_effect / (2 * sample_size)
+
+        sample_size = sample_size - (attained_power - power) / power_gradient
+
+    return sample_size
+
+
+def _solve_t_test_sample_size(
+        initial_sample_size: np.ndarray,
+        effect_size: np.ndarray,
+        significance_level: np.ndarray,
+        power: np.ndarray,
+        is_two_sided: bool,
+        tolerance: float = 1e-10,
+        max_iterations: int = 100,
+) -> np.ndarray:
+    """
+    Solve for the sample size of each group at which an independent two-sample t-test attains the required power,
+    across every set of parameters at once.
+
+    Each sample size is bracketed between one which attains too little power and one which attains enough, which is then
+    narrowed with regula falsi steps (using the Illinois modification), falling back to bisection whenever a step would
+    leave the bracket. As the power increases with the sample size, this always converges on the solution. The smallest
+    sample size considered is 2 per group, so that the test has at least 2 degrees of freedom.
+
+    Parameters
+    ----------
+    initial_sample_size : numpy.ndarray
+        Starting estimate of the sample size for each group.
+    effect_size : numpy.ndarray
+        Cohen's d for each set of parameters.
+    significance_level : numpy.ndarray
+        Significance level for each set of parameters.
+    power : numpy.ndarray
+        Required power for each set of parameters.
+    is_two_sided : bool
+        Whether the test is two-sided, rather than one-sided.
+    tolerance : float (default is 1e-10)
+        Stop narrowing each bracket once its width is less than this fraction of its upper end.
+    max_iterations : int (default is 100)
+        Maximum number of times to widen, or narrow, the brackets.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sample size for each group, which attains at least the required power.
+
+    Raises
+    ------
+    ValueError
+        If the sample size for any set of parameters cannot be solved, e.g. as the power cannot be evaluated.
+    """
+
+    from scipy import stats  # pylint: disable=import-outside-toplevel
+
+    def power_shortfall(sample_size: np.ndarray) -> np.ndarray:
+        """Difference between the power attained by each sample size and the power required."""
+
+        degrees_of_freedom = 2 * sample_size - 2
+        non_centrality = effect_size * np.sqrt(sample_size / 2)
+        critical_value = stats.t.isf(significance_level / 2 if is_two_sided else significance_level, degrees_of_freedom)
+
+        attained_power = stats.nct.sf(critical_value, degrees_of_freedom, non_centrality)
+        if is_two_sided:
+            # Rejecting in the opposite tail, by symmetry, as scipy's cdf of the non-central t is nan far into its tail
+            attained_power = attained_power + stats.nct.sf(critical_value, degrees_of_freedom, -non_centrality)
+
+        return attained_power - power
+
+    smallest_sample_size = 2.0
+
+    # Every comparison with a shortfall of nan is False, so power which cannot be evaluated never counts as attained
+    lower = np.full(np.shape(initial_sample_size), smallest_sample_size)
+    lower_shortfall = power_shortfall(lower)
+    is_solved = lower_shortfall >= 0
+
+    # Widen each bracket from the initial estimate until its upper end attains enough power
+    upper = np.maximum(initial_sample_size, 2 * smallest_sample_size)
+    upper_shortfall = power_shortfall(upper)
+
+    for _ in range(max_iterations):
+        is_too_small = ~is_solved & (upper_shortfall < 0)
+        if not np.any(is_too_small):
+            break
 
+        lower = np.where(is_too_small, upper, lower)
+        lower_shortfall = np.where(is_too_small, upper_shortfall, lower_shortfall)
+        upper = np.where(is_too_small, 2 * upper, upper)
+        upper_shortfall = power_shortfall(upper)
 
-def create_sample_groups(original_population: pd.DataFrame, sample_groups: Union[dict, list]) -> pd.DataFrame:
+    # Side of the bracket moved last (-1 for lower, 1 for upper), so that the other end can be down-weighted if it
+    # would otherwise be retained repeatedly and slow regula falsi down
+    last_moved = np.zeros(np.shape(lower), dtype=int)
+
+    for _ in range(max_iterations):
+        is_narrowing = ~is_solved & (upper_shortfall >= 0) & (upper - lower > tolerance * upper)
+        if not np.any(is_narrowing):
+            break
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            candidate = upper - upper_shortfall * (upper - lower) / (upper_shortfall - lower_shortfall)
+
+        midpoint = (lower + upper) / 2
+        candidate = np.where((candidate > lower) & (candidate < upper), candidate, midpoint)
+        shortfall = power_shortfall(candidate)
+
+        # Retry with bisection wherever the power could not be evaluated, rather than treating it as converged
+        if np.any(~np.isfinite(shortfall)):
+            candidate = np.where(np.isfinite(shortfall), candidate, midpoint)
+            shortfall = power_shortfall(candidate)
+
+        moves_upper = is_narrowing & (shortfall >= 0)
+        moves_lower = is_narrowing & (shortfall < 0)
+
+        lower_shortfall = np.where(moves_upper & (last_moved == 1), lower_shortfall / 2, lower_shortfall)
+        upper_shortfall = np.where(moves_lower & (last_moved == -1), upper_shortfall / 2, upper_shortfall)
+
+        upper = np.where(moves_upper, candidate, upper)
+        upper_shortfall = np.where(moves_upper, shortfall, upper_shortfall)
+        lower = np.where(moves_lower, candidate, lower)
+        lower_shortfall = np.where(moves_lower, shortfall, lower_shortfall)
+        last_moved = np.select([moves_upper, moves_lower], [1, -1], last_moved)
+
+    is_converged = is_solved | ((upper_shortfall >= 0) & (upper - lower <= tolerance * upper))
+    if not np.all(is_converged):
+        raise ValueError('The required sample size could not be solved for every set of parameters provided.')
+
+    return np.where(is_solved, smallest_sample_size, upper)
+
+
+def create_sample_groups(
+        original_population: pd.DataFrame,
+        sample_groups: Union[dict, list],
+        stratify_by: Union[str, List[str]] = None,
+) -> pd.DataFrame:
     """
     Randomly assign records from a population dataset to distinct sample groups.
 
@@ -194,11 +703,11 @@ def create_sample_groups(original_population: pd.DataFrame, sample_groups: Union
         Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
         population or absolute size in terms of number of records. Or this can be a list of the names of each sample
         group, indicating that the population should be split evenly across them.
-    original_population : pd.DataFrame
-        The total dataset from which samples will be drawn.
-    sample_groups : dict[str, float] or dict[str, int]
-        Keys: The names of each sample group
-        Values: How big they should be.
+    stratify_by : str or list[str] (default is None)
+        Column(s) of the population defining strata (e.g. region and age band). If provided, the records within each
+        stratum are randomly split across the groups in the specified proportions, so that these covariates are
+        balanced across the groups. The total size of each group is exactly as specified, whilst its size within each
+        stratum is rounded to whole records.
 
     Returns
     -------
@@ -218,51 +727,775 @@ def create_sample_groups(original_population: pd.DataFrame, sample_groups: Union
         If the proportions sum up to more than 1.
     ValueError
         If the absolute sizes sum up to more than the size of the original population.
+    ValueError
+        If a list of names is provided for the sample groups which contains the same name more than once.
+
+    See Also
+    --------
+    assign_sample_groups : Returns only the assignment of each record, without copying the population.
     """
 
-    # Take copy so original data is not accidentally altered, and add a new column which will store the group that
-    # observations have been assigned to
-    samples_from_population = original_population.copy()
-    samples_from_population['sample_group'] = np.nan
+    assignments = assign_sample_groups(
+        original_population=original_population,
+        sample_groups=sample_groups,
+        stratify_by=stratify_by,
+    )
 
-    # Randomly shuffle all of the possible row numbers to sample from
-    population_size = original_population.shape[0]
-    population_indices_shuffled = random.permutation(population_size)
+    # Take a single copy of the records that were assigned to a sample group, keeping their original order
+    assigned_positions = np.flatnonzero(assignments.cat.codes.to_numpy() >= 0)
 
-    # If a list of group names is provided, then divide the population evenly across the groups
-    if isinstance(sample_groups, list):
+    samples_from_population = original_population.take(assigned_positions)
+    samples_from_population['sample_group'] = assignments.take(assigned_positions).astype(object)
+
+    return samples_from_population
+
+
+def assign_sample_groups(
+        original_population: pd.DataFrame,
+        sample_groups: Union[dict, list],
+        stratify_by: Union[str, List[str]] = None,
+) -> pd.Series:
+    """
+    Randomly assign records from a population dataset to distinct sample groups, returning only a compact record of
+    the assignments rather than a copy of the population.
+
+    Parameters
+    ----------
+    original_population : pd.DataFrame
+        The total dataset from which samples will be drawn.
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
+        population or absolute size in terms of number of records. Or this can be a list of the names of each sample
+        group, indicating that the population should be split evenly across them.
+    stratify_by : str or list[str] (default is None)
+        Column(s) of the population defining strata (e.g. region and age band). If provided, the records within each
+        stratum are randomly split across the groups in the specified proportions, so that these covariates are
+        balanced across the groups. The total size of each group is exactly as specified, whilst its size within each
+        stratum is rounded to whole records.
+
+    Returns
+    -------
+    pd.Series
+        Categorical series called 'sample_group' aligned to the index of `original_population`, denoting the group
+        that each record has been assigned to (missing for records that were not assigned to any group).
+
+    Raises
+    ------
+    ValueError
+        If the values provided for the sizes of each sample group are not all floats (proportions), or all integers
+        (absolute sizes).
+    ValueError
+        If the proportions do not adhere to 0 < proportion < 1.
+    ValueError
+        If the proportions sum up to more than 1.
+    ValueError
+        If the absolute sizes sum up to more than the size of the original population.
+    ValueError
+        If a list of names is provided for the sample groups which contains the same name more than once.
+    """
 
-        # Split all of the indices evenly, then assign the relevant records to each group
-        group_indices = np.array_split(population_indices_shuffled, len(sample_groups))
+    import pandas as pd  # pylint: disable=import-outside-toplevel
 
-        for group, indices in zip(sample_groups, group_indices):
-            samples_from_population.iloc[indices, -1] = group
+    if stratify_by is not None:
+        group_names, group_codes = _stratified_sample_group_codes(original_population, sample_groups, stratify_by)
 
     else:
-        # Check how user has specified sample sizes
-        sample_size_type = _check_experiment_inputs.check_if_sample_sizes_are_proportions_or_absolute(sample_groups)
-        _check_experiment_inputs.validate_sample_size_values_are_appropriate(
-            original_population=original_population,
-            sample_groups=sample_groups,
-            size_type=sample_size_type
+        group_positions = sample_group_positions(original_population=original_population, sample_groups=sample_groups)
+        group_names = list(group_positions)
+
+        # Store the index of each record's group (or -1 if unassigned) using the smallest integer type possible
+        group_codes = np.full(
+            original_population.shape[0],
+            fill_value=-1,
+            dtype=np.min_scalar_type(-len(group_positions) - 1),
+        )
+        for group_code, positions in enumerate(group_positions.values()):
+            group_codes[positions] = group_code
+
+    return pd.Series(
+        pd.Categorical.from_codes(group_codes, categories=group_names),
+        index=original_population.index,
+        name='sample_group',
+    )
+
+
+def _stratified_sample_group_codes(
+        original_population: pd.DataFrame,
+        sample_groups: Union[dict, list],
+        stratify_by: Union[str, List[str]],
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Randomly assign the records within each stratum of the population to distinct sample groups, using a single
+    vectorised shuffle of the whole population rather than shuffling each stratum separately.
+
+    Records are sorted by stratum and then a random key, so that each stratum forms a contiguous, randomly ordered
+    block. Each stratum first contributes the whole number of records its share of every group allows (with the
+    records not assigned to any group treated as one more group). The records left over from rounding down are then
+    dealt out across the groups, so that the total size of each group is exactly that specified, as per
+    `_sample_group_sizes`.
+
+    Parameters
+    ----------
+    original_population : pd.DataFrame
+        The total dataset from which samples will be drawn.
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Names of the sample groups, and their size as a proportion of the population or absolute size in terms of
+        number of records. Or a list of the names of each sample group, to split each stratum evenly across them.
+    stratify_by : str or list[str]
+        Column(s) of the population defining strata.
+
+    Returns
+    -------
+    Tuple[list[str], numpy.ndarray]
+        (1st value) Names of each sample group.
+        (2nd value) Index of the group that each record is assigned to, or -1 if unassigned.
+
+    Raises
+    ------
+    ValueError
+        If the values provided for the sizes of each sample group are invalid, as per `create_sample_groups`.
+    """
+
+    population_size = original_population.shape[0]
+
+    group_sizes = _sample_group_sizes(sample_groups, population_size)
+    group_names = list(group_sizes)
+
+    # Records not assigned to any group are allocated as if they were one more group
+    allocation_sizes = np.array([*group_sizes.values(), population_size - sum(group_sizes.values())], dtype=np.int64)
+
+    stratum_codes = original_population \
+        .groupby(stratify_by, sort=False, observed=True, dropna=False) \
+        .ngroup() \
+        .to_numpy()
+    stratum_sizes = np.bincount(stratum_codes)
+
+    # Order the records by stratum, and randomly within each stratum, by sorting on the stratum plus a random fraction
+    # (considerably faster than np.lexsort on separate keys)
+    population_order = np.argsort(stratum_codes + random.random(population_size))
+    ordered_stratum_codes = stratum_codes[population_order]
+
+    stratum_starts = np.cumsum(stratum_sizes) - stratum_sizes
+    rank_within_stratum = np.arange(population_size) - stratum_starts[ordered_stratum_codes]
+
+    # Whole number of records each stratum contributes to each group, rounding down its share (an even split of the
+    # stratum when only the names of the groups are given)
+    if isinstance(sample_groups, list):
+        shares, share_denominator = np.append(np.ones(len(group_names), dtype=np.int64), 0), len(group_names)
+    else:
+        shares, share_denominator = allocation_sizes, population_size
+    allocation_by_stratum = stratum_sizes[:, np.newaxis] * shares // share_denominator
+    allocated_by_stratum = allocation_by_stratum.sum(axis=1)
+
+    # Records left over from rounding down (fewer than the number of groups in each stratum) are dealt out so that
+    # every group reaches its total size
+    leftover_group_codes = _interleave_groups(allocation_sizes - allocation_by_stratum.sum(axis=0))
+    leftover_starts = np.cumsum(stratum_sizes - allocated_by_stratum) - (stratum_sizes - allocated_by_stratum)
+
+    # A record within the rounded down allocation takes the group whose boundary its rank has not yet passed
+    group_boundaries_by_stratum = np.cumsum(allocation_by_stratum, axis=1)
+    ordered_group_codes = np.zeros(population_size, dtype=np.min_scalar_type(-len(allocation_sizes) - 1))
+    for group_position in range(len(allocation_sizes) - 1):
+        ordered_group_codes += rank_within_stratum >= group_boundaries_by_stratum[ordered_stratum_codes, group_position]
+
+    leftover_ranks = rank_within_stratum - allocated_by_stratum[ordered_stratum_codes]
+    is_leftover = leftover_ranks >= 0
+    ordered_group_codes[is_leftover] = leftover_group_codes[
+        leftover_starts[ordered_stratum_codes[is_leftover]] + leftover_ranks[is_leftover]
+    ]
+
+    ordered_group_codes[ordered_group_codes == len(group_names)] = -1
+
+    group_codes = np.empty_like(ordered_group_codes)
+    group_codes[population_order] = ordered_group_codes
+
+    return group_names, group_codes
+
+
+def _interleave_groups(group_sizes: np.ndarray) -> np.ndarray:
+    """
+    Randomly interleave the codes of each group, so that any run of consecutive codes contains each group in close to
+    its overall proportion.
+
+    The records of each group are spread evenly through the interval [0, 1), each group with its own random offset,
+    and then merged in order of their position. No group is favoured by its position in the list of groups.
+
+    Parameters
+    ----------
+    group_sizes : numpy.ndarray
+        Number of codes for each group.
+
+    Returns
+    -------
+    numpy.ndarray
+        Code (position within `group_sizes`) of each group, repeated by its size and interleaved.
+    """
+
+    positions = np.concatenate([
+        (np.arange(group_size) + random.random()) / max(group_size, 1) for group_size in group_sizes
+    ])
+    group_codes = np.repeat(np.arange(len(group_sizes)), group_sizes)
+
+    return group_codes[np.argsort(positions, kind='stable')]
+
+
+def sample_group_positions(
+        original_population: pd.DataFrame,
+        sample_groups: Union[dict, list],
+) -> Dict[str, np.ndarray]:
+    """
+    Randomly assign records from a population dataset to distinct sample groups, returning the row positions of the
+    records assigned to each group.
+
+    Parameters
+    ----------
+    original_population : pd.DataFrame
+        The total dataset from which samples will be drawn.
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
+        population or absolute size in terms of number of records. Or this can be a list of the names of each sample
+        group, indicating that the population should be split evenly across them.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Keys: The names of each sample group
+        Values: Row positions (for use with `iloc`) of the records assigned to the group.
+
+    Raises
+    ------
+    ValueError
+        If the values provided for the sizes of each sample group are not all floats (proportions), or all integers
+        (absolute sizes).
+    ValueError
+        If the proportions do not adhere to 0 < proportion < 1.
+    ValueError
+        If the proportions sum up to more than 1.
+    ValueError
+        If the absolute sizes sum up to more than the size of the original population.
+    ValueError
+        If a list of names is provided for the sample groups which contains the same name more than once.
+    """
+
+    # Randomly shuffle all of the possible row numbers to sample from
+    population_size = original_population.shape[0]
+    population_indices_shuffled = random.permutation(population_size)
+
+    # Work through the randomly ordered row indices and assign an appropriate size to each sample group
+    group_positions = {}
+    start_index = 0
+    for group, group_size in _sample_group_sizes(sample_groups, population_size).items():
+
+        # Extract the row numbers that will be assigned to this group
+        end_index = start_index + group_size
+        group_positions[group] = population_indices_shuffled[start_index: end_index]
+
+        # Reset to our new starting point
+        start_index = end_index
+
+    return group_positions
+
+
+def _sample_group_sizes(sample_groups: Union[dict, list], population_size: int) -> Dict[str, int]:
+    """
+    Calculate the number of records to assign to each sample group.
+
+    Parameters
+    ----------
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
+        population or absolute size in terms of number of records. Or this can be a list of the names of each sample
+        group, indicating that the population should be split evenly across them.
+    population_size : int
+        Number of records in the population.
+
+    Returns
+    -------
+    dict[str, int]
+        Keys: The names of each sample group
+        Values: Number of records to assign to the group.
+
+    Raises
+    ------
+    ValueError
+        If the values provided for the sizes of each sample group are not all floats (proportions), or all integers
+        (absolute sizes).
+    ValueError
+        If the proportions do not adhere to 0 < proportion < 1, or sum up to more than 1.
+    ValueError
+        If the absolute sizes sum up to more than the size of the original population.
+    ValueError
+        If a list of names is provided for the sample groups which contains the same name more than once.
+    """
+
+    # If a list of group names is provided, then divide the population evenly across the groups (with the first groups
+    # taking any remainder, as per np.array_split)
+    if isinstance(sample_groups, list):
+        _check_experiment_inputs.validate_sample_group_names_are_unique(sample_groups)
+        base_size, remainder = divmod(population_size, len(sample_groups))
+        return {group: base_size + (position < remainder) for position, group in enumerate(sample_groups)}
+
+    # Check how user has specified sample sizes
+    sample_size_type = _check_experiment_inputs.check_if_sample_sizes_are_proportions_or_absolute(sample_groups)
+    _check_experiment_inputs.validate_sample_size_values_are_appropriate(
+        original_population=population_size,
+        sample_groups=sample_groups,
+        size_type=sample_size_type
+    )
+
+    # Either take the absolute size, or multiply the proportion by the population size
+    return {
+        group: group_size if sample_size_type == 'absolute' else int(group_size * population_size)
+        for group, group_size in sample_groups.items()
+    }
+
+
+def assign_sample_groups_by_hash(
+        unit_ids: Union[np.ndarray, pd.Series],
+        sample_groups: Union[dict, list],
+        salt: str,
+        *,
+        population_size: int = None,
+) -> pd.Series:
+    """
+    Deterministically assign units (e.g. customers) to distinct sample groups by hashing their IDs together with a salt
+    for the experiment.
+
+    The same unit ID and salt always produce the same assignment, regardless of which process or machine performs it,
+    or what other units are present. Partitions of a population can therefore be assigned independently (e.g. by
+    separate workers, or as chunks arrive) and still give a consistent result. Use a different salt for each experiment
+    so that assignments are independent across experiments.
+
+    Unlike `assign_sample_groups`, the size of each group is only approximately equal to what is specified, in the same
+    way as each unit being randomly allocated according to the proportions.
+
+    Parameters
+    ----------
+    unit_ids : numpy array_like or pd.Series
+        IDs of the units to be assigned. IDs must be stored with the same data type across partitions to be assigned
+        consistently (e.g. 123 and '123' are different IDs).
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
+        population or absolute size in terms of number of records. Or this can be a list of the names of each sample
+        group, indicating that the population should be split evenly across them.
+    salt : str
+        Identifier for the experiment, which is hashed along with each unit ID.
+    population_size : int (default is None)
+        Total number of units across all partitions. Only needs to be set if absolute sizes are provided for
+        `sample_groups`, which are then converted into proportions of the population.
+
+    Returns
+    -------
+    pd.Series
+        Categorical series called 'sample_group' denoting the group that each unit has been assigned to (missing for
+        units that were not assigned to any group). The index matches `unit_ids` if it is a pd.Series.
+
+    Raises
+    ------
+    TypeError
+        If absolute sizes are provided for `sample_groups` but no `population_size`.
+    ValueError
+        If the values provided for the sizes of each sample group are not all floats (proportions), or all integers
+        (absolute sizes).
+    ValueError
+        If the proportions do not adhere to 0 < proportion < 1, or sum up to more than 1.
+    ValueError
+        If the absolute sizes sum up to more than `population_size`.
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    group_names, cumulative_proportions = _cumulative_sample_group_proportions(sample_groups, population_size)
+
+    # Position of each unit within the interval [0, 1), which determines its group
+    unit_positions = _hash_to_unit_interval(np.asarray(unit_ids), salt)
+    group_codes = np.searchsorted(cumulative_proportions, unit_positions, side='right')
+
+    # Units beyond the final group boundary are not sampled
+    group_codes[group_codes >= len(group_names)] = -1
+
+    return pd.Series(
+        pd.Categorical.from_codes(group_codes, categories=group_names),
+        index=unit_ids.index if isinstance(unit_ids, pd.Series) else None,
+        name='sample_group',
+    )
+
+
+def _cumulative_sample_group_proportions(
+        sample_groups: Union[dict, list],
+        population_size: int = None,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Express the size of each sample group as the upper bound of an interval within [0, 1], so that randomly drawing a
+    value uniformly from [0, 1) selects each group with the specified probability.
+
+    Parameters
+    ----------
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Names of the sample groups, and their size as a proportion of the population or absolute size in terms of
+        number of records. Or a list of the names of each sample group, to split the population evenly across them.
+    population_size : int (default is None)
+        Total size of the population, which is only required when absolute sizes are provided.
+
+    Returns
+    -------
+    Tuple[list[str], numpy.ndarray]
+        (1st value) Names of each sample group.
+        (2nd value) Cumulative proportion of the population covered by each group and those before it.
+
+    Raises
+    ------
+    TypeError
+        If absolute sizes are provided for `sample_groups` but no `population_size`.
+    ValueError
+        If the sizes of each sample group are inconsistent or invalid.
+    """
+
+    if isinstance(sample_groups, list):
+        _check_experiment_inputs.validate_sample_group_names_are_unique(sample_groups)
+        return sample_groups, np.arange(1, len(sample_groups) + 1) / len(sample_groups)
+
+    sample_size_type = _check_experiment_inputs.check_if_sample_sizes_are_proportions_or_absolute(sample_groups)
+
+    if sample_size_type == 'absolute' and population_size is None:
+        raise TypeError('When providing absolute sizes for `sample_groups`, you must also specify `population_size`.')
+
+    _check_experiment_inputs.validate_sample_size_values_are_appropriate(
+        original_population=population_size,
+        sample_groups=sample_groups,
+        size_type=sample_size_type
+    )
+
+    proportions = np.array(list(sample_groups.values()), dtype=float)
+    if sample_size_type == 'absolute':
+        proportions /= population_size
+
+    cumulative_proportions = np.cumsum(proportions)
+
+    # Avoid leaving a sliver of the population unassigned due to floating point error when the groups cover all of it
+    if np.isclose(cumulative_proportions[-1], 1):
+        cumulative_proportions[-1] = 1.0
+
+    return list(sample_groups), cumulative_proportions
+
+
+def _hash_to_unit_interval(unit_ids: np.ndarray, salt: str) -> np.ndarray:
+    """
+    Map each ID to a pseudo-random but deterministic position in the interval [0, 1), which depends on the salt.
+
+    Parameters
+    ----------
+    unit_ids : numpy.ndarray
+        IDs of the units.
+    salt : str
+        Value which is hashed along with each ID.
+
+    Returns
+    -------
+    numpy.ndarray
+        Position of each ID in the interval [0, 1).
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    salt_hash = int.from_bytes(hashlib.blake2b(salt.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    # pandas only applies its hash key to strings/objects, so also mix the salt into the hash of every ID with the
+    # splitmix64 finaliser: https://xorshift.di.unimi.it/splitmix64.c
+    hashed_ids = pd.util.hash_array(unit_ids, hash_key=f'{salt_hash:016x}') ^ np.uint64(salt_hash)
+
+    hashed_ids = (hashed_ids ^ (hashed_ids >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    hashed_ids = (hashed_ids ^ (hashed_ids >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    hashed_ids = hashed_ids ^ (hashed_ids >> np.uint64(31))
+
+    # Use the top 53 bits, which can be represented exactly as a float
+    return (hashed_ids >> np.uint64(11)) * 2.0 ** -53
+
+
+def create_sample_groups_from_file(
+        source_path: str,
+        destination_path: str,
+        sample_groups: Union[dict, list],
+        *,
+        chunk_size: int = 1_000_000,
+        columns: List[str] = None,
+        random_state: int = None,
+        overwrite: bool = False,
+) -> Dict[str, int]:
+    """
+    Randomly assign records from a population stored in a Parquet or CSV file to distinct sample groups, reading and
+    writing the records in chunks so that the population never has to fit in memory.
+
+    Each chunk receives a number of records from each group drawn from the multivariate hypergeometric distribution,
+    given the records still to be assigned (i.e. sequential sampling without replacement). The groups therefore have
+    exactly the sizes specified, and every possible assignment is equally likely, just as with `create_sample_groups`.
+
+    Parquet files are read and written with pyarrow, an optional dependency installed with the 'parquet' extra (i.e.
+    `pip install ds_utils[parquet]`).
+
+    Parameters
+    ----------
+    source_path : str
+        Parquet ('.parquet', '.pq') or CSV ('.csv') file containing the population from which samples will be drawn.
+    destination_path : str
+        Parquet or CSV file where the assigned records will be written, with an additional column called
+        'sample_group' denoting the group that each record has been assigned to. Records which are not assigned to any
+        group are not written.
+    sample_groups : dict[str, float] or dict[str, int] or list[str]
+        Can be a dictionary with the name of each sample group, and its size expressed as a proportion of the
+        population or absolute size in terms of number of records. Or this can be a list of the names of each sample
+        group, indicating that the population should be split evenly across them.
+    chunk_size : int (default is 1,000,000)
+        Number of records to read at a time.
+    columns : list[str] (default is None)
+        Columns of the population to read and write e.g. only the ID column. If None, every column is used.
+    random_state : int (default is None)
+        Seed for the random number generator, so that the assignment can be reproduced.
+    overwrite : bool (default is False)
+        Whether to overwrite `destination_path` if it already exists.
+
+    Returns
+    -------
+    dict[str, int]
+        Keys: The names of each sample group
+        Values: Number of records assigned to the group.
+
+    Raises
+    ------
+    FileExistsError
+        If the `destination_path` already exists and user did not set `overwrite` mode.
+    ValueError
+        If either file is not a Parquet or CSV file.
+    ValueError
+        If the values provided for the sizes of each sample group are invalid, as per `create_sample_groups`.
+    """
+
+    source_format = _population_file_format(source_path)
+    destination_format = _population_file_format(destination_path)
+
+    # Exit if file already exists and user did not choose to overwrite
+    if path.exists(destination_path) and not overwrite:
+        raise FileExistsError(f'File {destination_path} already exists. \nTo overwrite an existing file, '
+                              f'set overwrite=True when calling this method.')
+
+    population_size = _count_population_records(source_path, source_format)
+    group_sizes = _sample_group_sizes(sample_groups, population_size)
+    group_names = list(group_sizes)
+
+    # Records still to be assigned to each group, with the final entry representing records left unassigned
+    remaining_group_sizes = np.array(list(group_sizes.values()) + [population_size - sum(group_sizes.values())])
+    random_generator = np.random.default_rng(random_state)
+
+    def assign_chunks() -> Iterator[pd.DataFrame]:
+        """Assign the records in each chunk, yielding only those which were assigned to a sample group."""
+
+        for chunk in _read_population_in_chunks(source_path, source_format, chunk_size, columns):
+            chunk_group_sizes = random_generator.multivariate_hypergeometric(remaining_group_sizes, chunk.shape[0])
+            remaining_group_sizes[:] -= chunk_group_sizes
+
+            group_codes = np.repeat(np.arange(len(remaining_group_sizes)), chunk_group_sizes)
+            random_generator.shuffle(group_codes)
+
+            is_assigned = group_codes < len(group_names)
+            assigned_records = chunk.loc[is_assigned].copy()
+            assigned_records['sample_group'] = np.array(group_names, dtype=object)[group_codes[is_assigned]]
+
+            yield assigned_records
+
+    # If a full filepath has been provided, and the directory does not already exist, then create it
+    directory = path.dirname(destination_path)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+
+    _write_population_in_chunks(assign_chunks(), destination_path, destination_format)
+
+    return group_sizes
+
+
+def _population_file_format(filename_or_path: str) -> str:
+    """
+    Identify whether a population file is stored as Parquet or CSV, from its file extension.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the file.
+
+    Returns
+    -------
+    str
+        'parquet' or 'csv'.
+
+    Raises
+    ------
+    ValueError
+        If the file extension is not for a Parquet or CSV file.
+    """
+
+    extension = path.splitext(filename_or_path)[1].lower()
+
+    if extension in ['.parquet', '.pq']:
+        return 'parquet'
+    if extension == '.csv':
+        return 'csv'
+
+    raise ValueError(f'File {filename_or_path} must be a Parquet (.parquet, .pq) or CSV (.csv) file.')
+
+
+def _count_population_records(source_path: str, file_format: str) -> int:
+    """
+    Count the number of records in a population file, reading only the Parquet metadata or a single column of the CSV.
+
+    Parameters
+    ----------
+    source_path : str
+        Location of the file.
+    file_format : str 'parquet', 'csv'
+        Format of the file.
+
+    Returns
+    -------
+    int
+        Number of records.
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if file_format == 'parquet':
+        from pyarrow import parquet  # pylint: disable=import-outside-toplevel
+        return parquet.ParquetFile(source_path).metadata.num_rows
+
+    return sum(chunk.shape[0] for chunk in pd.read_csv(source_path, usecols=[0], chunksize=1_000_000))
+
+
+def _read_population_in_chunks(
+        source_path: str,
+        file_format: str,
+        chunk_size: int,
+        columns: List[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a population file a chunk of records at a time.
+
+    Parameters
+    ----------
+    source_path : str
+        Location of the file.
+    file_format : str 'parquet', 'csv'
+        Format of the file.
+    chunk_size : int
+        Number of records to read at a time.
+    columns : list[str] (default is None)
+        Columns to read. If None, every column is read.
+
+    Returns
+    -------
+    Iterator[pd.DataFrame]
+        Each chunk of records. A file without any records gives a single empty chunk, holding its columns.
+    """
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if file_format == 'parquet':
+        from pyarrow import parquet  # pylint: disable=import-outside-toplevel
+
+        parquet_file = parquet.ParquetFile(source_path)
+
+        if parquet_file.metadata.num_rows == 0:
+            # No batches are read from an empty file, so its (typed) columns are taken from its schema instead
+            empty_table = parquet_file.schema_arrow.empty_table()
+            yield (empty_table if columns is None else empty_table.select(columns)).to_pandas()
+            return
+
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield record_batch.to_pandas()
+
+    else:
+        yield from pd.read_csv(source_path, usecols=columns, chunksize=chunk_size)
+
+
+def _write_population_in_chunks(chunks: Iterator[pd.DataFrame], destination_path: str, file_format: str) -> None:
+    """
+    Stream chunks of records out to a single Parquet or CSV file.
+
+    The records are written to a temporary file, hidden and unique to this writer, which is only moved to
+    `destination_path` once every chunk has been written. A failure part way through therefore never leaves a partially
+    written file behind.
+
+    Parameters
+    ----------
+    chunks : Iterator[pd.DataFrame]
+        Chunks of records, which must all have the same columns, including a 'sample_group' column of strings.
+    destination_path : str
+        Location of the file to write.
+    file_format : str 'parquet', 'csv'
+        Format of the file.
+    """
+
+    temporary_path = path.join(
+        path.dirname(destination_path), f'.{path.basename(destination_path)}.{uuid.uuid4().hex}.tmp'
+    )
+
+    try:
+        if file_format == 'parquet':
+            _write_parquet_in_chunks(chunks, temporary_path)
+        else:
+            for chunk_number, chunk in enumerate(chunks):
+                is_first_chunk = chunk_number == 0
+                chunk.to_csv(temporary_path, mode='w' if is_first_chunk else 'a', header=is_first_chunk, index=False)
+
+        os.replace(temporary_path, destination_path)
+
+    finally:
+        if path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def _write_parquet_in_chunks(chunks: Iterator[pd.DataFrame], destination_path: str) -> None:
+    """
+    Stream chunks of records out to a single Parquet file, whose schema is taken from the first chunk with any records.
+
+    Columns of an empty chunk have no values from which to infer their type, so chunks are skipped until one has
+    records, and 'sample_group' is always stored as strings.
+
+    Parameters
+    ----------
+    chunks : Iterator[pd.DataFrame]
+        Chunks of records, which must all have the same columns, including a 'sample_group' column of strings.
+    destination_path : str
+        Location of the file to write.
+    """
+
+    import pyarrow  # pylint: disable=import-outside-toplevel
+    from pyarrow import parquet  # pylint: disable=import-outside-toplevel
+
+    def table_with_string_sample_group(chunk: pd.DataFrame) -> pyarrow.Table:
+        """Convert the chunk to a table, with 'sample_group' stored as strings whether or not it has any values."""
+        table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+        sample_group_index = table.schema.get_field_index('sample_group')
+        return table.set_column(
+            sample_group_index, 'sample_group', table.column(sample_group_index).cast(pyarrow.string())
         )
 
-        # Work through the randomly ordered row indices and assign an appropriate size to each sample group
-        start_index = 0
-        for group in sample_groups:
-            # Either take the absolute size, or multiply the proportion by the population size
-            group_size = \
-                sample_groups[group] if sample_size_type == 'absolute' else int(sample_groups[group] * population_size)
+    writer = None
+    chunk = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                if chunk.shape[0] == 0:
+                    continue
 
-            # Extract the row numbers that will be assigned to this group
-            end_index = start_index + group_size
-            group_indices = population_indices_shuffled[start_index: end_index]
+                table = table_with_string_sample_group(chunk)
+                writer = parquet.ParquetWriter(destination_path, table.schema)
+            else:
+                table = pyarrow.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
 
-            # Record their assignment
-            samples_from_population.iloc[group_indices, -1] = group
+            writer.write_table(table)
 
-            # Reset to our new starting point
-            start_index = end_index
+        # No records were assigned, so write the columns alone
+        if writer is None and chunk is not None:
+            parquet.write_table(table_with_string_sample_group(chunk), destination_path)
 
-    # Return all of the records that were assigned to a sample group
-    return samples_from_population.loc[~samples_from_population['sample_group'].isna(), :]
+    finally:
+        if writer is not None:
+            writer.close()
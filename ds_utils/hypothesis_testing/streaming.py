@@ -0,0 +1,188 @@
+"""
+Accumulate the results of an experiment as they arrive, without holding every observation in memory.
+"""
+
+# Standard library imports
+from typing import Iterable
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from ds_utils.hypothesis_testing import _moment_statistics
+
+
+class GroupAccumulator:
+    """
+    Running moments (number of observations, mean and sum of squared deviations) of the observations for one group in
+    an experiment, updated chunk by chunk using Welford's/Chan's parallel algorithm.
+
+    Accumulators built independently (e.g. on separate workers or partitions) can be merged, and the result is the same
+    as if every observation had been passed to a single accumulator. They can be evaluated with
+    :py:func:`ds_utils.hypothesis_testing.evaluation.parametric_significance_test_on_accumulators`.
+
+    Observations can be 1-D (a single metric) or 2-D of shape (observations, metrics) to track many metrics at once.
+
+    Attributes
+    ----------
+    count : numpy.ndarray
+        Number of observations accumulated so far.
+    mean : numpy.ndarray
+        Mean of the observations accumulated so far.
+    sum_of_squared_deviations : numpy.ndarray
+        Sum of the squared deviations of each observation from the mean.
+    is_binary : numpy.ndarray
+        Whether every observation accumulated so far is 0 or 1, i.e. could represent an event or non-event.
+
+    Examples
+    --------
+    >>> accumulator = GroupAccumulator()
+    >>> for chunk in pd.read_csv('control_group.csv', chunksize=100_000):
+    >>>     accumulator.update(chunk['spend'])
+    """
+
+    def __init__(self):
+        self.count = np.asarray(0.0)
+        self.mean = np.asarray(0.0)
+        self.sum_of_squared_deviations = np.asarray(0.0)
+        self.is_binary = np.asarray(True)
+
+    def __repr__(self) -> str:
+        return f'GroupAccumulator(count={self.count}, mean={self.mean}, variance={self.variance})'
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance (with one degree of freedom) of the observations accumulated so far."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.sum_of_squared_deviations / (self.count - 1)
+
+    @property
+    def sum(self) -> np.ndarray:
+        """Sum of the observations accumulated so far."""
+        return self.count * self.mean
+
+    @property
+    def sum_of_squares(self) -> np.ndarray:
+        """Sum of the squared observations accumulated so far."""
+        return self.sum_of_squared_deviations + self.count * self.mean ** 2
+
+    def update(self, observations: np.ndarray) -> 'GroupAccumulator':
+        """
+        Add a chunk of observations to the running moments.
+
+        Parameters
+        ----------
+        observations : numpy array_like
+            1-D array of observations, or 2-D array of shape (observations, metrics).
+
+        Returns
+        -------
+        GroupAccumulator
+            The same accumulator, so that updates can be chained.
+
+        Raises
+        ------
+        ValueError
+            If the number of metrics is different to the observations previously accumulated.
+        """
+
+        observations = np.asarray(observations, dtype=float)
+
+        if observations.shape[0] == 0:
+            return self
+
+        self._combine(
+            *_moment_statistics.moments_of_observations(observations),
+            is_binary=np.all((observations == 0) | (observations == 1), axis=0),
+        )
+
+        return self
+
+    def update_from_chunks(self, chunks: Iterable[np.ndarray]) -> 'GroupAccumulator':
+        """
+        Add every chunk of observations from an iterable, such as a generator reading from a file or database.
+
+        Parameters
+        ----------
+        chunks : iterable of numpy array_like
+            Chunks of observations, each of which is passed to `update`.
+
+        Returns
+        -------
+        GroupAccumulator
+            The same accumulator, so that updates can be chained.
+        """
+
+        for chunk in chunks:
+            self.update(chunk)
+
+        return self
+
+    def merge(self, other: 'GroupAccumulator') -> 'GroupAccumulator':
+        """
+        Combine with an accumulator that was built on a different set of observations for the same group.
+
+        Parameters
+        ----------
+        other : GroupAccumulator
+            Accumulator to combine with.
+
+        Returns
+        -------
+        GroupAccumulator
+            New accumulator reflecting the observations of both, leaving the originals unchanged.
+        """
+
+        merged = GroupAccumulator()
+        merged._combine(self.count, self.mean, self.sum_of_squared_deviations, self.is_binary)
+        merged._combine(other.count, other.mean, other.sum_of_squared_deviations, other.is_binary)
+
+        return merged
+
+    def _combine(
+            self,
+            count: np.ndarray,
+            mean: np.ndarray,
+            sum_of_squared_deviations: np.ndarray,
+            is_binary: np.ndarray,
+    ) -> None:
+        """
+        Update the running moments in place with the moments of another set of observations, as per
+        https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Parallel_algorithm.
+
+        Parameters
+        ----------
+        count : numpy.ndarray
+            Number of observations in the other set.
+        mean : numpy.ndarray
+            Mean of the other set.
+        sum_of_squared_deviations : numpy.ndarray
+            Sum of squared deviations from the mean of the other set.
+        is_binary : numpy.ndarray
+            Whether every observation in the other set is 0 or 1.
+
+        Raises
+        ------
+        ValueError
+            If the number of metrics is different to the observations previously accumulated.
+        """
+
+        count = np.asarray(count, dtype=float)
+
+        if not np.any(count):
+            return
+
+        if np.any(self.count) and count.shape != self.count.shape:
+            raise ValueError(
+                f'Observations must be for the same number of metrics as those already accumulated, expected shape '
+                f'{self.count.shape} but received {count.shape}.'
+            )
+
+        combined_count = self.count + count
+        delta = mean - self.mean
+
+        self.mean = self.mean + delta * count / combined_count
+        self.sum_of_squared_deviations = \
+            self.sum_of_squared_deviations + sum_of_squared_deviations + delta ** 2 * self.count * count / combined_count
+        self.count = combined_count
+        self.is_binary = self.is_binary & is_binary
@@ -77,6 +77,24 @@ def test_validate_sample_size_values_are_appropriate(invalid_sample_sizes, size_
         )
 
 
+@pytest.mark.parametrize('population_size', [10, np.int64(10), np.uint32(10)])
+def test_validate_sample_size_values_are_appropriate_accepts_any_integer_population_size(population_size):
+    """The population can be given as its number of records, whether a Python or numpy integer."""
+
+    _check_experiment_inputs.validate_sample_size_values_are_appropriate(
+        original_population=population_size,
+        sample_groups={'Group_1': 4, 'Group_2': 6},
+        size_type='absolute',
+    )
+
+    with pytest.raises(ValueError, match='The sum of all sample sizes should not exceed .*'):
+        _check_experiment_inputs.validate_sample_size_values_are_appropriate(
+            original_population=population_size,
+            sample_groups={'Group_1': 4, 'Group_2': 7},
+            size_type='absolute',
+        )
+
+
 @pytest.mark.parametrize('invalid_parameter_value', [-1, 0, 1])
 def test_validate_experiment_parameter_between_0_and_1(invalid_parameter_value):
     """
@@ -97,13 +115,62 @@ def test_validate_measurement_type_is_valid():
         _check_experiment_inputs.validate_measurement_type_is_valid('invalid_measurement_type')
 
 
-def test_validate_binary_events_are_represented_with_0_or_1():
-    """When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event."""
+def test_validate_alternative_hypothesis_is_valid():
+    """The experiment's alternative hypothesis should be two-sided, or test whether the metric is larger or smaller."""
+
+    with pytest.raises(ValueError, match="The alternative hypothesis must be 'two-sided', 'larger' or 'smaller'."):
+        _check_experiment_inputs.validate_alternative_hypothesis_is_valid('invalid_alternative_hypothesis')
+
+
+def test_validate_multiple_comparison_correction_is_valid():
+    """The correction for multiple comparisons should be one of those supported, or None."""
+
+    with pytest.raises(ValueError, match="The correction must be 'bonferroni', 'holm', 'benjamini-hochberg' or None."):
+        _check_experiment_inputs.validate_multiple_comparison_correction_is_valid('sidak')
+
+
+def test_validate_sample_group_names_are_unique():
+    """Each sample group should have a distinct name."""
+
+    _check_experiment_inputs.validate_sample_group_names_are_unique(['Group_1', 'Group_2'])
 
-    invalid_proportions = np.array([0, 1, 0, 1, 2])
+    with pytest.raises(ValueError, match='The names of the sample groups must be unique.'):
+        _check_experiment_inputs.validate_sample_group_names_are_unique(['Group_1', 'Group_1'])
+
+
+@pytest.mark.parametrize(
+    'invalid_proportions',
+    [
+        np.array([0, 1, 0, 1, 2]),
+        np.array([0.0, 1.0, np.nan]),
+        pd.Series([0, 1, None], dtype='Int64'),
+        pd.Series([True, False, None], dtype='boolean'),
+        pd.Series([0, 1, 3], dtype='int64[pyarrow]'),
+    ]
+)
+def test_validate_binary_events_are_represented_with_0_or_1(invalid_proportions):
+    """When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event."""
 
     with pytest.raises(
             ValueError,
             match='When testing proportions, values must be marked as 1 to represent the event, and 0 for non-event.'
     ):
-        _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(invalid_proportions)
+        _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(invalid_proportions, block_size=2)
+
+
+@pytest.mark.parametrize(
+    'valid_proportions',
+    [
+        np.array([0, 1, 0, 1, 1]),
+        np.array([[0.0, 1.0], [1.0, 1.0]]),
+        np.array([True, False, True]),
+        pd.Series([0, 1, 1], dtype='Int64'),
+        pd.Series([True, False], dtype='boolean'),
+        pd.Series([0, 1, 0], dtype='int8[pyarrow]'),
+        pd.Series([True, False], dtype='bool[pyarrow]'),
+    ]
+)
+def test_validate_binary_events_are_represented_with_0_or_1_accepts_valid_events(valid_proportions):
+    """Numpy, pandas nullable and Arrow-backed representations of 0's and 1's (or booleans) are all valid."""
+
+    _check_experiment_inputs.validate_binary_events_are_represented_with_0_or_1(valid_proportions, block_size=2)
@@ -4,10 +4,14 @@ Testing for analysing the outcome of an experiment and testing for significance.
 
 # Third party imports
 import numpy as np
-from statsmodels.stats import weightstats
+import pandas as pd
+import pytest
+from scipy import stats
+from statsmodels.regression import linear_model
+from statsmodels.stats import multitest, weightstats
 
 # Local application imports
-from ds_utils.hypothesis_testing import evaluation
+from ds_utils.hypothesis_testing import evaluation, streaming
 
 
 def test_parametric_significance_test_on_raw_observations_mean():
@@ -64,6 +68,487 @@ def test_parametric_significance_test_on_raw_observations_proportion():
     assert actual_p_value == expected_p_value
 
 
+@pytest.mark.parametrize('measurement_type', ['mean', 'proportion'])
+def test_parametric_significance_test_on_sufficient_statistics(measurement_type):
+    """
+    Testing on the count, sum and sum of squares of each group should give the same results as testing on the raw
+    observations.
+    """
+
+    group_1_observations = np.array([0, 1, 0, 1, 0, 1, 0, 1, 0])
+    group_2_observations = np.array([0, 0, 0, 1, 0, 0, 0, 1, 0, 1, 1])
+
+    if measurement_type == 'mean':
+        group_1_observations = group_1_observations * np.arange(9)
+        group_2_observations = group_2_observations + np.arange(11)
+
+    expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        measurement_type=measurement_type,
+        verbose=False,
+    )
+
+    actual_p_value, actual_test_statistic = evaluation.parametric_significance_test_on_sufficient_statistics(
+        group_1_count=len(group_1_observations),
+        group_1_sum=group_1_observations.sum(),
+        group_2_count=len(group_2_observations),
+        group_2_sum=group_2_observations.sum(),
+        measurement_type=measurement_type,
+        group_1_sum_of_squares=(group_1_observations ** 2).sum(),
+        group_2_sum_of_squares=(group_2_observations ** 2).sum(),
+        verbose=False,
+    )
+
+    assert actual_test_statistic == pytest.approx(expected_test_statistic)
+    assert actual_p_value == pytest.approx(expected_p_value)
+
+
+def test_parametric_significance_test_on_sufficient_statistics_validates_statistics():
+    """
+    Sums of squares are required when measuring means, and the number of events cannot exceed the number of
+    observations when measuring proportions.
+    """
+
+    with pytest.raises(TypeError, match='When measuring a mean for your test, you must also specify the sum of .*'):
+        evaluation.parametric_significance_test_on_sufficient_statistics(
+            group_1_count=10, group_1_sum=20, group_2_count=10, group_2_sum=25, measurement_type='mean'
+        )
+
+    with pytest.raises(ValueError, match='When testing proportions, the number of events must be between 0 and .*'):
+        evaluation.parametric_significance_test_on_sufficient_statistics(
+            group_1_count=10, group_1_sum=11, group_2_count=10, group_2_sum=5, measurement_type='proportion'
+        )
+
+
+def test__sum_of_squared_deviations_from_sums_is_never_negative():
+    """
+    Rounding error when the mean is large compared to the spread of the observations should not give negative
+    variances, or covariances larger than the variances allow.
+    """
+
+    observations = np.random.default_rng(1).normal(size=100) + 1e8
+    count, total, sum_of_squares = len(observations), observations.sum(), (observations ** 2).sum()
+
+    # Sum of squares minus count * mean ** 2 is negative here due to rounding
+    assert sum_of_squares - total ** 2 / count < 0
+    assert evaluation._sum_of_squared_deviations_from_sums(count, total, sum_of_squares) == 0
+
+    paired_moments = evaluation._paired_moments_from_sums(
+        count, total, sum_of_squares, 2 * total, 4 * sum_of_squares, 2 * sum_of_squares
+    )
+
+    assert paired_moments[2] >= 0 and paired_moments[4] >= 0
+    assert abs(paired_moments[5]) <= np.sqrt(paired_moments[2] * paired_moments[4])
+
+
+def test_parametric_significance_test_on_accumulators():
+    """
+    Testing on observations accumulated chunk by chunk should give the same results as testing on the raw observations.
+    """
+
+    random_generator = np.random.default_rng(2)
+    group_1_observations = random_generator.normal(10, 2, size=300)
+    group_2_observations = random_generator.normal(10.5, 2, size=250)
+
+    expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        measurement_type='mean',
+        verbose=False,
+    )
+
+    actual_p_value, actual_test_statistic = evaluation.parametric_significance_test_on_accumulators(
+        group_1_accumulator=streaming.GroupAccumulator().update_from_chunks(np.array_split(group_1_observations, 3)),
+        group_2_accumulator=streaming.GroupAccumulator().update_from_chunks(np.array_split(group_2_observations, 4)),
+        measurement_type='mean',
+        verbose=False,
+    )
+
+    assert actual_test_statistic == pytest.approx(expected_test_statistic)
+    assert actual_p_value == pytest.approx(expected_p_value)
+
+
+def test_parametric_significance_test_on_accumulators_requires_binary_proportions():
+    """
+    Proportions must be accumulated from observations of 0 or 1, rather than any values whose mean is between 0 and 1.
+    """
+
+    binary_accumulator = streaming.GroupAccumulator().update([0, 1, 1, 0, 1])
+
+    evaluation.parametric_significance_test_on_accumulators(
+        binary_accumulator, binary_accumulator, measurement_type='proportion', verbose=False
+    )
+
+    # e.g. a ratio metric
+    continuous_accumulator = streaming.GroupAccumulator().update([0.2, 0.9, 0.5, 0.4])
+
+    with pytest.raises(ValueError, match='When testing proportions, values must be marked as 1 .*'):
+        evaluation.parametric_significance_test_on_accumulators(
+            binary_accumulator, continuous_accumulator, measurement_type='proportion', verbose=False
+        )
+
+
+@pytest.mark.parametrize('alternative_hypothesis', ['two-sided', 'larger', 'smaller'])
+def test_parametric_significance_test_with_covariate_matches_regression(alternative_hypothesis):
+    """
+    Adjusting for a covariate should give the same result as the t-test on the group coefficient of a regression on the
+    group and covariate, whether from raw observations or their sums, and be more sensitive than ignoring it.
+    """
+
+    random_generator = np.random.default_rng(4)
+    group_1_covariates = random_generator.normal(10, 3, size=300)
+    group_2_covariates = random_generator.normal(10, 3, size=250)
+    group_1_observations = group_1_covariates + random_generator.normal(0.4, 1, size=300)
+    group_2_observations = group_2_covariates + random_generator.normal(0, 1, size=250)
+
+    regression = linear_model.OLS(
+        np.concatenate([group_1_observations, group_2_observations]),
+        np.column_stack([
+            np.ones(550),
+            np.repeat([1.0, 0.0], [300, 250]),
+            np.concatenate([group_1_covariates, group_2_covariates]),
+        ]),
+    ).fit()
+    expected_test_statistic = regression.tvalues[1]
+    expected_p_value = {
+        'two-sided': regression.pvalues[1],
+        'larger': regression.pvalues[1] / 2 if expected_test_statistic > 0 else 1 - regression.pvalues[1] / 2,
+        'smaller': 1 - regression.pvalues[1] / 2 if expected_test_statistic > 0 else regression.pvalues[1] / 2,
+    }[alternative_hypothesis]
+
+    raw_p_value, raw_test_statistic = evaluation.parametric_significance_test_with_covariate_on_raw_observations(
+        group_1_observations=group_1_observations,
+        group_1_covariates=group_1_covariates,
+        group_2_observations=group_2_observations,
+        group_2_covariates=group_2_covariates,
+        alternative_hypothesis=alternative_hypothesis,
+        verbose=False,
+    )
+
+    sums_p_value, sums_test_statistic = evaluation.parametric_significance_test_with_covariate_on_sufficient_statistics(
+        *[statistic
+          for observations, covariates in [(group_1_observations, group_1_covariates),
+                                           (group_2_observations, group_2_covariates)]
+          for statistic in [len(observations), observations.sum(), (observations ** 2).sum(), covariates.sum(),
+                            (covariates ** 2).sum(), (observations * covariates).sum()]],
+        alternative_hypothesis=alternative_hypothesis,
+        verbose=False,
+    )
+
+    for actual_p_value, actual_test_statistic in [(raw_p_value, raw_test_statistic),
+                                                  (sums_p_value, sums_test_statistic)]:
+        assert actual_test_statistic == pytest.approx(expected_test_statistic)
+        assert actual_p_value == pytest.approx(expected_p_value)
+
+    _, unadjusted_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+        group_1_observations, group_2_observations, measurement_type='mean', verbose=False
+    )
+    assert abs(raw_test_statistic) > abs(unadjusted_test_statistic)
+
+
+def test_parametric_significance_test_with_covariate_on_many_metrics():
+    """Testing many metrics at once should match testing each metric individually, and shapes must be consistent."""
+
+    random_generator = np.random.default_rng(5)
+    group_1_covariates = random_generator.normal(size=(80, 3))
+    group_2_covariates = random_generator.normal(size=(90, 3))
+    group_1_observations = 2 * group_1_covariates + random_generator.normal(0.3, 1, size=(80, 3))
+    group_2_observations = 2 * group_2_covariates + random_generator.normal(size=(90, 3))
+
+    actual_p_values, actual_test_statistics = \
+        evaluation.parametric_significance_test_with_covariate_on_raw_observations(
+            group_1_observations, group_1_covariates, group_2_observations, group_2_covariates
+        )
+
+    for metric in range(3):
+        expected_p_value, expected_test_statistic = \
+            evaluation.parametric_significance_test_with_covariate_on_raw_observations(
+                group_1_observations[:, metric], group_1_covariates[:, metric],
+                group_2_observations[:, metric], group_2_covariates[:, metric],
+                verbose=False,
+            )
+
+        assert actual_test_statistics[metric] == pytest.approx(expected_test_statistic)
+        assert actual_p_values[metric] == pytest.approx(expected_p_value)
+
+    with pytest.raises(ValueError, match='The covariates must be the same shape as the observations of their group.'):
+        evaluation.parametric_significance_test_with_covariate_on_raw_observations(
+            group_1_observations, group_1_covariates[:, :2], group_2_observations, group_2_covariates
+        )
+
+
+def _simulate_sessions_and_revenue(random_generator, n_users, revenue_per_session, n_metrics=None):
+    """Number of sessions of each user, and their revenue, which is correlated with how many sessions they had."""
+
+    size = n_users if n_metrics is None else (n_users, n_metrics)
+    sessions = random_generator.poisson(3, size=size) + 1
+    revenue = random_generator.gamma(shape=sessions, scale=revenue_per_session)
+
+    return revenue, sessions
+
+
+def test_parametric_significance_test_of_ratio_matches_linearisation():
+    """
+    The delta method should match a z-test on the linearised per-user values, (revenue - ratio * sessions) / mean
+    sessions, whether from raw observations or their sums.
+    """
+
+    random_generator = np.random.default_rng(6)
+    group_1_revenue, group_1_sessions = _simulate_sessions_and_revenue(random_generator, 400, 2.2)
+    group_2_revenue, group_2_sessions = _simulate_sessions_and_revenue(random_generator, 500, 2.0)
+
+    linearised_standard_errors = []
+    for revenue, sessions in [(group_1_revenue, group_1_sessions), (group_2_revenue, group_2_sessions)]:
+        linearised = (revenue - revenue.sum() / sessions.sum() * sessions) / sessions.mean()
+        linearised_standard_errors.append(linearised.std(ddof=1) / np.sqrt(len(linearised)))
+
+    expected_test_statistic = (group_1_revenue.sum() / group_1_sessions.sum()
+                               - group_2_revenue.sum() / group_2_sessions.sum()) \
+        / np.sqrt(linearised_standard_errors[0] ** 2 + linearised_standard_errors[1] ** 2)
+
+    raw_p_value, raw_test_statistic = evaluation.parametric_significance_test_of_ratio_on_raw_observations(
+        group_1_numerators=group_1_revenue,
+        group_1_denominators=group_1_sessions,
+        group_2_numerators=group_2_revenue,
+        group_2_denominators=group_2_sessions,
+        alternative_hypothesis='larger',
+        verbose=False,
+    )
+
+    sums_p_value, sums_test_statistic = evaluation.parametric_significance_test_of_ratio_on_sufficient_statistics(
+        *[statistic
+          for revenue, sessions in [(group_1_revenue, group_1_sessions), (group_2_revenue, group_2_sessions)]
+          for statistic in [len(revenue), revenue.sum(), (revenue ** 2).sum(), sessions.sum(), (sessions ** 2).sum(),
+                            (revenue * sessions).sum()]],
+        alternative_hypothesis='larger',
+        verbose=False,
+    )
+
+    assert raw_test_statistic == pytest.approx(expected_test_statistic)
+    assert raw_p_value == pytest.approx(stats.norm.sf(expected_test_statistic))
+    assert sums_test_statistic == pytest.approx(raw_test_statistic)
+    assert sums_p_value == pytest.approx(raw_p_value)
+
+
+def test_parametric_significance_test_of_ratio_on_many_metrics():
+    """
+    With no difference between the groups, p-values across many ratio metrics should be roughly uniform, and shapes
+    must be consistent.
+    """
+
+    random_generator = np.random.default_rng(7)
+    group_1_revenue, group_1_sessions = _simulate_sessions_and_revenue(random_generator, 300, 2.0, n_metrics=2000)
+    group_2_revenue, group_2_sessions = _simulate_sessions_and_revenue(random_generator, 300, 2.0, n_metrics=2000)
+
+    p_values, test_statistics = evaluation.parametric_significance_test_of_ratio_on_raw_observations(
+        group_1_revenue, group_1_sessions, group_2_revenue, group_2_sessions
+    )
+
+    assert p_values.shape == test_statistics.shape == (2000,)
+    assert np.mean(p_values < 0.05) == pytest.approx(0.05, abs=0.015)
+    assert np.std(test_statistics) == pytest.approx(1, abs=0.05)
+
+    with pytest.raises(ValueError, match='The denominators must be the same shape as the numerators of their group.'):
+        evaluation.parametric_significance_test_of_ratio_on_raw_observations(
+            group_1_revenue, group_1_sessions[:, :5], group_2_revenue, group_2_sessions
+        )
+
+
+@pytest.mark.parametrize('measurement_type', ['mean', 'proportion'])
+@pytest.mark.parametrize('alternative_hypothesis', ['two-sided', 'larger', 'smaller'])
+def test_parametric_significance_test_on_observation_matrices(measurement_type, alternative_hypothesis):
+    """
+    Testing many metrics at once should give the same results as testing each metric individually on its raw
+    observations.
+    """
+
+    random_generator = np.random.default_rng(0)
+    group_1_observations = random_generator.binomial(n=1, p=0.4, size=(50, 4))
+    group_2_observations = random_generator.binomial(n=1, p=0.5, size=(60, 4))
+
+    if measurement_type == 'mean':
+        group_1_observations = group_1_observations * random_generator.normal(10, 2, size=(50, 4))
+        group_2_observations = group_2_observations * random_generator.normal(10, 2, size=(60, 4))
+
+    actual_p_values, actual_test_statistics = evaluation.parametric_significance_test_on_observation_matrices(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+    )
+
+    for metric in range(4):
+        expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+            group_1_observations=group_1_observations[:, metric],
+            group_2_observations=group_2_observations[:, metric],
+            measurement_type=measurement_type,
+            alternative_hypothesis=alternative_hypothesis,
+            verbose=False,
+        )
+
+        assert actual_test_statistics[metric] == pytest.approx(expected_test_statistic)
+        assert actual_p_values[metric] == pytest.approx(expected_p_value)
+
+
+def test_parametric_significance_test_on_long_format_observations():
+    """
+    Observations stored one row per observation per metric should give the same results as testing each metric
+    individually on its raw observations, and metrics missing for a group should have nan results.
+    """
+
+    random_generator = np.random.default_rng(1)
+    observations = pd.DataFrame({
+        'group': np.repeat(['control', 'treatment'], 60),
+        'metric': np.tile(['spend', 'basket_size', 'visits'], 40),
+        'value': random_generator.normal(5, 1, size=120),
+    })
+
+    actual_p_values, actual_test_statistics = evaluation.parametric_significance_test_on_long_format_observations(
+        observations=observations,
+        group_column='group',
+        metric_column='metric',
+        value_column='value',
+        group_1='treatment',
+        group_2='control',
+        measurement_type='mean',
+        metrics=['visits', 'spend', 'missing_metric'],
+    )
+
+    for position, metric in enumerate(['visits', 'spend']):
+        metric_observations = observations.loc[observations['metric'] == metric]
+
+        expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+            group_1_observations=metric_observations.loc[metric_observations['group'] == 'treatment', 'value'],
+            group_2_observations=metric_observations.loc[metric_observations['group'] == 'control', 'value'],
+            measurement_type='mean',
+            verbose=False,
+        )
+
+        assert actual_test_statistics[position] == pytest.approx(expected_test_statistic)
+        assert actual_p_values[position] == pytest.approx(expected_p_value)
+
+    assert np.isnan(actual_p_values[2])
+    assert np.isnan(actual_test_statistics[2])
+
+
+@pytest.mark.parametrize('correction, statsmodels_method', [
+    ('bonferroni', 'bonferroni'), ('holm', 'holm'), ('benjamini-hochberg', 'fdr_bh')
+])
+def test_parametric_significance_test_on_multiple_groups_pairwise(correction, statsmodels_method):
+    """
+    Every pair of groups should be tested as if by testing their raw observations, with the p-values adjusted in the
+    same way as statsmodels.
+    """
+
+    random_generator = np.random.default_rng(2)
+    experiment = pd.DataFrame({
+        'sample_group': pd.Categorical(random_generator.choice(['a', 'b', 'c', 'd'], size=400)),
+        'spend': random_generator.normal(10, 3, size=400),
+    })
+    experiment.loc[experiment['sample_group'] == 'd', 'spend'] += 2
+
+    results = evaluation.parametric_significance_test_on_multiple_groups(
+        experiment, metric_column='spend', measurement_type='mean', correction=correction
+    )
+
+    assert list(zip(results['group_1'], results['group_2'])) == [
+        ('a', 'b'), ('a', 'c'), ('a', 'd'), ('b', 'c'), ('b', 'd'), ('c', 'd')
+    ]
+
+    for row in results.itertuples():
+        expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+            group_1_observations=experiment.loc[experiment['sample_group'] == row.group_1, 'spend'],
+            group_2_observations=experiment.loc[experiment['sample_group'] == row.group_2, 'spend'],
+            measurement_type='mean',
+            verbose=False,
+        )
+
+        assert row.test_statistic == pytest.approx(expected_test_statistic)
+        assert row.p_value == pytest.approx(expected_p_value)
+
+    expected_significant, expected_adjusted_p_values, _, _ = multitest.multipletests(
+        results['p_value'], method=statsmodels_method
+    )
+
+    np.testing.assert_allclose(results['adjusted_p_value'], expected_adjusted_p_values)
+    np.testing.assert_array_equal(results['significant'], expected_significant)
+
+
+def test_parametric_significance_test_on_multiple_groups_against_control():
+    """Every other group is compared against the control group, which must have observations."""
+
+    experiment = pd.DataFrame({
+        'sample_group': ['treatment_1', 'control', 'treatment_2'] * 20,
+        'converted': np.tile([1, 0, 1, 0, 0, 1], 10),
+    })
+
+    results = evaluation.parametric_significance_test_on_multiple_groups(
+        experiment, metric_column='converted', measurement_type='proportion', control_group='control', correction=None
+    )
+
+    assert results['group_1'].tolist() == ['treatment_1', 'treatment_2']
+    assert results['group_2'].tolist() == ['control', 'control']
+    np.testing.assert_array_equal(results['adjusted_p_value'], results['p_value'])
+
+    with pytest.raises(ValueError, match="The control group 'missing' does not have any observations."):
+        evaluation.parametric_significance_test_on_multiple_groups(
+            experiment, metric_column='converted', measurement_type='proportion', control_group='missing'
+        )
+
+
+def test_parametric_significance_test_by_segment():
+    """
+    Every segment should be tested as if by filtering to the segment and testing its raw observations, and segments
+    missing a group should have nan results.
+    """
+
+    random_generator = np.random.default_rng(3)
+    experiment = pd.DataFrame({
+        'country': random_generator.choice(['uk', 'fr'], size=600),
+        'platform': random_generator.choice(['ios', 'web'], size=600),
+        'sample_group': random_generator.choice(['control', 'treatment', 'other'], size=600),
+        'spend': random_generator.normal(10, 3, size=600),
+    })
+    experiment = pd.concat([
+        experiment,
+        pd.DataFrame({'country': ['de'] * 5, 'platform': ['ios'] * 5, 'sample_group': ['control'] * 5, 'spend': 1.0}),
+    ])
+
+    results = evaluation.parametric_significance_test_by_segment(
+        experiment,
+        segment_columns=['country', 'platform'],
+        metric_column='spend',
+        group_1='treatment',
+        group_2='control',
+        measurement_type='mean',
+        correction='bonferroni',
+    )
+
+    assert results[['country', 'platform']].values.tolist() == [
+        ['de', 'ios'], ['fr', 'ios'], ['fr', 'web'], ['uk', 'ios'], ['uk', 'web']
+    ]
+
+    for row in results.iloc[1:].itertuples():
+        segment = experiment.loc[(experiment['country'] == row.country) & (experiment['platform'] == row.platform)]
+
+        expected_p_value, expected_test_statistic = evaluation.parametric_significance_test_on_raw_observations(
+            group_1_observations=segment.loc[segment['sample_group'] == 'treatment', 'spend'],
+            group_2_observations=segment.loc[segment['sample_group'] == 'control', 'spend'],
+            measurement_type='mean',
+            verbose=False,
+        )
+
+        assert row.test_statistic == pytest.approx(expected_test_statistic)
+        assert row.p_value == pytest.approx(expected_p_value)
+        assert row.adjusted_p_value == pytest.approx(min(1, expected_p_value * 4))
+
+    missing_segment = results.iloc[0]
+    assert (missing_segment['group_1_count'], missing_segment['group_2_count']) == (0, 5)
+    assert np.isnan(missing_segment['p_value'])
+    assert not missing_segment['significant']
+
+
 def test__print_interpretation_of_p_value(capsys):
     """Correct message should be displayed to user depending on whether the results are significant or not."""
 
@@ -110,3 +595,16 @@ def test__print_interpretation_of_p_value(capsys):
     expected_interpretation_when_not_significant = expected_interpretation_when_not_significant.replace('\n', '')
 
     assert actual_interpretation_when_not_significant == expected_interpretation_when_not_significant
+
+
+def test_importing_hypothesis_testing_does_not_import_heavy_dependencies(modules_imported_by):
+    """
+    Heavy dependencies are only imported when the functions using them are called, so that importing the package
+    (e.g. in a command line tool) is fast.
+    """
+
+    imported_modules, import_times = modules_imported_by(
+        'from ds_utils.hypothesis_testing import evaluation, set_up_experiment, streaming'
+    )
+
+    assert imported_modules.isdisjoint({'pandas', 'scipy.stats', 'statsmodels.stats', 'sklearn'}), import_times
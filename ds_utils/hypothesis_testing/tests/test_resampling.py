@@ -0,0 +1,161 @@
+"""
+Testing for resampling-based tests of significance.
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+from scipy import stats
+
+# Local application imports
+from ds_utils.hypothesis_testing import resampling
+
+
+@pytest.fixture
+def heavy_tailed_observations():
+    """Lognormal observations for two groups, where group_2 has a larger mean."""
+    random_generator = np.random.default_rng(0)
+    return random_generator.lognormal(0, 1, size=300), random_generator.lognormal(0.3, 1, size=250)
+
+
+@pytest.mark.parametrize('alternative_hypothesis', ['two-sided', 'larger', 'smaller'])
+def test_permutation_significance_test_on_raw_observations_matches_scipy(
+        heavy_tailed_observations, alternative_hypothesis
+):
+    """
+    Ensure the p-value from the permutation test is close to that of scipy's permutation test, and the test-statistic is
+    the difference in means.
+    """
+
+    group_1_observations, group_2_observations = heavy_tailed_observations
+    scipy_alternative = {'two-sided': 'two-sided', 'larger': 'greater', 'smaller': 'less'}[alternative_hypothesis]
+
+    expected_p_value = stats.permutation_test(
+        (group_1_observations, group_2_observations),
+        statistic=lambda x, y: np.mean(x) - np.mean(y),
+        n_resamples=20_000,
+        alternative=scipy_alternative,
+        random_state=1,
+    ).pvalue
+
+    actual_p_value, actual_test_statistic = resampling.permutation_significance_test_on_raw_observations(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        alternative_hypothesis=alternative_hypothesis,
+        n_resamples=20_000,
+        random_state=1,
+        verbose=False,
+    )
+
+    assert actual_test_statistic == pytest.approx(group_1_observations.mean() - group_2_observations.mean())
+    assert actual_p_value == pytest.approx(expected_p_value, abs=0.01)
+
+
+def test_bootstrap_significance_test_and_confidence_interval(heavy_tailed_observations):
+    """
+    Ensure the bootstrap test detects the difference between the groups, and the confidence interval contains the
+    observed difference but not 0.
+    """
+
+    group_1_observations, group_2_observations = heavy_tailed_observations
+    observed_difference = group_1_observations.mean() - group_2_observations.mean()
+
+    p_value, test_statistic = resampling.bootstrap_significance_test_on_raw_observations(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        n_resamples=5000,
+        random_state=2,
+        verbose=False,
+    )
+
+    lower_bound, upper_bound = resampling.bootstrap_confidence_interval(
+        group_1_observations=group_1_observations,
+        group_2_observations=group_2_observations,
+        n_resamples=5000,
+        random_state=2,
+    )
+
+    assert test_statistic == pytest.approx(observed_difference)
+    assert p_value < 0.05
+    assert lower_bound < observed_difference < upper_bound < 0
+
+    # Same groups lead to no evidence of a difference
+    same_group_p_value, _ = resampling.bootstrap_significance_test_on_raw_observations(
+        group_1_observations, group_1_observations, n_resamples=1000, random_state=2, verbose=False
+    )
+    assert same_group_p_value == 1
+
+
+def test_resampling_is_reproducible_regardless_of_memory_budget_blocks_and_processes(heavy_tailed_observations):
+    """
+    Ensure the same random_state gives the same result whatever the memory budget, in a single process and across
+    several, and that a memory budget too small for a single replicate still produces every replicate.
+    """
+
+    group_1_observations, group_2_observations = heavy_tailed_observations
+    arguments = {
+        'group_1_observations': group_1_observations,
+        'group_2_observations': group_2_observations,
+        'n_resamples': 1001,
+        'random_state': 3,
+        'memory_budget_bytes': 2 ** 16,
+        'verbose': False,
+    }
+
+    for resampling_test in [resampling.permutation_significance_test_on_raw_observations,
+                            resampling.bootstrap_significance_test_on_raw_observations]:
+        single_process_p_value, _ = resampling_test(**arguments, n_jobs=1)
+        multiple_process_p_value, _ = resampling_test(**arguments, n_jobs=2)
+        larger_budget_p_value, _ = resampling_test(**{**arguments, 'memory_budget_bytes': 2 ** 27}, n_jobs=1)
+        minimal_budget_p_value, _ = resampling_test(**{**arguments, 'memory_budget_bytes': 1}, n_jobs=1)
+
+        assert single_process_p_value == multiple_process_p_value == larger_budget_p_value == minimal_budget_p_value
+
+    lower_bounds_and_upper_bounds = [
+        resampling.bootstrap_confidence_interval(group_1_observations, group_2_observations, n_resamples=1001,
+                                                 random_state=3, memory_budget_bytes=memory_budget_bytes)
+        for memory_budget_bytes in [1, 2 ** 16, 2 ** 27]
+    ]
+    assert lower_bounds_and_upper_bounds[0] == lower_bounds_and_upper_bounds[1] == lower_bounds_and_upper_bounds[2]
+
+    minimal_budget_p_value, _ = resampling.permutation_significance_test_on_raw_observations(
+        **{**arguments, 'memory_budget_bytes': 1, 'n_resamples': 9}
+    )
+    assert minimal_budget_p_value * 10 == pytest.approx(round(minimal_budget_p_value * 10))
+
+
+def test_resampling_inputs_are_validated():
+    """
+    Exception is raised if the alternative hypothesis, significance level or number of resamples are not valid.
+    """
+
+    with pytest.raises(ValueError):
+        resampling.permutation_significance_test_on_raw_observations([1, 2], [3, 4], alternative_hypothesis='bigger')
+
+    with pytest.raises(ValueError):
+        resampling.bootstrap_significance_test_on_raw_observations([1, 2], [3, 4], significance_level=1.5)
+
+    with pytest.raises(ValueError, match='The number of resamples must be positive.'):
+        resampling.bootstrap_confidence_interval([1, 2], [3, 4], n_resamples=0)
+
+
+@pytest.mark.parametrize('resampling_test', [
+    resampling.permutation_significance_test_on_raw_observations,
+    resampling.bootstrap_significance_test_on_raw_observations,
+    resampling.bootstrap_confidence_interval,
+])
+def test_resampling_rejects_empty_groups_and_non_finite_observations(resampling_test):
+    """
+    Exception is raised rather than a p-value returned if either group is empty or has missing or infinite values,
+    which would otherwise make the observed difference nan.
+    """
+
+    observations = np.random.default_rng(4).normal(size=100)
+
+    with pytest.raises(ValueError, match='Both groups must contain at least one observation.'):
+        resampling_test([], observations, n_resamples=99)
+
+    for invalid_value in [np.nan, np.inf]:
+        with pytest.raises(ValueError, match=r'Observations must not contain missing \(nan\) or infinite values.'):
+            resampling_test(observations, np.append(observations, invalid_value), n_resamples=99)
+
@@ -0,0 +1,82 @@
+"""
+Testing for evaluating an experiment repeatedly as its results arrive.
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local application imports
+from ds_utils.hypothesis_testing import evaluation, sequential
+
+
+def test_sequential_test_controls_false_positives_over_many_looks():
+    """
+    With no difference between the groups, the always-valid p-value rarely drops below the significance level even
+    when checked after every batch, unlike repeatedly running a t-test on every observation so far.
+    """
+
+    random_generator = np.random.default_rng(0)
+    n_experiments, n_looks, batch_size = 500, 30, 50
+
+    # Each metric is an independent experiment
+    sequential_test = sequential.SequentialTest(mixing_variance=0.1, significance_level=0.05)
+    group_1_observations = np.empty((0, n_experiments))
+    group_2_observations = np.empty((0, n_experiments))
+    ever_significant_with_t_test = np.zeros(n_experiments, dtype=bool)
+
+    for _ in range(n_looks):
+        group_1_batch = random_generator.normal(size=(batch_size, n_experiments))
+        group_2_batch = random_generator.normal(size=(batch_size, n_experiments))
+
+        previous_p_value = sequential_test.p_value
+        p_value, (lower_bound, upper_bound) = sequential_test.update(group_1_batch, group_2_batch).evaluate()
+        assert np.all(p_value <= previous_p_value)
+
+        group_1_observations = np.vstack([group_1_observations, group_1_batch])
+        group_2_observations = np.vstack([group_2_observations, group_2_batch])
+        t_test_p_value, _ = evaluation.parametric_significance_test_on_observation_matrices(
+            group_1_observations, group_2_observations, measurement_type='mean'
+        )
+        ever_significant_with_t_test |= t_test_p_value < 0.05
+
+    assert sequential_test.n_looks == n_looks
+    assert sequential_test.is_significant.mean() < 0.05
+    assert ever_significant_with_t_test.mean() > 0.15
+
+    # Confidence sequence contains the true difference of 0 at least as often as the p-value is not significant
+    assert ((lower_bound < 0) & (upper_bound > 0)).mean() >= 1 - sequential_test.is_significant.mean()
+
+
+def test_sequential_test_detects_difference_and_bounds_it():
+    """A real difference is detected, and the confidence sequence narrows around it."""
+
+    random_generator = np.random.default_rng(1)
+    sequential_test = sequential.SequentialTest(mixing_variance=0.25)
+
+    widths = []
+    for _ in range(20):
+        sequential_test.update(random_generator.normal(0.5, 1, size=100), random_generator.normal(0, 1, size=100))
+        p_value, (lower_bound, upper_bound) = sequential_test.evaluate(verbose=False)
+        widths.append(upper_bound - lower_bound)
+
+    assert isinstance(p_value, float)
+    assert p_value < 0.001
+    assert 0 < lower_bound < 0.5 < upper_bound
+    assert widths == sorted(widths, reverse=True)
+
+
+def test_sequential_test_before_enough_observations_and_invalid_inputs():
+    """
+    Looks before each group has two observations leave the test unchanged, and invalid parameters raise exceptions.
+    """
+
+    sequential_test = sequential.SequentialTest(mixing_variance=1)
+
+    assert sequential_test.update([5.0]).evaluate(verbose=False) == (1.0, (-np.inf, np.inf))
+
+    with pytest.raises(ValueError, match='The mixing variance must be positive.'):
+        sequential.SequentialTest(mixing_variance=0)
+
+    with pytest.raises(ValueError):
+        sequential.SequentialTest(mixing_variance=1, significance_level=1)
@@ -4,6 +4,7 @@ Testing for helper functions when setting up an experiment.
 
 # Standard library imports
 import math
+import os
 
 # Third party imports
 import numpy as np
@@ -152,6 +153,32 @@ def test_calculate_required_sample_size_raises_exception_if_means_provided_witho
         )
 
 
+@pytest.mark.parametrize('measurement_type', ['mean', 'proportion'])
+def test_calculate_required_sample_size_with_covariate_correlation(measurement_type):
+    """
+    Adjusting for a covariate reduces the variance by a factor of 1 - correlation ** 2, and so the required sample size
+    by (approximately) the same factor.
+    """
+
+    parameters = {
+        'baseline_metric_value': 0.3 if measurement_type == 'proportion' else 10,
+        'new_metric_value': 0.32 if measurement_type == 'proportion' else 10.5,
+        'measurement_type': measurement_type,
+        'standard_deviation': 3 if measurement_type == 'mean' else None,
+        'use_cache': False,
+    }
+
+    unadjusted_sample_size = set_up_experiment.calculate_required_sample_size(**parameters)
+    adjusted_sample_size = set_up_experiment.calculate_required_sample_size(**parameters, covariate_correlation=-0.6)
+
+    assert adjusted_sample_size == pytest.approx(unadjusted_sample_size * (1 - 0.6 ** 2), abs=2)
+    assert set_up_experiment.calculate_required_sample_size(**parameters, covariate_correlation=0) \
+        == unadjusted_sample_size
+
+    with pytest.raises(ValueError, match='covariate_correlation must adhere to -1 < covariate_correlation < 1.'):
+        set_up_experiment.calculate_required_sample_size(**parameters, covariate_correlation=1)
+
+
 def test_create_sample_groups_correct_absolute_sizes():
     """The number of records assigned to each group should match the absolute sizes specified by the user."""
 
@@ -231,3 +258,479 @@ def test_create_sample_groups_correct_proportion_sizes():
         .agg(sample_group_size=pd.NamedAgg(column='sample_group', aggfunc='size'))
 
     pd.testing.assert_frame_equal(actual_sample_sizes, expected_sample_sizes)
+
+
+def test_assign_sample_groups():
+    """
+    Assignments should be a compact categorical series aligned to the population's index, with records that were not
+    sampled left unassigned.
+    """
+
+    original_population_10_rows = pd.DataFrame(
+        np.arange(10), columns=['original_row_index'], index=[f'user_{i}' for i in range(10)]
+    )
+
+    assignments = set_up_experiment.assign_sample_groups(
+        original_population=original_population_10_rows,
+        sample_groups={'Group_1': 4, 'Group_2': 3},
+    )
+
+    pd.testing.assert_index_equal(assignments.index, original_population_10_rows.index)
+    assert assignments.dtype == 'category'
+    assert assignments.name == 'sample_group'
+    assert assignments.value_counts().to_dict() == {'Group_1': 4, 'Group_2': 3}
+    assert assignments.isna().sum() == 3
+
+
+def test_sample_group_positions():
+    """Each group should be given distinct row positions of the expected size."""
+
+    original_population_9_rows = pd.DataFrame(np.arange(9), columns=['original_row_index'])
+
+    group_positions = set_up_experiment.sample_group_positions(
+        original_population=original_population_9_rows,
+        sample_groups=['Group_1', 'Group_2', 'Group_3'],
+    )
+
+    assert list(group_positions) == ['Group_1', 'Group_2', 'Group_3']
+    assert [len(positions) for positions in group_positions.values()] == [3, 3, 3]
+    assert sorted(np.concatenate(list(group_positions.values()))) == list(range(9))
+
+
+@pytest.mark.parametrize('stratify_by', [None, 'region'])
+def test_assign_sample_groups_rejects_duplicate_group_names(stratify_by):
+    """
+    Groups with the same name would be merged into one, so a list of group names containing duplicates is rejected
+    rather than silently giving that group more records.
+    """
+
+    original_population = pd.DataFrame({'region': ['North', 'South'] * 5})
+
+    with pytest.raises(ValueError, match='The names of the sample groups must be unique.'):
+        set_up_experiment.assign_sample_groups(original_population, ['A', 'A'], stratify_by=stratify_by)
+
+    with pytest.raises(ValueError, match='The names of the sample groups must be unique.'):
+        set_up_experiment.sample_group_positions(original_population, ['A', 'B', 'A'])
+
+    with pytest.raises(ValueError, match='The names of the sample groups must be unique.'):
+        set_up_experiment.assign_sample_groups_by_hash(np.arange(10), ['A', 'A'], salt='experiment')
+
+
+def test_assign_sample_groups_by_hash_is_consistent_across_partitions():
+    """
+    Units should receive the same assignment whether the population is assigned all at once or in separate partitions,
+    and a different salt should give a different assignment.
+    """
+
+    unit_ids = pd.Series([f'customer_{i}' for i in range(10_000)])
+    sample_groups = {'Group_1': 0.5, 'Group_2': 0.3, 'Group_3': 0.2}
+
+    full_assignments = set_up_experiment.assign_sample_groups_by_hash(unit_ids, sample_groups, salt='experiment_1')
+    partitioned_assignments = pd.concat([
+        set_up_experiment.assign_sample_groups_by_hash(partition, sample_groups, salt='experiment_1')
+        for partition in [unit_ids.iloc[:3_000], unit_ids.iloc[3_000:]]
+    ])
+    different_salt_assignments = set_up_experiment.assign_sample_groups_by_hash(
+        unit_ids, sample_groups, salt='experiment_2'
+    )
+
+    pd.testing.assert_series_equal(full_assignments, partitioned_assignments)
+    assert (full_assignments != different_salt_assignments).any()
+
+    # The groups should be roughly the requested proportions of the population, with no units left unassigned
+    actual_proportions = full_assignments.value_counts(normalize=True, dropna=False)
+    for group, expected_proportion in sample_groups.items():
+        assert actual_proportions[group] == pytest.approx(expected_proportion, abs=0.02)
+
+
+def test_assign_sample_groups_by_hash_absolute_sizes():
+    """Absolute sizes are converted to proportions of the population, which must therefore be provided."""
+
+    unit_ids = np.arange(10_000)
+
+    with pytest.raises(TypeError, match='When providing absolute sizes for `sample_groups`, you must also specify .*'):
+        set_up_experiment.assign_sample_groups_by_hash(unit_ids, {'Group_1': 1_000, 'Group_2': 1_000}, salt='salt')
+
+    assignments = set_up_experiment.assign_sample_groups_by_hash(
+        unit_ids, {'Group_1': 1_000, 'Group_2': 1_000}, salt='salt', population_size=10_000
+    )
+
+    assert assignments.value_counts()['Group_1'] == pytest.approx(1_000, abs=100)
+    assert assignments.isna().mean() == pytest.approx(0.8, abs=0.02)
+
+
+@pytest.mark.parametrize('file_extension', ['csv', 'parquet'])
+def test_create_sample_groups_from_file(tmp_path, file_extension):
+    """
+    Records read from file in chunks should be assigned to groups of exactly the specified sizes, with each record
+    written out at most once.
+    """
+
+    source_path = str(tmp_path / f'population.{file_extension}')
+    destination_path = str(tmp_path / 'output' / f'sample_groups.{file_extension}')
+
+    original_population = pd.DataFrame({'user_id': np.arange(1_000), 'spend': np.linspace(0, 100, 1_000)})
+    if file_extension == 'csv':
+        original_population.to_csv(source_path, index=False)
+    else:
+        original_population.to_parquet(source_path, index=False)
+
+    group_sizes = set_up_experiment.create_sample_groups_from_file(
+        source_path=source_path,
+        destination_path=destination_path,
+        sample_groups={'Group_1': 0.4, 'Group_2': 0.25},
+        chunk_size=128,
+        random_state=0,
+    )
+
+    sample_groups = pd.read_csv(destination_path) if file_extension == 'csv' else pd.read_parquet(destination_path)
+
+    assert group_sizes == {'Group_1': 400, 'Group_2': 250}
+    assert sample_groups['sample_group'].value_counts().to_dict() == group_sizes
+    assert sample_groups['user_id'].is_unique
+    assert list(sample_groups.columns) == ['user_id', 'spend', 'sample_group']
+
+    with pytest.raises(FileExistsError, match=r'File .* already exists.*'):
+        set_up_experiment.create_sample_groups_from_file(
+            source_path=source_path,
+            destination_path=destination_path,
+            sample_groups=['Group_1', 'Group_2'],
+        )
+
+    # An empty population gives an empty file with the same columns
+    empty_source_path = str(tmp_path / f'empty_population.{file_extension}')
+    empty_destination_path = str(tmp_path / 'output' / f'empty_sample_groups.{file_extension}')
+    if file_extension == 'csv':
+        original_population.iloc[:0].to_csv(empty_source_path, index=False)
+    else:
+        original_population.iloc[:0].to_parquet(empty_source_path, index=False)
+
+    for empty_sample_groups in [['Group_1', 'Group_2'], {'Group_1': 0, 'Group_2': 0}]:
+        group_sizes = set_up_experiment.create_sample_groups_from_file(
+            source_path=empty_source_path,
+            destination_path=empty_destination_path,
+            sample_groups=empty_sample_groups,
+            overwrite=True,
+        )
+
+        empty_output = pd.read_csv(empty_destination_path) if file_extension == 'csv' \
+            else pd.read_parquet(empty_destination_path)
+
+        assert group_sizes == {'Group_1': 0, 'Group_2': 0}
+        assert empty_output.shape == (0, 3)
+        assert list(empty_output.columns) == ['user_id', 'spend', 'sample_group']
+
+
+def test_create_sample_groups_from_file_when_first_chunks_are_unassigned(tmp_path):
+    """
+    The Parquet schema should store 'sample_group' as strings even when the first chunks have no assigned records, so
+    that every later chunk can be written.
+    """
+
+    parquet = pytest.importorskip('pyarrow.parquet')
+
+    source_path = str(tmp_path / 'population.parquet')
+    destination_path = str(tmp_path / 'sample_groups.parquet')
+    pd.DataFrame({'user_id': np.arange(1_000)}).to_parquet(source_path, index=False)
+
+    for random_state in range(5):
+        set_up_experiment.create_sample_groups_from_file(
+            source_path=source_path,
+            destination_path=destination_path,
+            sample_groups={'Group_1': 2, 'Group_2': 1},
+            chunk_size=10,
+            random_state=random_state,
+            overwrite=True,
+        )
+
+        sample_groups = pd.read_parquet(destination_path)
+
+        assert str(parquet.read_schema(destination_path).field('sample_group').type) == 'string'
+        assert sample_groups['sample_group'].value_counts().to_dict() == {'Group_1': 2, 'Group_2': 1}
+
+
+@pytest.mark.parametrize('file_extension', ['csv', 'parquet'])
+def test_create_sample_groups_from_file_leaves_no_partial_file_on_failure(tmp_path, monkeypatch, file_extension):
+    """A failure part way through writing should not leave a partially written file behind."""
+
+    source_path = str(tmp_path / f'population.{file_extension}')
+    destination_path = str(tmp_path / f'sample_groups.{file_extension}')
+    original_population = pd.DataFrame({'user_id': np.arange(100)})
+    if file_extension == 'csv':
+        original_population.to_csv(source_path, index=False)
+    else:
+        original_population.to_parquet(source_path, index=False)
+
+    def read_population_then_fail(*args, **kwargs):
+        yield original_population.iloc[:50]
+        raise OSError('Connection to the population was lost.')
+
+    monkeypatch.setattr(set_up_experiment, '_read_population_in_chunks', read_population_then_fail)
+
+    with pytest.raises(OSError, match='Connection to the population was lost.'):
+        set_up_experiment.create_sample_groups_from_file(
+            source_path=source_path,
+            destination_path=destination_path,
+            sample_groups=['Group_1', 'Group_2'],
+            chunk_size=50,
+        )
+
+    assert sorted(os.listdir(tmp_path)) == [f'population.{file_extension}']
+
+
+def test_create_sample_groups_stratified():
+    """When stratifying, each stratum should be split across the groups in the specified proportions."""
+
+    original_population = pd.DataFrame({
+        'region': np.repeat(['North', 'South', 'East'], [10, 20, 40]),
+        'is_new_customer': np.tile([True, False], 35),
+    })
+
+    sample_groups = set_up_experiment.create_sample_groups(
+        original_population=original_population,
+        sample_groups={'Group_1': 0.5, 'Group_2': 0.5},
+        stratify_by=['region', 'is_new_customer'],
+    )
+
+    actual_group_sizes = sample_groups.groupby(['region', 'is_new_customer', 'sample_group']).size()
+
+    assert len(sample_groups) == 70
+    assert sample_groups['sample_group'].value_counts().tolist() == [35, 35]
+    assert actual_group_sizes.loc['South'].tolist() == [5, 5, 5, 5]
+    assert actual_group_sizes.loc['East'].tolist() == [10, 10, 10, 10]
+
+    # Strata of 5 records are split 2/3 or 3/2, with the odd records going to different groups
+    for is_new_customer in [True, False]:
+        assert sorted(actual_group_sizes.loc[('North', is_new_customer)].tolist()) == [2, 3]
+    assert actual_group_sizes.loc['North'].groupby('sample_group').sum().tolist() == [5, 5]
+
+
+def test_assign_sample_groups_stratified_even_split():
+    """Splitting evenly across the groups should assign every record, with any remainder going to the first groups."""
+
+    original_population = pd.DataFrame({'region': np.repeat(['North', 'South'], [7, 9])})
+
+    assignments = set_up_experiment.assign_sample_groups(
+        original_population=original_population,
+        sample_groups=['Group_1', 'Group_2', 'Group_3'],
+        stratify_by='region',
+    )
+
+    actual_group_sizes = pd.crosstab(original_population['region'], assignments)
+
+    assert actual_group_sizes.loc['North'].tolist() == [3, 2, 2]
+    assert actual_group_sizes.loc['South'].tolist() == [3, 3, 3]
+
+
+@pytest.mark.parametrize('sample_groups', [
+    {'control': 0.05, 'treatment': 0.05},
+    {'control': 1000, 'treatment': 1000},
+    {'Group_1': 0.3, 'Group_2': 0.3, 'Group_3': 0.4},
+])
+def test_assign_sample_groups_stratified_many_small_strata(sample_groups):
+    """
+    When each stratum is too small for its share of a group to be a whole record, the total size of each group should
+    still be exactly as specified, and each stratum within one record of its share.
+    """
+
+    original_population = pd.DataFrame({'stratum': np.repeat(np.arange(2000), 10)})
+
+    assignments = set_up_experiment.assign_sample_groups(
+        original_population=original_population,
+        sample_groups=sample_groups,
+        stratify_by='stratum',
+    )
+
+    expected_group_sizes = {
+        group: group_size if isinstance(group_size, int) else round(group_size * 20_000)
+        for group, group_size in sample_groups.items()
+    }
+    assert assignments.value_counts().to_dict() == expected_group_sizes
+
+    group_sizes_by_stratum = pd.crosstab(original_population['stratum'], assignments)
+    expected_shares = pd.Series(expected_group_sizes) / 2000
+    assert (group_sizes_by_stratum >= np.floor(expected_shares)).all().all()
+    assert (group_sizes_by_stratum <= np.ceil(expected_shares)).all().all()
+
+
+@pytest.mark.parametrize('measurement_type', ['mean', 'proportion'])
+@pytest.mark.parametrize('alternative_hypothesis', ['two-sided', 'larger'])
+def test_calculate_required_sample_size_grid(measurement_type, alternative_hypothesis):
+    """Solving across a grid of parameters should give the same sample sizes as solving for each cell individually."""
+
+    baseline_metric_values = np.array([0.1, 0.3, 0.5])[:, np.newaxis, np.newaxis]
+    new_metric_values = baseline_metric_values * np.array([1.05, 1.2])[:, np.newaxis]
+    powers = np.array([0.8, 0.9])
+
+    actual_required_sample_sizes = set_up_experiment.calculate_required_sample_size_grid(
+        baseline_metric_value=baseline_metric_values,
+        new_metric_value=new_metric_values,
+        measurement_type=measurement_type,
+        alternative_hypothesis=alternative_hypothesis,
+        power=powers,
+        significance_level=0.05,
+        standard_deviation=0.25,
+    )
+
+    assert actual_required_sample_sizes.shape == (3, 2, 2)
+
+    for (baseline, lift, power), actual_required_sample_size in np.ndenumerate(actual_required_sample_sizes):
+        expected_required_sample_size = set_up_experiment.calculate_required_sample_size(
+            baseline_metric_value=float(baseline_metric_values[baseline, 0, 0]),
+            new_metric_value=float(new_metric_values[baseline, lift, 0]),
+            measurement_type=measurement_type,
+            alternative_hypothesis=alternative_hypothesis,
+            power=float(powers[power]),
+            significance_level=0.05,
+            standard_deviation=0.25,
+        )
+
+        assert actual_required_sample_size == expected_required_sample_size
+
+
+@pytest.mark.parametrize('alternative_hypothesis', ['two-sided', 'larger'])
+def test_calculate_required_sample_size_grid_with_large_effect_sizes(alternative_hypothesis):
+    """
+    Sample sizes for a t-test remain correct when the effect is large enough that only a few observations are needed,
+    and are never smaller than 2.
+    """
+
+    effect_sizes = np.array([1.5, 2.5, 4.5, 5.5, 6, 8])[:, np.newaxis, np.newaxis]
+    powers = np.array([0.8, 0.99])[:, np.newaxis]
+    significance_levels = np.array([0.05, 0.1, 0.2])
+
+    actual_required_sample_sizes = set_up_experiment.calculate_required_sample_size_grid(
+        baseline_metric_value=0,
+        new_metric_value=effect_sizes,
+        measurement_type='mean',
+        alternative_hypothesis=alternative_hypothesis,
+        power=powers,
+        significance_level=significance_levels,
+        standard_deviation=1,
+    )
+
+    for (effect, power, significance), actual_required_sample_size in np.ndenumerate(actual_required_sample_sizes):
+        solve_power_arguments = dict(
+            effect_size=effect_sizes[effect, 0, 0],
+            alpha=significance_levels[significance],
+            alternative=alternative_hypothesis,
+        )
+
+        # statsmodels does not solve for fewer than 2 observations per group
+        if stats_power.TTestIndPower().power(nobs1=2, **solve_power_arguments) >= powers[power, 0]:
+            assert actual_required_sample_size == 2
+        else:
+            expected_required_sample_size = \
+                stats_power.tt_ind_solve_power(nobs1=None, power=powers[power, 0], **solve_power_arguments)
+            assert actual_required_sample_size == math.floor(expected_required_sample_size)
+
+
+def test_calculate_required_sample_size_grid_validates_parameters():
+    """Every value in the grid should be valid, and the new metric value must differ from the baseline."""
+
+    with pytest.raises(ValueError, match=".* must adhere to 0 < .* < 1."):
+        set_up_experiment.calculate_required_sample_size_grid(
+            baseline_metric_value=0.5, new_metric_value=0.55, measurement_type='proportion', power=[0.8, 1.2]
+        )
+
+    with pytest.raises(ValueError, match='The `new_metric_value` must be different to the `baseline_metric_value`.'):
+        set_up_experiment.calculate_required_sample_size_grid(
+            baseline_metric_value=[0.5, 0.6], new_metric_value=0.5, measurement_type='proportion'
+        )
+
+
+def test_calculate_required_sample_size_cache(tmp_path):
+    """
+    Repeated calls with equivalent parameters should be served from the cache, which evicts the least recently used
+    results once full and can be saved and reloaded.
+    """
+
+    set_up_experiment.clear_sample_size_cache()
+    set_up_experiment.configure_sample_size_cache(max_size=2)
+
+    try:
+        first_result = set_up_experiment.calculate_required_sample_size(0.5, 0.55, 'proportion')
+        repeated_result = set_up_experiment.calculate_required_sample_size(
+            baseline_metric_value=0.5, new_metric_value=np.float64(0.55), measurement_type='proportion', power=0.8
+        )
+        set_up_experiment.calculate_required_sample_size(0.5, 0.6, 'proportion')
+        set_up_experiment.calculate_required_sample_size(0.5, 0.65, 'proportion')
+
+        assert first_result == repeated_result
+        assert set_up_experiment.sample_size_cache_info() == {
+            'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'max_size': 2
+        }
+
+        # Results can be persisted between sessions
+        cache_path = str(tmp_path / 'sample_size_cache.json')
+        set_up_experiment.save_sample_size_cache(cache_path)
+        set_up_experiment.clear_sample_size_cache()
+        set_up_experiment.load_sample_size_cache(cache_path)
+
+        set_up_experiment.calculate_required_sample_size(0.5, 0.65, 'proportion')
+        assert set_up_experiment.sample_size_cache_info()['hits'] == 1
+        assert set_up_experiment.sample_size_cache_info()['misses'] == 0
+
+    finally:
+        set_up_experiment.configure_sample_size_cache()
+        set_up_experiment.clear_sample_size_cache()
+
+
+def test_calculate_required_sample_size_cache_solves_with_values_provided(monkeypatch):
+    """
+    Results are cached against the normalised parameters, but solved for with the values exactly as provided rather
+    than their normalised equivalents.
+    """
+
+    solved_parameters = []
+    solve_required_sample_size = set_up_experiment._solve_required_sample_size
+
+    def record_parameters(*parameters):
+        solved_parameters.append(parameters)
+        return solve_required_sample_size(*parameters)
+
+    monkeypatch.setattr(set_up_experiment, '_solve_required_sample_size', record_parameters)
+    set_up_experiment.clear_sample_size_cache()
+
+    try:
+        baseline_metric_value = 0.5000000000000123
+        set_up_experiment.calculate_required_sample_size(baseline_metric_value, 0.55, 'proportion')
+        set_up_experiment.calculate_required_sample_size(0.5, 0.55, 'proportion')
+
+        assert len(solved_parameters) == 1
+        assert solved_parameters[0][0] == baseline_metric_value
+        assert set_up_experiment.sample_size_cache_info()['hits'] == 1
+
+    finally:
+        set_up_experiment.clear_sample_size_cache()
+
+
+def test_save_sample_size_cache_is_atomic(tmp_path, monkeypatch):
+    """An interrupted save should leave the previously saved file intact, and no temporary file behind."""
+
+    set_up_experiment.clear_sample_size_cache()
+
+    try:
+        set_up_experiment.calculate_required_sample_size(0.5, 0.55, 'proportion')
+
+        cache_path = str(tmp_path / 'sample_size_cache.json')
+        set_up_experiment.save_sample_size_cache(cache_path)
+
+        with open(cache_path, 'r', encoding='utf-8') as saved_file:
+            saved_contents = saved_file.read()
+
+        def crash_part_way_through(entries, target_destination):
+            target_destination.write('[[["partial')
+            raise MemoryError('Crashed while saving.')
+
+        monkeypatch.setattr(set_up_experiment.json, 'dump', crash_part_way_through)
+
+        with pytest.raises(MemoryError):
+            set_up_experiment.save_sample_size_cache(cache_path)
+
+        with open(cache_path, 'r', encoding='utf-8') as saved_file:
+            assert saved_file.read() == saved_contents
+        assert os.listdir(tmp_path) == ['sample_size_cache.json']
+
+    finally:
+        set_up_experiment.clear_sample_size_cache()
@@ -0,0 +1,64 @@
+"""
+Testing for accumulating the results of an experiment as they arrive.
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local application imports
+from ds_utils.hypothesis_testing import streaming
+
+
+def test_group_accumulator_matches_moments_of_all_observations():
+    """Updating chunk by chunk should give the same moments as calculating them on every observation at once."""
+
+    observations = np.random.default_rng(0).normal(loc=100, scale=15, size=1_000)
+
+    accumulator = streaming.GroupAccumulator().update_from_chunks(np.array_split(observations, 7))
+
+    assert accumulator.count == len(observations)
+    assert accumulator.mean == pytest.approx(observations.mean())
+    assert accumulator.variance == pytest.approx(observations.var(ddof=1))
+    assert accumulator.sum == pytest.approx(observations.sum())
+    assert accumulator.sum_of_squares == pytest.approx((observations ** 2).sum())
+
+
+def test_group_accumulator_merge():
+    """Accumulators built on separate partitions can be merged, and the originals are left unchanged."""
+
+    observations = np.random.default_rng(1).normal(size=(500, 3))
+
+    partition_1 = streaming.GroupAccumulator().update(observations[:200])
+    partition_2 = streaming.GroupAccumulator().update(observations[200:])
+    merged = partition_1.merge(partition_2)
+
+    np.testing.assert_allclose(merged.mean, observations.mean(axis=0))
+    np.testing.assert_allclose(merged.variance, observations.var(axis=0, ddof=1))
+    np.testing.assert_array_equal(partition_1.count, [200, 200, 200])
+
+    # Merging with an empty accumulator has no effect
+    np.testing.assert_allclose(merged.merge(streaming.GroupAccumulator()).mean, merged.mean)
+
+
+def test_group_accumulator_rejects_different_number_of_metrics():
+    """Chunks must always track the same number of metrics."""
+
+    accumulator = streaming.GroupAccumulator().update(np.ones((10, 3)))
+
+    with pytest.raises(ValueError, match='Observations must be for the same number of metrics .*'):
+        accumulator.update(np.ones((10, 2)))
+
+
+def test_group_accumulator_tracks_whether_observations_are_binary():
+    """Each metric is binary only while every observation accumulated for it, in any chunk or partition, is 0 or 1."""
+
+    accumulator = streaming.GroupAccumulator().update(np.array([[0, 0.5], [1, 1]]))
+    np.testing.assert_array_equal(accumulator.is_binary, [True, False])
+
+    accumulator.update(np.array([[1, 0], [0.25, 1]]))
+    np.testing.assert_array_equal(accumulator.is_binary, [False, False])
+
+    binary_partition = streaming.GroupAccumulator().update([0, 1, 1])
+    assert binary_partition.is_binary
+    assert not binary_partition.merge(streaming.GroupAccumulator().update([0.5])).is_binary
@@ -0,0 +1,549 @@
+"""
+Internal reading and writing of the artifact format used to save sklearn objects.
+
+An artifact stores an object pickled with protocol 5, with each large contiguous buffer (e.g. the numpy arrays inside a
+fitted estimator) written out-of-band as a separate, aligned block. This allows those arrays to be memory-mapped when
+loading, rather than read and copied, so that processes loading the same artifact share the same pages of memory.
+
+Alternatively, each block can be compressed with one of the `CODECS`, trading the ability to memory-map for a smaller
+file. The codec is recorded in the metadata, so it does not need to be known when loading.
+
+Layout:
+    preamble    fixed size, see `_PREAMBLE` (magic bytes, format version, length of the header)
+    metadata    JSON padded with spaces to `METADATA_SIZE` bytes, describing the object and the environment it was saved
+                in, so that it can be read with a single, small read without unpickling the object
+    header      JSON with the location of each block
+    blocks      the pickle stream followed by each out-of-band buffer, each aligned to `ALIGNMENT` bytes
+
+The checksum recorded in the metadata covers the preamble, the metadata (with the digest itself replaced by zeros, as it
+is only known once everything else has been written), the header and every block. Only the padding between sections,
+which is never read, is not covered.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import platform
+import struct
+import sys
+from typing import BinaryIO, Callable, Dict, List, Tuple
+
+MAGIC = b'\x93DSUTILS'
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+METADATA_SIZE = 4096
+
+# Magic bytes, format version, (reserved) flags, header length
+_PREAMBLE = struct.Struct('<8sHHI')
+
+MMAP_MODES = {'r': mmap.ACCESS_READ, 'c': mmap.ACCESS_COPY}
+
+
+def _zlib_codec() -> Tuple[Callable, Callable]:
+    """Compress and decompress functions for zlib."""
+    import zlib  # pylint: disable=import-outside-toplevel
+    return zlib.compress, zlib.decompress
+
+
+def _lzma_codec() -> Tuple[Callable, Callable]:
+    """Compress and decompress functions for lzma."""
+    import lzma  # pylint: disable=import-outside-toplevel
+    return lzma.compress, lzma.decompress
+
+
+def _bz2_codec() -> Tuple[Callable, Callable]:
+    """Compress and decompress functions for bz2."""
+    import bz2  # pylint: disable=import-outside-toplevel
+    return bz2.compress, bz2.decompress
+
+
+def _zstd_codec() -> Tuple[Callable, Callable]:
+    """Compress and decompress functions for Zstandard (requires the zstandard package)."""
+    import zstandard  # pylint: disable=import-outside-toplevel
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+
+
+def _lz4_codec() -> Tuple[Callable, Callable]:
+    """Compress and decompress functions for LZ4 frame (requires the lz4 package)."""
+    from lz4 import frame  # pylint: disable=import-outside-toplevel
+    return frame.compress, frame.decompress
+
+
+# Name recorded in the header: (function returning the compress and decompress functions, package providing the codec)
+CODECS = {
+    'zlib': (_zlib_codec, None),
+    'lzma': (_lzma_codec, None),
+    'bz2': (_bz2_codec, None),
+    'zstd': (_zstd_codec, 'zstandard'),
+    'lz4': (_lz4_codec, 'lz4'),
+}
+
+
+def get_codec(codec: str) -> Tuple[Callable, Callable]:
+    """
+    Get the functions to compress and decompress blocks with a codec.
+
+    Parameters
+    ----------
+    codec : str
+        Name of the codec, one of `CODECS`.
+
+    Returns
+    -------
+    Tuple[Callable, Callable]
+        (1st value) Function compressing bytes.
+        (2nd value) Function decompressing bytes.
+
+    Raises
+    ------
+    ValueError
+        If the codec is not one of `CODECS`.
+    ImportError
+        If the codec relies on a package which is not installed.
+    """
+
+    if codec not in CODECS:
+        raise ValueError(f'Compression codec must be one of {list(CODECS)}, received {codec!r}.')
+
+    load_codec, package = CODECS[codec]
+
+    try:
+        return load_codec()
+    except ImportError as error:
+        raise ImportError(f'The {codec!r} codec requires the {package!r} package: pip install {package}') from error
+
+
+def _blake2b_checksum():
+    """New blake2b hash, with a 256-bit digest."""
+    return hashlib.blake2b(digest_size=32)
+
+
+def _xxh3_128_checksum():
+    """New 128-bit xxh3 hash (requires the xxhash package), which is several times faster than blake2b."""
+    import xxhash  # pylint: disable=import-outside-toplevel
+    return xxhash.xxh3_128()
+
+
+# Name recorded in the checksum: (function returning a new hash object, package providing the algorithm)
+CHECKSUM_ALGORITHMS = {
+    'blake2b': (_blake2b_checksum, None),
+    'xxh3_128': (_xxh3_128_checksum, 'xxhash'),
+}
+
+
+def new_checksum(checksum_algorithm: str):
+    """
+    Create a hash object for a checksum algorithm, with `update` and `hexdigest` methods as per `hashlib`.
+
+    Parameters
+    ----------
+    checksum_algorithm : str
+        Name of the algorithm, one of `CHECKSUM_ALGORITHMS`.
+
+    Returns
+    -------
+    hash object
+        New hash object.
+
+    Raises
+    ------
+    ValueError
+        If the algorithm is not one of `CHECKSUM_ALGORITHMS`.
+    ImportError
+        If the algorithm relies on a package which is not installed.
+    """
+
+    if checksum_algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValueError(
+            f'Checksum algorithm must be one of {list(CHECKSUM_ALGORITHMS)}, received {checksum_algorithm!r}.'
+        )
+
+    create_checksum, package = CHECKSUM_ALGORITHMS[checksum_algorithm]
+
+    try:
+        return create_checksum()
+    except ImportError as error:
+        raise ImportError(
+            f'The {checksum_algorithm!r} checksum requires the {package!r} package: pip install {package}'
+        ) from error
+
+
+def is_artifact(filename_or_path: str) -> bool:
+    """
+    Whether a file has been saved in the artifact format, rather than as a plain pickle.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the file.
+
+    Returns
+    -------
+    bool
+        True if the file begins with the artifact's magic bytes.
+    """
+
+    with open(filename_or_path, 'rb') as file_to_check:
+        return file_to_check.read(len(MAGIC)) == MAGIC
+
+
+def read_metadata(filename_or_path: str) -> dict:
+    """
+    Read the metadata of an artifact, without reading or unpickling the object itself.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the artifact.
+
+    Returns
+    -------
+    dict
+        Metadata recorded when the artifact was saved.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid artifact.
+    """
+
+    with open(filename_or_path, 'rb') as file_to_load:
+        # The preamble and metadata are read together, so that only one read is required for each file
+        metadata, _, _ = _read_header(file_to_load, metadata_only=True)
+
+    return metadata
+
+
+def write_artifact(
+        target_destination: BinaryIO,
+        sklearn_object,
+        sklearn_version: str,
+        codec: str = None,
+        checksum_algorithm: str = 'blake2b',
+) -> None:
+    """
+    Write an sklearn object and the sklearn version to an open file in the artifact format.
+
+    The checksum is computed as each section is written, and the metadata containing it is then written in the space
+    reserved for it at the start of the file.
+
+    Parameters
+    ----------
+    target_destination : BinaryIO
+        File opened for writing in binary mode.
+    sklearn_object : sklearn object
+        Model/sklearn-object to be saved.
+    sklearn_version : str
+        Version of sklearn used to create the object.
+    codec : str (default is None)
+        Name of the codec used to compress each block, one of `CODECS`. If None, blocks are not compressed.
+    checksum_algorithm : str (default is 'blake2b')
+        Name of the algorithm used to checksum the artifact, one of `CHECKSUM_ALGORITHMS`.
+
+    Raises
+    ------
+    ValueError
+        If the metadata describing the object does not fit within `METADATA_SIZE` bytes.
+    """
+
+    buffers = []
+    pickled_object = pickle.dumps(sklearn_object, protocol=5, buffer_callback=buffers.append)
+    blocks = [memoryview(pickled_object)] + [buffer.raw() for buffer in buffers]
+    uncompressed_lengths = [block.nbytes for block in blocks]
+
+    if codec is not None:
+        compress, _ = get_codec(codec)
+        blocks = [memoryview(compress(block)) for block in blocks]
+
+    # Position every block relative to the start of the data section, leaving padding so each is aligned
+    block_locations = []
+    offset = 0
+    for block, uncompressed_length in zip(blocks, uncompressed_lengths):
+        block_locations.append([offset, block.nbytes, uncompressed_length])
+        offset = _align(offset + block.nbytes)
+
+    checksum = new_checksum(checksum_algorithm)
+
+    object_class = type(sklearn_object)
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'sklearn_version': sklearn_version,
+        'python_version': platform.python_version(),
+        'dependency_versions': _dependency_versions(object_class),
+        'object_class': f'{object_class.__module__}.{object_class.__qualname__}',
+        'codec': codec,
+        'pickle_bytes': uncompressed_lengths[0],
+        'buffer_bytes': sum(uncompressed_lengths[1:]),
+        'n_buffers': len(uncompressed_lengths) - 1,
+        'stored_bytes': sum(block.nbytes for block in blocks),
+        # Placeholder of the same length as the final checksum, which is only known once every block is written
+        'checksum': f'{checksum_algorithm}:{"0" * len(checksum.hexdigest())}',
+    }
+    encoded_metadata = json.dumps(metadata).encode('utf-8')
+
+    if len(encoded_metadata) > METADATA_SIZE:
+        raise ValueError(f'Metadata of the artifact exceeds the {METADATA_SIZE} bytes available: {encoded_metadata}')
+
+    header = json.dumps({'blocks': block_locations}).encode('utf-8')
+
+    # The metadata is checksummed as written here, with the placeholder in place of the digest
+    leading_sections = _PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)) + encoded_metadata.ljust(METADATA_SIZE) \
+        + header
+    checksum.update(leading_sections)
+
+    metadata_start = target_destination.tell() + _PREAMBLE.size
+    target_destination.write(leading_sections)
+
+    position = _PREAMBLE.size + METADATA_SIZE + len(header)
+    data_start = _align(position)
+
+    for (block_offset, *_), block in zip(block_locations, blocks):
+        target_destination.write(b'\0' * (data_start + block_offset - position))
+        target_destination.write(block)
+        checksum.update(block)
+        position = data_start + block_offset + block.nbytes
+
+    end_of_file = target_destination.tell()
+    metadata['checksum'] = f'{checksum_algorithm}:{checksum.hexdigest()}'
+
+    target_destination.seek(metadata_start)
+    target_destination.write(json.dumps(metadata).encode('utf-8').ljust(METADATA_SIZE))
+    target_destination.seek(end_of_file)
+
+
+def verify_artifact(filename_or_path: str, chunk_size: int = 2 ** 23) -> None:
+    """
+    Check an artifact against the checksum recorded when it was saved, reading the file in chunks so that memory use is
+    bounded however large the artifact.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the artifact.
+    chunk_size : int (default is 2 ** 23, i.e. 8 MiB)
+        Number of bytes to read at a time.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid artifact.
+    ValueError
+        If the checksum does not match, e.g. as the file has been corrupted or only partially copied.
+    """
+
+    with open(filename_or_path, 'rb') as file_to_verify:
+        metadata, header, data_start = _read_header(file_to_verify)
+
+        checksum_algorithm, expected_digest = metadata['checksum'].split(':')
+        checksum = new_checksum(checksum_algorithm)
+
+        # Reread the preamble, metadata and header exactly as stored, restoring the placeholder written in place of
+        # the digest (which is recorded in the metadata, so cannot have been part of the checksum)
+        file_to_verify.seek(0)
+        leading_sections = file_to_verify.read(data_start)
+        _, _, _, header_length = _PREAMBLE.unpack_from(leading_sections)
+        leading_sections = leading_sections[:_PREAMBLE.size + METADATA_SIZE + header_length]
+
+        recorded_checksum = json.dumps({'checksum': metadata['checksum']})[1:-1].encode('utf-8')
+        placeholder_checksum = json.dumps(
+            {'checksum': f'{checksum_algorithm}:{"0" * len(expected_digest)}'}
+        )[1:-1].encode('utf-8')
+        checksum.update(leading_sections.replace(recorded_checksum, placeholder_checksum, 1))
+
+        for offset, length, *_ in header['blocks']:
+            file_to_verify.seek(data_start + offset)
+
+            remaining = length
+            while remaining > 0:
+                chunk = file_to_verify.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ValueError(
+                        f'Artifact {filename_or_path} is corrupted: it is shorter than described by its header.'
+                    )
+
+                checksum.update(chunk)
+                remaining -= len(chunk)
+
+    if checksum.hexdigest() != expected_digest:
+        raise ValueError(
+            f'Artifact {filename_or_path} is corrupted: its checksum does not match the one recorded when it was saved.'
+        )
+
+
+def read_artifact(filename_or_path: str, mmap_mode: str = None) -> Tuple:
+    """
+    Load an sklearn object and the sklearn version from a file saved in the artifact format.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location of the artifact.
+    mmap_mode : str 'r', 'c' or None (default is None)
+        How to load the out-of-band buffers (e.g. numpy arrays):
+            None: read into memory.
+            'r': memory-map read-only, so that processes loading the same file share memory. Arrays cannot be modified.
+            'c': memory-map copy-on-write, so that arrays can be modified without changing the file.
+        Compressed artifacts cannot be memory-mapped.
+
+    Returns
+    -------
+    Tuple[sklearn_object, str]
+        sklearn_object: sklearn object.
+        str: Version of sklearn when the object was saved.
+
+    Raises
+    ------
+    ValueError
+        If `mmap_mode` is not one of 'r', 'c' or None.
+    ValueError
+        If the file is not a valid artifact.
+    ValueError
+        If `mmap_mode` is set but the artifact is compressed.
+    """
+
+    if mmap_mode is not None and mmap_mode not in MMAP_MODES:
+        raise ValueError(f"`mmap_mode` must be one of {list(MMAP_MODES)} or None.")
+
+    with open(filename_or_path, 'rb') as file_to_load:
+        metadata, header, data_start = _read_header(file_to_load)
+        codec = metadata.get('codec')
+
+        if codec is not None and mmap_mode is not None:
+            raise ValueError(
+                f'Artifact {filename_or_path} is compressed with {codec!r} and cannot be memory-mapped, '
+                f'load it with mmap_mode=None.'
+            )
+
+        if mmap_mode is None:
+            # Read directly into a preallocated (writeable) buffer, to avoid copying the contents a second time
+            contents = bytearray(os.fstat(file_to_load.fileno()).st_size)
+            file_to_load.seek(0)
+            file_to_load.readinto(contents)
+        else:
+            contents = mmap.mmap(file_to_load.fileno(), 0, access=MMAP_MODES[mmap_mode])
+
+    blocks = _block_views(memoryview(contents), data_start, header['blocks'])
+
+    if codec is not None:
+        _, decompress = get_codec(codec)
+        # Decompressed into bytearrays so that the loaded arrays are writeable, as when reading uncompressed artifacts
+        blocks = [bytearray(decompress(block)) for block in blocks]
+
+    sklearn_object = pickle.loads(blocks[0], buffers=blocks[1:])
+
+    return sklearn_object, metadata['sklearn_version']
+
+
+def _dependency_versions(object_class: type) -> Dict[str, str]:
+    """
+    Versions of the main libraries an sklearn object depends on, and of the library defining the object itself (e.g. a
+    third party estimator), where they have been imported.
+
+    Parameters
+    ----------
+    object_class : type
+        Class of the object being saved.
+
+    Returns
+    -------
+    Dict[str, str]
+        Version of each library, or None if the library has not been imported or does not declare its version.
+    """
+
+    libraries = {'numpy', 'scipy', 'joblib', object_class.__module__.split('.')[0]}
+
+    return {library: getattr(sys.modules.get(library), '__version__', None) for library in sorted(libraries)}
+
+
+def _read_header(file_to_load: BinaryIO, metadata_only: bool = False) -> Tuple[dict, dict, int]:
+    """
+    Read the metadata and header of an artifact.
+
+    Parameters
+    ----------
+    file_to_load : BinaryIO
+        Artifact opened for reading in binary mode, positioned at the start of the file.
+    metadata_only : bool (default is False)
+        Whether to stop after reading the metadata, in which case the header is returned as None.
+
+    Returns
+    -------
+    Tuple[dict, dict, int]
+        (1st value) Contents of the metadata.
+        (2nd value) Contents of the header.
+        (3rd value) Position in the file where the data section starts.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid artifact, or was saved with a different format version.
+    """
+
+    preamble = file_to_load.read(_PREAMBLE.size + METADATA_SIZE)
+    if len(preamble) < _PREAMBLE.size:
+        raise ValueError('File is not a valid sklearn artifact: it is too short to contain a header.')
+
+    magic, format_version, _, header_length = _PREAMBLE.unpack_from(preamble)
+
+    if magic != MAGIC:
+        raise ValueError('File is not a valid sklearn artifact: the magic bytes are incorrect.')
+    if format_version != FORMAT_VERSION:
+        raise ValueError(
+            f'Artifact was saved with format version {format_version}, but only version {FORMAT_VERSION} is supported.'
+        )
+
+    if len(preamble) < _PREAMBLE.size + METADATA_SIZE:
+        raise ValueError('File is not a valid sklearn artifact: it is too short to contain the metadata.')
+
+    metadata = json.loads(preamble[_PREAMBLE.size:].decode('utf-8'))
+
+    if metadata_only:
+        return metadata, None, None
+
+    header = json.loads(file_to_load.read(header_length).decode('utf-8'))
+
+    return metadata, header, _align(_PREAMBLE.size + METADATA_SIZE + header_length)
+
+
+def _block_views(contents: memoryview, data_start: int, block_locations: List[List[int]]) -> List[memoryview]:
+    """
+    Slice the contents of an artifact into each of its blocks, without copying them.
+
+    Parameters
+    ----------
+    contents : memoryview
+        Entire contents of the artifact.
+    data_start : int
+        Position where the data section starts.
+    block_locations : list[list[int]]
+        Offset (relative to the data section) and length (as stored in the file) of each block.
+
+    Returns
+    -------
+    list[memoryview]
+        View of each block.
+
+    Raises
+    ------
+    ValueError
+        If any block extends past the end of the file, e.g. if it has been truncated.
+    """
+
+    views = []
+    for offset, length, *_ in block_locations:
+        start = data_start + offset
+
+        if start + length > contents.nbytes:
+            raise ValueError('File is not a valid sklearn artifact: it is shorter than described by its header.')
+
+        views.append(contents[start: start + length])
+
+    return views
+
+
+def _align(position: int) -> int:
+    """Round a position in the file up to the next multiple of `ALIGNMENT`."""
+    return -(-position // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,175 @@
+"""
+Internal helpers shared by the modules saving and loading sklearn objects (sk_io and model_store), for writing files
+safely and checking the version of sklearn associated with a loaded object.
+"""
+
+# Standard library imports
+import functools
+from importlib import metadata
+import os
+import warnings
+
+
+@functools.lru_cache(maxsize=None)
+def current_sklearn_version() -> str:
+    """
+    Version of sklearn currently installed, read from the package metadata so that sklearn itself, which takes seconds
+    to import, is not imported until an sklearn object is unpickled.
+
+    Returns
+    -------
+    str
+        Version of sklearn.
+    """
+
+    try:
+        return metadata.version('scikit-learn')
+    except metadata.PackageNotFoundError:
+        # e.g. sklearn has been vendored or installed without its distribution metadata
+        pass
+
+    import sklearn  # pylint: disable=import-outside-toplevel
+    return sklearn.__version__
+
+
+def move_exclusively(source_path: str, filename_or_path: str) -> None:
+    """
+    Move a file to `filename_or_path` atomically, only if `filename_or_path` does not already exist.
+
+    Readers only ever see the target once it is complete. On filesystems without hard links, the target is reserved by
+    exclusively creating a hidden lock file beside it for the duration of the move; a lock left behind by a crashed
+    writer must be removed before the target can be written.
+
+    Parameters
+    ----------
+    source_path : str
+        File to move, in the same directory as `filename_or_path`.
+    filename_or_path : str
+        Target where the file will be moved.
+
+    Raises
+    ----------
+    FileExistsError
+        If the `filename_or_path` already exists, or is being written by another writer.
+    """
+
+    file_exists_message = f'File {filename_or_path} already exists. \nTo overwrite an existing file, set ' \
+                          f'overwrite=True when calling this method.'
+
+    try:
+        # Creating a hard link fails if the target exists, so exactly one of many concurrent writers can succeed
+        os.link(source_path, filename_or_path)
+    except FileExistsError:
+        raise FileExistsError(file_exists_message) from None
+    except OSError:
+        _move_exclusively_without_hard_link(source_path, filename_or_path, file_exists_message)
+        return
+
+    os.remove(source_path)
+
+
+def _move_exclusively_without_hard_link(source_path: str, filename_or_path: str, file_exists_message: str) -> None:
+    """
+    Move a file to `filename_or_path` only if it does not already exist, holding a lock file so that no other writer
+    can move a file there at the same time.
+
+    Parameters
+    ----------
+    source_path : str
+        File to move, in the same directory as `filename_or_path`.
+    filename_or_path : str
+        Target where the file will be moved.
+    file_exists_message : str
+        Message of the exception raised if the target already exists.
+
+    Raises
+    ----------
+    FileExistsError
+        If the `filename_or_path` already exists, or its lock is held by another writer.
+    """
+
+    directory, filename = os.path.split(filename_or_path)
+    lock_path = os.path.join(directory, f'.{filename}.lock')
+
+    try:
+        lock_descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise FileExistsError(f'File {filename_or_path} is being written by another writer. \nIf no other writer is '
+                              f'running, remove the lock file left behind: {lock_path}') from None
+
+    try:
+        os.close(lock_descriptor)
+
+        if os.path.lexists(filename_or_path):
+            raise FileExistsError(file_exists_message)
+
+        os.replace(source_path, filename_or_path)
+    finally:
+        os.remove(lock_path)
+
+
+def fsync_directory(directory: str) -> None:
+    """
+    Flush a directory to disk, so that files which have been created or renamed within it survive a crash.
+
+    This is not supported on every platform/filesystem (e.g. Windows), in which case it is skipped.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to flush, where '' is the current working directory.
+    """
+
+    try:
+        directory_descriptor = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(directory_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_descriptor)
+
+
+def warn_if_loaded_sklearn_object_version_different_to_current_version(
+        loaded_sklearn_object_version: str,
+        filename_or_path: str
+) -> None:
+    """
+    Throw a warning if the version associated with an sklearn object that has been loaded is different to the current
+    version running.
+
+    Parameters
+    ----------
+    loaded_sklearn_object_version : str
+        Version of sklearn associated with the loaded object.
+    filename_or_path : str
+        Location where the sklearn object and its version is saved.
+
+    Raises
+    ----------
+    UserWarning
+        If the sklearn version associated with the loaded object is different to the current version of sklearn being
+        used.
+    """
+
+    sklearn_current_version = current_sklearn_version()
+
+    # Raise exception if the sklearn version was not saved correctly and is not a string
+    if not isinstance(loaded_sklearn_object_version, str):
+        raise TypeError(f"Version of sklearn associated with loaded object is not a string. \nCheck that the pickled "
+                        f"file being loaded was saved in the correct format and order: Tuple[sklearn_object, "
+                        f"str]. \nFile to be checked: {filename_or_path}")
+
+    # Warn user if the version associated with the loaded sklearn object is different to the current sklearn version
+    if loaded_sklearn_object_version != sklearn_current_version:
+        warnings.warn(
+            message=f"""
+The version of sklearn used when saving the original sklearn object is different to your current version.
+Version associated with the loaded sklearn object: {loaded_sklearn_object_version}
+Current version: {sklearn_current_version}
+""",
+            category=UserWarning
+        )
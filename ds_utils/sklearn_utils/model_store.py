@@ -0,0 +1,479 @@
+"""
+Content-addressed store of sklearn objects, which saves each large array and sub-estimator once no matter how many
+models share it.
+"""
+
+# Standard library imports
+import hashlib
+import io
+import json
+import mmap
+import os
+from os import path
+import pickle
+import time
+from typing import Dict, List, Tuple
+import uuid
+
+# Local application imports
+from ds_utils.sklearn_utils import _io_helpers
+
+FORMAT_VERSION = 1
+
+
+class ModelStore:
+    """
+    Directory of sklearn objects, where each object is split into content-addressed blobs which are shared between all
+    of the objects in the store.
+
+    When an object is saved, every sub-estimator within it (e.g. each step of a pipeline) and every numpy array of at
+    least `min_blob_bytes` is stored as a separate blob, named after the hash of its contents. Blobs which are already
+    present are reused rather than written again, so families of related models (e.g. pipelines sharing the same
+    fitted vectorizer or scaler) take up less space and are quicker to save.
+
+    Deleting or overwriting an object only removes its reference, as its blobs may be shared with other objects. Blobs
+    which are no longer referenced by any object are removed by `collect_garbage`.
+
+    Layout of the `root_directory`:
+        models/<name>   JSON referencing the blob of the object saved as `name`, and the sklearn version
+        blobs/ab/cdef   blob with hash 'abcdef', holding either a pickled (sub-)estimator or the raw bytes of an array
+
+    Parameters
+    ----------
+    root_directory : str
+        Location of the store, which is created if it does not already exist.
+    min_blob_bytes : int (default is 4096)
+        Arrays smaller than this are kept within the pickled estimator which contains them, rather than as separate
+        blobs, to avoid many tiny files.
+
+    Examples
+    --------
+    >>> store = ModelStore('model_store')
+    >>> store.save('churn_v1', pipeline)
+    {'blobs_written': 4, 'blobs_reused': 0, 'bytes_written': 1830411}
+    >>> store.save('churn_v2', pipeline_with_different_classifier)
+    {'blobs_written': 2, 'blobs_reused': 2, 'bytes_written': 40219}
+    >>> loaded_pipeline, loaded_sklearn_version = store.load('churn_v2')
+    >>> store.delete('churn_v1')
+    >>> store.collect_garbage(min_age_seconds=0)  # no other process is saving to the store
+    {'blobs_removed': 2, 'bytes_removed': 24183, 'blobs_kept': 4}
+    """
+
+    def __init__(self, root_directory: str, min_blob_bytes: int = 4096):
+        self.root_directory = root_directory
+        self.min_blob_bytes = min_blob_bytes
+        self._models_directory = path.join(root_directory, 'models')
+        self._blobs_directory = path.join(root_directory, 'blobs')
+
+        os.makedirs(self._models_directory, exist_ok=True)
+        os.makedirs(self._blobs_directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f'ModelStore(root_directory={self.root_directory!r})'
+
+    def names(self) -> List[str]:
+        """Names of every object saved in the store, in alphabetical order."""
+
+        return sorted(name for name in os.listdir(self._models_directory) if not name.startswith('.'))
+
+    def save(self, name: str, sklearn_object, overwrite: bool = False) -> Dict[str, int]:
+        """
+        Save an sklearn object in the store, along with the version of the sklearn library that is currently being used.
+
+        Parameters
+        ----------
+        name : str
+            Name to save the object as.
+        sklearn_object : sklearn object
+            Model/sklearn-object to be saved.
+        overwrite : bool (default is False)
+            Whether to overwrite an object already saved with the same name. Blobs of the previous object are kept
+            until they are removed by `collect_garbage`.
+
+        Returns
+        -------
+        dict[str, int]
+            'blobs_written': number of new blobs written.
+            'blobs_reused': number of blobs which were already present in the store.
+            'bytes_written': total size of the new blobs.
+
+        Raises
+        ------
+        ValueError
+            If `name` is not a valid filename.
+        FileExistsError
+            If an object is already saved as `name` and user did not set `overwrite` mode.
+        """
+
+        model_path = self._model_path(name)
+
+        if path.exists(model_path) and not overwrite:
+            raise FileExistsError(f'Model {name} already exists in {self.root_directory}. \nTo overwrite an existing '
+                                  f'model, set overwrite=True when calling this method.')
+
+        statistics = {'blobs_written': 0, 'blobs_reused': 0, 'bytes_written': 0}
+        root_digest = self._save_node(sklearn_object, statistics=statistics)
+
+        reference = json.dumps({
+            'format_version': FORMAT_VERSION,
+            'sklearn_version': _io_helpers.current_sklearn_version(),
+            'object_class': f'{type(sklearn_object).__module__}.{type(sklearn_object).__qualname__}',
+            'root': root_digest,
+        }).encode('utf-8')
+
+        # Written atomically, as the reference is what makes the object (and its blobs) visible in the store
+        temporary_path = self._write_temporary_file(self._models_directory, reference)
+        try:
+            if overwrite:
+                os.replace(temporary_path, model_path)
+            else:
+                _io_helpers.move_exclusively(temporary_path, model_path)
+        finally:
+            if path.exists(temporary_path):
+                os.remove(temporary_path)
+
+        # The object is only reported as saved once its reference would survive a crash
+        _io_helpers.fsync_directory(self._models_directory)
+
+        return statistics
+
+    def load(self, name: str, mmap_mode: str = None) -> Tuple:
+        """
+        Load an sklearn object from the store, and the sklearn version associated with when it was saved.
+
+        Parameters
+        ----------
+        name : str
+            Name the object was saved as.
+        mmap_mode : str 'r', 'c' or None (default is None)
+            Whether to memory-map the arrays stored as separate blobs instead of reading them into memory, as per
+            :py:func:`ds_utils.sklearn_utils.sk_io.load_pickled_sklearn_object_and_version`.
+
+        Returns
+        -------
+        Tuple[sklearn_object, str]
+            sklearn_object: sklearn object.
+            str: Version of sklearn when the object was saved.
+
+        Raises
+        ------
+        ValueError
+            If `mmap_mode` is not one of 'r', 'c' or None.
+        FileNotFoundError
+            If no object has been saved as `name`.
+        UserWarning
+            If the sklearn version associated with the loaded object is different to the current version of sklearn
+            being used.
+        """
+
+        if mmap_mode not in (None, 'r', 'c'):
+            raise ValueError("`mmap_mode` must be one of ['r', 'c'] or None.")
+
+        with open(self._model_path(name), 'rb') as reference_file:
+            reference = json.load(reference_file)
+
+        _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+            loaded_sklearn_object_version=reference['sklearn_version'],
+            filename_or_path=self._model_path(name),
+        )
+
+        sklearn_object = self._load_node(reference['root'], mmap_mode=mmap_mode)
+
+        return sklearn_object, reference['sklearn_version']
+
+    def delete(self, name: str) -> None:
+        """
+        Remove the object saved as `name` from the store.
+
+        Its blobs are kept, as they may be shared with other objects, until they are removed by `collect_garbage`.
+
+        Parameters
+        ----------
+        name : str
+            Name the object was saved as.
+
+        Raises
+        ------
+        ValueError
+            If `name` is not a valid filename.
+        FileNotFoundError
+            If no object has been saved as `name`.
+        """
+
+        os.remove(self._model_path(name))
+        _io_helpers.fsync_directory(self._models_directory)
+
+    def collect_garbage(self, min_age_seconds: float = 3600) -> Dict[str, int]:
+        """
+        Remove the blobs which are not referenced by any object in the store, e.g. once the objects using them have
+        been deleted or overwritten.
+
+        Every object's blobs are found before any are removed. An object is only visible once all of its blobs have
+        been written, so blobs modified within the last `min_age_seconds` are kept in case they belong to an object
+        still being saved. Saving an object refreshes the modification time of any blob it reuses for the same reason.
+
+        Parameters
+        ----------
+        min_age_seconds : float (default is 3600)
+            Minimum time since an unreferenced blob was last written or reused before it can be removed. This should
+            exceed the time taken to save the largest object.
+
+        Returns
+        -------
+        dict[str, int]
+            'blobs_removed': number of unreferenced blobs removed.
+            'bytes_removed': total size of the blobs removed.
+            'blobs_kept': number of blobs left in the store.
+        """
+
+        referenced_digests = set()
+        for name in self.names():
+            with open(self._model_path(name), 'rb') as reference_file:
+                self._find_referenced_blobs(json.load(reference_file)['root'], referenced_digests)
+
+        statistics = {'blobs_removed': 0, 'bytes_removed': 0, 'blobs_kept': 0}
+        removable_before = time.time() - min_age_seconds
+
+        for prefix in sorted(os.listdir(self._blobs_directory)):
+            directory = path.join(self._blobs_directory, prefix)
+
+            # Hidden files are temporary files of blobs still being written
+            for remainder in sorted(name for name in os.listdir(directory) if not name.startswith('.')):
+                blob_path = path.join(directory, remainder)
+                blob_status = os.stat(blob_path)
+
+                if prefix + remainder in referenced_digests or blob_status.st_mtime >= removable_before:
+                    statistics['blobs_kept'] += 1
+                    continue
+
+                os.remove(blob_path)
+                statistics['blobs_removed'] += 1
+                statistics['bytes_removed'] += blob_status.st_size
+
+        return statistics
+
+    def _find_referenced_blobs(self, digest: str, referenced_digests: set) -> None:
+        """
+        Add the blob of an object stored by `_save_node`, and every blob it references (recursively), to the set of
+        referenced blobs.
+
+        Parameters
+        ----------
+        digest : str
+            Hash of the blob holding the pickled object.
+        referenced_digests : set
+            Hashes of the blobs found so far, updated in place.
+        """
+
+        if digest in referenced_digests:
+            return
+
+        referenced_digests.add(digest)
+
+        _, buffer_digests, child_digests = pickle.loads(self._read_blob(digest, mmap_mode=None))
+        referenced_digests.update(buffer_digests)
+
+        for child_digest in child_digests:
+            self._find_referenced_blobs(child_digest, referenced_digests)
+
+    def _save_node(self, node_object, statistics: Dict[str, int]) -> str:
+        """
+        Pickle an object, storing each sub-estimator (recursively) and large array within it as a separate blob, and
+        then store the pickled object itself as a blob.
+
+        Sub-estimators are referenced by the hash of their blob and a number local to this object, rather than anything
+        depending on the rest of the object being saved, so that identical sub-estimators produce identical blobs in
+        every model. The local number means an estimator referenced several times by the same object is still a single
+        object when loaded.
+
+        Parameters
+        ----------
+        node_object : object
+            Object to store.
+        statistics : dict[str, int]
+            Counts of blobs written/reused, updated in place.
+
+        Returns
+        -------
+        str
+            Hash of the blob holding the pickled object.
+        """
+
+        from sklearn import base  # pylint: disable=import-outside-toplevel
+
+        buffer_digests = []
+        # Persistent ID of each sub-estimator, keyed by its `id`
+        references = {}
+
+        def store_buffer(buffer: pickle.PickleBuffer) -> bool:
+            raw_buffer = buffer.raw()
+            if raw_buffer.nbytes < self.min_blob_bytes:
+                return True  # Keep in-band
+
+            buffer_digests.append(self._put_blob(raw_buffer, statistics))
+            return False
+
+        pickled_node = io.BytesIO()
+        pickler = pickle.Pickler(pickled_node, protocol=5, buffer_callback=store_buffer)
+
+        def persistent_id(child_object):
+            if child_object is node_object or not isinstance(child_object, base.BaseEstimator):
+                return None
+
+            if id(child_object) not in references:
+                child_digest = self._save_node(child_object, statistics=statistics)
+                references[id(child_object)] = ['estimator', child_digest, len(references)]
+
+            return references[id(child_object)]
+
+        pickler.persistent_id = persistent_id
+        pickler.dump(node_object)
+
+        # The digests of sub-estimators are also listed outside the pickle, so they can be found without unpickling it
+        child_digests = [child_digest for _, child_digest, _ in references.values()]
+        node = pickle.dumps((pickled_node.getvalue(), buffer_digests, child_digests), protocol=5)
+
+        return self._put_blob(memoryview(node), statistics)
+
+    def _load_node(self, digest: str, mmap_mode: str):
+        """
+        Load an object stored by `_save_node`, along with every sub-estimator and array it references.
+
+        Parameters
+        ----------
+        digest : str
+            Hash of the blob holding the pickled object.
+        mmap_mode : str 'r', 'c' or None
+            See `load`.
+
+        Returns
+        -------
+        object
+            Loaded object.
+        """
+
+        # Sub-estimators already loaded, keyed by the number assigned to them when saving
+        loaded_references = {}
+
+        pickled_node, buffer_digests, _ = pickle.loads(self._read_blob(digest, mmap_mode=None))
+        buffers = [self._read_blob(buffer_digest, mmap_mode=mmap_mode) for buffer_digest in buffer_digests]
+
+        unpickler = pickle.Unpickler(io.BytesIO(pickled_node), buffers=buffers)
+
+        def persistent_load(persistent_id):
+            _, child_digest, reference_number = persistent_id
+
+            if reference_number not in loaded_references:
+                loaded_references[reference_number] = self._load_node(child_digest, mmap_mode)
+
+            return loaded_references[reference_number]
+
+        unpickler.persistent_load = persistent_load
+
+        return unpickler.load()
+
+    def _put_blob(self, contents: memoryview, statistics: Dict[str, int]) -> str:
+        """
+        Store the contents as a blob named after their hash, unless that blob is already present.
+
+        Parameters
+        ----------
+        contents : memoryview
+            Contents of the blob.
+        statistics : dict[str, int]
+            Counts of blobs written/reused, updated in place.
+
+        Returns
+        -------
+        str
+            Hash of the contents.
+        """
+
+        digest = hashlib.blake2b(contents, digest_size=32).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        # Reusing a blob refreshes its modification time, so that `collect_garbage` does not remove it before the
+        # object using it has been saved
+        try:
+            os.utime(blob_path)
+        except FileNotFoundError:
+            pass
+        else:
+            statistics['blobs_reused'] += 1
+            return digest
+
+        directory = path.dirname(blob_path)
+        if not path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            _io_helpers.fsync_directory(self._blobs_directory)
+
+        # Concurrent writers of the same blob write identical contents, so whichever replaces the other is harmless
+        temporary_path = self._write_temporary_file(directory, contents)
+        try:
+            os.replace(temporary_path, blob_path)
+        finally:
+            if path.exists(temporary_path):
+                os.remove(temporary_path)
+
+        # Flushed before the reference using the blob is written, so a reference never survives a crash without it
+        _io_helpers.fsync_directory(directory)
+
+        statistics['blobs_written'] += 1
+        statistics['bytes_written'] += contents.nbytes
+
+        return digest
+
+    def _read_blob(self, digest: str, mmap_mode: str):
+        """
+        Read a blob into memory, or memory-map it.
+
+        Parameters
+        ----------
+        digest : str
+            Hash of the blob.
+        mmap_mode : str 'r', 'c' or None
+            See `load`.
+
+        Returns
+        -------
+        bytearray or mmap.mmap
+            Contents of the blob.
+        """
+
+        with open(self._blob_path(digest), 'rb') as blob_file:
+            size = os.fstat(blob_file.fileno()).st_size
+
+            # Empty files cannot be memory-mapped
+            if mmap_mode is None or size == 0:
+                contents = bytearray(size)
+                blob_file.readinto(contents)
+                return contents
+
+            access = mmap.ACCESS_READ if mmap_mode == 'r' else mmap.ACCESS_COPY
+            return mmap.mmap(blob_file.fileno(), 0, access=access)
+
+    @staticmethod
+    def _write_temporary_file(directory: str, contents: memoryview) -> str:
+        """Write the contents to a new, hidden file in the directory, flushed to disk, and return its path."""
+
+        temporary_path = path.join(directory, f'.{uuid.uuid4().hex}.tmp')
+
+        with open(temporary_path, 'xb') as target_destination:
+            target_destination.write(contents)
+            target_destination.flush()
+            os.fsync(target_destination.fileno())
+
+        return temporary_path
+
+    def _model_path(self, name: str) -> str:
+        """Location of the reference for the object saved as `name`, raising ValueError if `name` is not valid."""
+
+        if not name or name.startswith('.') or path.basename(name) != name:
+            raise ValueError(f'Model name {name!r} must be a filename, without any directories, not starting with ".".')
+
+        return path.join(self._models_directory, name)
+
+    def _blob_path(self, digest: str) -> str:
+        """Location of the blob with hash `digest`, split into subdirectories to avoid very large directories."""
+
+        return path.join(self._blobs_directory, digest[:2], digest[2:])
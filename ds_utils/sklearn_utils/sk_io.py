@@ -3,24 +3,58 @@ Saving and loading sklearn objects.
 """
 
 # Standard library imports
+from concurrent import futures
+import functools
 import os
 from os import path
 import pickle
-from typing import Tuple
-import warnings
+from typing import Callable, Dict, List, Tuple
+import uuid
 
-# Third party imports
-import sklearn
+# Local application imports
+from ds_utils import _lru_cache
+from ds_utils.sklearn_utils import _artifact_format, _io_helpers
 
+FILE_FORMATS = ('pickle', 'artifact')
 
-def load_pickled_sklearn_object_and_version(filename_or_path: str) -> Tuple:
+# Sized by the estimated bytes of each object
+_MODEL_CACHE = _lru_cache.LRUCache(max_size=2 ** 30)
+
+
+def load_pickled_sklearn_object_and_version(
+        filename_or_path: str,
+        mmap_mode: str = None,
+        use_cache: bool = False,
+        verify: bool = False,
+) -> Tuple:
     """
     Load a pickled sklearn object and the sklearn version associated with when the sklearn object was saved.
 
+    Files saved in either the 'pickle' or 'artifact' format are supported, and the format is detected automatically.
+
     Parameters
     ----------
     filename_or_path : str
         Location where the sklearn object and its version is saved.
+    mmap_mode : str 'r', 'c' or None (default is None)
+        Only applies to files saved in the 'artifact' format. Whether to memory-map the numpy arrays within the object
+        instead of reading them into memory, which makes loading large models near-instant and lets processes on the
+        same host share a single copy of the arrays:
+            None: read the arrays into memory.
+            'r': memory-map read-only. Arrays within the loaded object cannot be modified.
+            'c': memory-map copy-on-write. Modifications to arrays are kept in memory and not written to the file.
+        Artifacts saved with `compression` cannot be memory-mapped.
+    use_cache : bool (default is False)
+        Whether to keep the loaded object in a process-level cache, and return the cached object on subsequent calls
+        while the file is unchanged (i.e. has the same modification time and size). Concurrent calls for the same file
+        wait for a single load rather than each loading it. The cache is bounded by the estimated size of the objects,
+        see `configure_model_cache`. Cached objects are shared between callers, so must not be modified. Objects loaded
+        with and without `verify` are cached separately, so a cached object is only returned with `verify` set if the
+        file was verified when it was loaded.
+    verify : bool (default is False)
+        Only applies to files saved in the 'artifact' format. Whether to check the file against the checksum recorded
+        when it was saved before unpickling it, so that corrupted or partially copied files are reported clearly rather
+        than failing (or succeeding) unpredictably. The file is read in chunks, so memory use is bounded.
 
     Returns
     -------
@@ -30,26 +64,288 @@ def load_pickled_sklearn_object_and_version(filename_or_path: str) -> Tuple:
 
     Raises
     ----------
+    ValueError
+        If `mmap_mode` is not one of 'r', 'c' or None, or is set for an artifact saved with `compression`.
+    ValueError
+        If `verify` is set and the file is not an artifact with a checksum, or the checksum does not match.
     UserWarning
         If the sklearn version associated with the loaded object is different to the current version of sklearn being
-        used.
+        used. When `use_cache` is set, the warning is only issued when the file is first loaded.
     """
 
+    return _load_checked_sklearn_object_and_version(filename_or_path, mmap_mode, use_cache, verify)
+
+
+def _load_checked_sklearn_object_and_version(
+        filename_or_path: str,
+        mmap_mode: str,
+        use_cache: bool,
+        verify: bool,
+        check_version: bool = True,
+) -> Tuple:
+    """
+    Load a sklearn object and the sklearn version as per `load_pickled_sklearn_object_and_version`, optionally leaving
+    the check of the sklearn version to the caller (e.g. so that warnings are not lost within a pool of processes).
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location where the sklearn object and its version is saved.
+    mmap_mode : str 'r', 'c' or None
+        See `load_pickled_sklearn_object_and_version`.
+    use_cache : bool
+        See `load_pickled_sklearn_object_and_version`.
+    verify : bool
+        See `load_pickled_sklearn_object_and_version`.
+    check_version : bool (default is True)
+        Whether to warn if the sklearn version is different to the current version, or raise TypeError if it is not a
+        string.
+
+    Returns
+    -------
+    Tuple[sklearn_object, str]
+        sklearn_object: sklearn object.
+        str: Version of sklearn when the object was saved.
+    """
+
+    if use_cache:
+        file_status = os.stat(filename_or_path)
+
+        return _MODEL_CACHE.get_or_load(
+            # A verified load is cached separately, so an object cached without verification never satisfies `verify`
+            key=(path.realpath(filename_or_path), mmap_mode, verify),
+            stamp=(file_status.st_mtime_ns, file_status.st_size),
+            load=lambda: _load_sklearn_object_and_version_with_estimated_size(
+                filename_or_path, mmap_mode, verify, check_version
+            ),
+        )
+
+    return _load_sklearn_object_and_version(filename_or_path, mmap_mode, verify, check_version)
+
+
+def _load_sklearn_object_and_version(
+        filename_or_path: str,
+        mmap_mode: str,
+        verify: bool = False,
+        check_version: bool = True,
+) -> Tuple:
+    """
+    Load a sklearn object and the sklearn version from a file in either the 'pickle' or 'artifact' format, without
+    using the model cache.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location where the sklearn object and its version is saved.
+    mmap_mode : str 'r', 'c' or None
+        See `load_pickled_sklearn_object_and_version`.
+    verify : bool (default is False)
+        See `load_pickled_sklearn_object_and_version`.
+    check_version : bool (default is True)
+        See `_load_checked_sklearn_object_and_version`.
+
+    Returns
+    -------
+    Tuple[sklearn_object, str]
+        sklearn_object: sklearn object.
+        str: Version of sklearn when the object was saved.
+    """
+
+    if not _artifact_format.is_artifact(filename_or_path):
+        if verify:
+            raise ValueError(f"File {filename_or_path} was not saved in the 'artifact' format, so has no checksum to "
+                             f"verify.")
+
+        sklearn_object, sklearn_version = _read_sklearn_object_and_version(filename_or_path, mmap_mode)
+
+        if check_version:
+            _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+                loaded_sklearn_object_version=sklearn_version,
+                filename_or_path=filename_or_path,
+            )
+
+        return sklearn_object, sklearn_version
+
+    # The header of an artifact (including its format version) and the sklearn version can be checked before
+    # unpickling the object, which is the step that may fail or behave unexpectedly with a different version of sklearn
+    sklearn_version = read_sklearn_artifact_metadata(filename_or_path)['sklearn_version']
+
+    if check_version:
+        _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+            loaded_sklearn_object_version=sklearn_version,
+            filename_or_path=filename_or_path,
+        )
+
+    if verify:
+        _artifact_format.verify_artifact(filename_or_path)
+
+    return _read_sklearn_object_and_version(filename_or_path, mmap_mode)
+
+
+def _read_sklearn_object_and_version(filename_or_path: str, mmap_mode: str) -> Tuple:
+    """
+    Read a sklearn object and the sklearn version from a file in either the 'pickle' or 'artifact' format, without
+    checking the version.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location where the sklearn object and its version is saved.
+    mmap_mode : str 'r', 'c' or None
+        See `load_pickled_sklearn_object_and_version`.
+
+    Returns
+    -------
+    Tuple[sklearn_object, str]
+        sklearn_object: sklearn object.
+        str: Version of sklearn when the object was saved.
+    """
+
+    if _artifact_format.is_artifact(filename_or_path):
+        return _artifact_format.read_artifact(filename_or_path, mmap_mode=mmap_mode)
+
     with open(filename_or_path, 'rb') as file_to_load:
-        sklearn_object, sklearn_version = pickle.load(file_to_load)
+        return pickle.load(file_to_load)
 
-    _warn_if_loaded_sklearn_object_version_different_to_current_version(
-        loaded_sklearn_object_version=sklearn_version,
-        filename_or_path=filename_or_path,
-    )
 
-    return sklearn_object, sklearn_version
+def _load_sklearn_object_and_version_with_estimated_size(
+        filename_or_path: str,
+        mmap_mode: str,
+        verify: bool,
+        check_version: bool = True,
+) -> Tuple[Tuple, int]:
+    """
+    Load a sklearn object and the sklearn version, along with an estimate of the memory used by the object for the model
+    cache.
+
+    The estimate is the size of the pickled object and its buffers recorded in an artifact's metadata, or else the size
+    of the file, which is close to the size of the object for an uncompressed pickle.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location where the sklearn object and its version is saved.
+    mmap_mode : str 'r', 'c' or None
+        See `load_pickled_sklearn_object_and_version`.
+    verify : bool
+        See `load_pickled_sklearn_object_and_version`.
+    check_version : bool (default is True)
+        See `_load_checked_sklearn_object_and_version`.
+
+    Returns
+    -------
+    Tuple[Tuple[sklearn_object, str], int]
+        (1st value) sklearn object and the version of sklearn when the object was saved.
+        (2nd value) Estimated size of the object in bytes.
+    """
+
+    sklearn_object_and_version = _load_sklearn_object_and_version(filename_or_path, mmap_mode, verify, check_version)
+
+    estimated_bytes = path.getsize(filename_or_path)
+
+    if _artifact_format.is_artifact(filename_or_path):
+        metadata = _artifact_format.read_metadata(filename_or_path)
+        estimated_bytes = metadata['pickle_bytes'] + metadata['buffer_bytes']
+
+    return sklearn_object_and_version, estimated_bytes
+
+
+def configure_model_cache(max_bytes: int = 2 ** 30) -> None:
+    """
+    Set the maximum estimated size of the objects held by the cache used by `load_pickled_sklearn_object_and_version`.
+
+    Parameters
+    ----------
+    max_bytes : int (default is 2 ** 30, i.e. 1 GiB)
+        Maximum estimated size of the objects to hold, beyond which the least recently used objects are evicted. Set to
+        0 to disable caching.
+
+    Raises
+    ------
+    ValueError
+        If `max_bytes` is negative.
+    """
+
+    if max_bytes < 0:
+        raise ValueError('The `max_bytes` of the cache cannot be negative.')
+
+    _MODEL_CACHE.resize(max_bytes)
+
+
+def model_cache_info() -> Dict[str, int]:
+    """
+    Statistics for the cache used by `load_pickled_sklearn_object_and_version`.
+
+    Returns
+    -------
+    dict[str, int]
+        'hits', 'misses' and 'evictions' since the cache was last cleared, along with the number of objects held
+        ('size'), their estimated total size ('current_bytes') and the maximum ('max_bytes').
+    """
+
+    cache_info = _MODEL_CACHE.info()
+
+    return {
+        'hits': cache_info['hits'],
+        'misses': cache_info['misses'],
+        'evictions': cache_info['evictions'],
+        'size': cache_info['entries'],
+        'current_bytes': cache_info['current_size'],
+        'max_bytes': cache_info['max_size'],
+    }
+
+
+def clear_model_cache() -> None:
+    """Remove every object from the cache used when loading sklearn objects, and reset its statistics."""
+
+    _MODEL_CACHE.clear()
+
+
+def read_sklearn_artifact_metadata(filename_or_path: str) -> dict:
+    """
+    Read the metadata of an sklearn object saved in the 'artifact' format, without loading or unpickling the object.
+
+    Only the fixed-size header at the start of the file is read, so this is fast regardless of the size of the object,
+    e.g. to list the versions of every model in a registry.
+
+    Parameters
+    ----------
+    filename_or_path : str
+        Location where the sklearn object was saved using `save_pickled_sklearn_object_and_version` with
+        `file_format='artifact'`.
+
+    Returns
+    -------
+    dict
+        format_version: Version of the artifact format.
+        sklearn_version: Version of sklearn when the object was saved.
+        python_version: Version of Python when the object was saved.
+        dependency_versions: Versions of numpy, scipy, joblib and the library defining the object.
+        object_class: Fully qualified name of the class of the object, e.g.
+        'sklearn.ensemble._forest.RandomForestClassifier'.
+        codec: Codec used to compress the object, or None.
+        pickle_bytes: Size of the pickled object excluding its out-of-band buffers (e.g. numpy arrays).
+        buffer_bytes: Total size of the out-of-band buffers.
+        n_buffers: Number of out-of-band buffers.
+        stored_bytes: Total size of the pickled object and its buffers as stored in the file (i.e. after compression).
+        checksum: Checksum of the whole artifact (besides this digest), in the form '<algorithm>:<hex digest>'.
+
+    Raises
+    ----------
+    ValueError
+        If the file was not saved in the 'artifact' format.
+    """
+
+    return _artifact_format.read_metadata(filename_or_path)
 
 
 def save_pickled_sklearn_object_and_version(
         sklearn_object,
         filename_or_path: str,
-        overwrite: bool = False
+        overwrite: bool = False,
+        file_format: str = 'pickle',
+        compression: str = None,
+        checksum_algorithm: str = 'blake2b',
 ) -> None:
     """
     Saves sklearn object as a pickle file, along with the version of the sklearn library that is currently being used.
@@ -58,6 +354,10 @@ def save_pickled_sklearn_object_and_version(
     have loaded from elsewhere, as you do not know whether your version of sklearn is the same as the one used to
     originally create it.
 
+    The file is written atomically: the object is written to a temporary file in the same directory, flushed to disk,
+    and only then moved to `filename_or_path`. Readers therefore never see a partially written file, even if the
+    process crashes, and concurrent writers to the same directory do not need to coordinate.
+
     Parameters
     ----------
     sklearn_object : sklearn object
@@ -65,68 +365,309 @@ def save_pickled_sklearn_object_and_version(
     filename_or_path : str
         Target where the object and its version will be saved.
     overwrite : bool (default is False)
-        Whether to overwrite file if it already exists.
+        Whether to overwrite file if it already exists. If False, the file is created exclusively, so that when several
+        writers save to the same target at once, exactly one succeeds and the others raise FileExistsError.
+    file_format : str 'pickle', 'artifact' (default is 'pickle')
+        'pickle': a single pickle of the Tuple[sklearn_object, str], readable with `pickle.load`.
+        'artifact': pickle protocol 5 with each numpy array stored as a separate, aligned block, so that
+        :py:func:`load_pickled_sklearn_object_and_version` can memory-map the arrays rather than copying them.
+    compression : str 'zlib', 'lzma', 'bz2', 'zstd', 'lz4' or None (default is None)
+        Codec used to compress the object, which requires `file_format` to be 'artifact'. The codec is recorded in the
+        file and detected when loading. 'zstd' and 'lz4' require the zstandard and lz4 packages respectively.
+        Compressed artifacts cannot be memory-mapped.
+    checksum_algorithm : str 'blake2b', 'xxh3_128' (default is 'blake2b')
+        Only applies to the 'artifact' format. Algorithm of the checksum computed while the object is written, and
+        recorded in the file so that it can be verified when loading. 'xxh3_128' is several times faster, but requires
+        the xxhash package both when saving and verifying.
 
     Raises
     ----------
+    ValueError
+        If `file_format` is not 'pickle' or 'artifact'.
+    ValueError
+        If `compression` is not a supported codec, or is set without `file_format` being 'artifact'.
+    ValueError
+        If `checksum_algorithm` is not supported.
+    ImportError
+        If `compression` or `checksum_algorithm` relies on a package which is not installed.
     FileExistsError
         If the `filename_or_path` already exists and user did not set `overwrite` mode.
     """
 
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"`file_format` must be one of {list(FILE_FORMATS)}.")
+
+    if compression is not None:
+        if file_format != 'artifact':
+            raise ValueError("`compression` can only be used when `file_format` is 'artifact'.")
+
+        # Fail before creating any file if the codec is unavailable
+        _artifact_format.get_codec(compression)
+
+    if file_format == 'artifact':
+        _artifact_format.new_checksum(checksum_algorithm)
+
     # Exit if file already exists and user did not choose to overwrite
     if path.exists(filename_or_path) and not overwrite:
         raise FileExistsError(f'File {filename_or_path} already exists. \nTo overwrite an existing file, '
                               f'set overwrite=True when calling this method.')
 
-    sklearn_object_and_version = (sklearn_object, sklearn.__version__)
-
     # If a full filepath has been provided, and the directory does not already exist, then create it
     directory = path.dirname(filename_or_path)
     if directory != '':
         os.makedirs(directory, exist_ok=True)
 
-    # Save both the sklearn object and version of sklearn
-    with open(filename_or_path, 'wb') as target_destination:
-        pickle.dump(sklearn_object_and_version, target_destination)
+    # Save both the sklearn object and version of sklearn to a temporary file, hidden and unique to this writer
+    temporary_path = path.join(directory, f'.{path.basename(filename_or_path)}.{uuid.uuid4().hex}.tmp')
 
+    try:
+        with open(temporary_path, 'xb') as target_destination:
+            if file_format == 'artifact':
+                _artifact_format.write_artifact(
+                    target_destination,
+                    sklearn_object,
+                    _io_helpers.current_sklearn_version(),
+                    codec=compression,
+                    checksum_algorithm=checksum_algorithm,
+                )
+            else:
+                pickle.dump((sklearn_object, _io_helpers.current_sklearn_version()), target_destination)
 
-def _warn_if_loaded_sklearn_object_version_different_to_current_version(
-        loaded_sklearn_object_version: str,
-        filename_or_path: str
-) -> None:
+            target_destination.flush()
+            os.fsync(target_destination.fileno())
+
+        if overwrite:
+            os.replace(temporary_path, filename_or_path)
+        else:
+            _io_helpers.move_exclusively(temporary_path, filename_or_path)
+
+    finally:
+        if path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    _io_helpers.fsync_directory(directory)
+
+
+def load_pickled_sklearn_objects_and_versions(
+        filenames_or_paths: List[str],
+        mmap_mode: str = None,
+        max_workers: int = None,
+        use_processes: bool = False,
+        use_cache: bool = False,
+        verify: bool = False,
+) -> Tuple[Dict[str, Tuple], Dict[str, Exception]]:
     """
-    Throw a warning if the version associated with an sklearn object that has been loaded is different to the current
-    version running.
+    Load many pickled sklearn objects and their sklearn versions in parallel, as per
+    `load_pickled_sklearn_object_and_version`.
+
+    Each file is checked in the same way as when loaded individually. A file which fails to load does not stop the
+    others from loading, and its exception is returned instead.
 
     Parameters
     ----------
-    loaded_sklearn_object_version : str
-        Version of sklearn associated with the loaded object.
-    filename_or_path : str
-        Location where the sklearn object and its version is saved.
+    filenames_or_paths : list[str]
+        Locations where the sklearn objects and their versions are saved.
+    mmap_mode : str 'r', 'c' or None (default is None)
+        See `load_pickled_sklearn_object_and_version`. Memory-mapped arrays are copied when returned from a process,
+        so only share memory when `use_processes` is False.
+    max_workers : int (default is None)
+        Maximum number of threads/processes, as per the executors in `concurrent.futures`.
+    use_processes : bool (default is False)
+        Whether to load in a pool of processes rather than threads, which helps when unpickling, rather than reading
+        the files, is the bottleneck (e.g. many small objects), at the cost of transferring each object back.
+    use_cache : bool (default is False)
+        See `load_pickled_sklearn_object_and_version`. The cache is held by each process, so is only shared with
+        later calls when `use_processes` is False.
+    verify : bool (default is False)
+        See `load_pickled_sklearn_object_and_version`.
+
+    Returns
+    -------
+    Tuple[Dict[str, Tuple[sklearn_object, str]], Dict[str, Exception]]
+        (1st value) Each sklearn object and its sklearn version, keyed by the location it was loaded from.
+        (2nd value) Exception raised for each location which failed to load.
 
     Raises
     ----------
     UserWarning
-        If the sklearn version associated with the loaded object is different to the current version of sklearn being
-        used.
-    """
-
-    sklearn_current_version = sklearn.__version__
-
-    # Raise exception if the sklearn version was not saved correctly and is not a string
-    if not isinstance(loaded_sklearn_object_version, str):
-        raise TypeError(f"Version of sklearn associated with loaded object is not a string. \nCheck that the pickled "
-                        f"file being loaded was saved in the correct format and order: Tuple[sklearn_object, "
-                        f"str]. \nFile to be checked: {filename_or_path}")
-
-    # Warn user if the version associated with the loaded sklearn object is different to the current sklearn version
-    if loaded_sklearn_object_version != sklearn_current_version:
-        warnings.warn(
-            message=f"""
-The version of sklearn used when saving the original sklearn object is different to your current version.
-Version associated with the loaded sklearn object: {loaded_sklearn_object_version}
-Current version: {sklearn_current_version}
-""",
-            category=UserWarning
-        )
+        For each object whose sklearn version is different to the current version of sklearn being used.
+    """
+
+    loaded, failures = _run_in_pool(
+        function=functools.partial(_load_checked_sklearn_object_and_version, check_version=False),
+        arguments={
+            filename_or_path: (filename_or_path, mmap_mode, use_cache, verify)
+            for filename_or_path in filenames_or_paths
+        },
+        max_workers=max_workers,
+        use_processes=use_processes,
+    )
+
+    # Versions are checked here rather than in the workers, so that warnings from processes are not lost
+    for filename_or_path in list(loaded):
+        try:
+            _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+                loaded_sklearn_object_version=loaded[filename_or_path][1],
+                filename_or_path=filename_or_path,
+            )
+        except TypeError as error:
+            failures[filename_or_path] = error
+            del loaded[filename_or_path]
+
+    return loaded, failures
+
+
+def save_pickled_sklearn_objects_and_versions(
+        sklearn_objects: Dict[str, object],
+        overwrite: bool = False,
+        file_format: str = 'pickle',
+        compression: str = None,
+        max_workers: int = None,
+        use_processes: bool = False,
+) -> Dict[str, Exception]:
+    """
+    Save many sklearn objects in parallel, each with the version of the sklearn library that is currently being used,
+    as per `save_pickled_sklearn_object_and_version`.
+
+    A file which fails to save (e.g. because it already exists and `overwrite` is not set) does not stop the others
+    from saving, and its exception is returned instead.
+
+    Parameters
+    ----------
+    sklearn_objects : dict[str, sklearn object]
+        Model/sklearn-object to be saved, keyed by the target where it will be saved.
+    overwrite : bool (default is False)
+        Whether to overwrite each file if it already exists.
+    file_format : str 'pickle', 'artifact' (default is 'pickle')
+        See `save_pickled_sklearn_object_and_version`.
+    compression : str 'zlib', 'lzma', 'bz2', 'zstd', 'lz4' or None (default is None)
+        See `save_pickled_sklearn_object_and_version`.
+    max_workers : int (default is None)
+        Maximum number of threads/processes, as per the executors in `concurrent.futures`.
+    use_processes : bool (default is False)
+        Whether to save in a pool of processes rather than threads, which helps when pickling or compressing, rather
+        than writing the files, is the bottleneck, at the cost of transferring each object to a process.
+
+    Returns
+    -------
+    Dict[str, Exception]
+        Exception raised for each target which failed to save, e.g. FileExistsError. Empty if every object was saved.
+    """
+
+    _, failures = _run_in_pool(
+        function=functools.partial(
+            save_pickled_sklearn_object_and_version,
+            overwrite=overwrite,
+            file_format=file_format,
+            compression=compression,
+        ),
+        arguments={filename_or_path: (sklearn_object, filename_or_path)
+                   for filename_or_path, sklearn_object in sklearn_objects.items()},
+        max_workers=max_workers,
+        use_processes=use_processes,
+    )
+
+    return failures
+
+
+def verify_sklearn_artifacts(
+        directory: str,
+        recursive: bool = True,
+        max_workers: int = None,
+) -> Tuple[List[str], Dict[str, Exception]]:
+    """
+    Check every file saved in the 'artifact' format within a directory against the checksum recorded when it was
+    saved, in parallel.
+
+    Each file is read in chunks, so memory use is bounded however large the artifacts. Files which are not artifacts
+    (e.g. plain pickles) are skipped.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to scan.
+    recursive : bool (default is True)
+        Whether to also scan every subdirectory.
+    max_workers : int (default is None)
+        Maximum number of threads, as per `concurrent.futures.ThreadPoolExecutor`.
+
+    Returns
+    -------
+    Tuple[List[str], Dict[str, Exception]]
+        (1st value) Location of each artifact whose checksum matches.
+        (2nd value) Exception for each artifact which is corrupted or could not be verified, e.g. as it was saved
+        without a checksum.
+    """
+
+    if recursive:
+        filenames_or_paths = [
+            path.join(sub_directory, filename)
+            for sub_directory, _, filenames in os.walk(directory)
+            for filename in filenames
+        ]
+    else:
+        filenames_or_paths = [path.join(directory, filename) for filename in os.listdir(directory)]
+
+    # Temporary files of saves which are in progress are hidden, and are not yet artifacts
+    artifacts = sorted(
+        filename_or_path for filename_or_path in filenames_or_paths
+        if not path.basename(filename_or_path).startswith('.')
+        and path.isfile(filename_or_path)
+        and _artifact_format.is_artifact(filename_or_path)
+    )
+
+    verified, failures = _run_in_pool(
+        function=_artifact_format.verify_artifact,
+        arguments={filename_or_path: (filename_or_path,) for filename_or_path in artifacts},
+        max_workers=max_workers,
+        use_processes=False,
+    )
+
+    return list(verified), failures
+
+
+def _run_in_pool(
+        function: Callable,
+        arguments: Dict[str, tuple],
+        max_workers: int,
+        use_processes: bool,
+) -> Tuple[Dict[str, object], Dict[str, Exception]]:
+    """
+    Call a function with each set of arguments in a pool of threads or processes, collecting the exception raised for
+    any call which fails rather than stopping the others.
+
+    Parameters
+    ----------
+    function : Callable
+        Function to call, which must be picklable when `use_processes` is True.
+    arguments : dict[str, tuple]
+        Positional arguments for each call, keyed by a name for the call.
+    max_workers : int
+        Maximum number of threads/processes.
+    use_processes : bool
+        Whether to use a pool of processes rather than threads.
+
+    Returns
+    -------
+    Tuple[Dict[str, object], Dict[str, Exception]]
+        (1st value) Value returned by each successful call.
+        (2nd value) Exception raised by each failed call.
+    """
+
+    executor_class = futures.ProcessPoolExecutor if use_processes else futures.ThreadPoolExecutor
+
+    results = {}
+    failures = {}
+
+    with executor_class(max_workers=max_workers) as executor:
+        submitted = {executor.submit(function, *call_arguments): name for name, call_arguments in arguments.items()}
+
+        for future in futures.as_completed(submitted):
+            name = submitted[future]
+            try:
+                results[name] = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                failures[name] = error
+
+    # Return results in the order requested, rather than the order in which they completed
+    return {name: results[name] for name in arguments if name in results}, failures
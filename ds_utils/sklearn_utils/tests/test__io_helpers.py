@@ -0,0 +1,94 @@
+"""
+Testing for the helpers shared by the modules saving and loading sklearn objects.
+"""
+
+# Third party imports
+import pytest
+import sklearn
+
+# Local application imports
+from ds_utils.sklearn_utils import _io_helpers
+
+
+def test__warn_if_loaded_sklearn_object_version_different_to_current_version():
+    """
+    User is made aware if the version associated with the loaded sklearn object is different to the version of sklearn
+    they are using, or that the version was not originally saved correctly.
+    """
+
+    mock_filename_or_path = '/mock_filename.pkl'
+    mock_different_sklearn_version = 'mock_different_sklearn_version'
+
+    # Warning should be raised if the version associated with the loaded sklearn object is different to the current
+    # sklearn version
+    with pytest.warns(
+            UserWarning,
+            match='The version of sklearn used when saving the original sklearn object is different.*'
+    ):
+        _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+            loaded_sklearn_object_version=mock_different_sklearn_version,
+            filename_or_path=mock_filename_or_path,
+        )
+
+    # Exception should be raised if the version is not a string, and likely was saved incorrectly
+    mock_incorrect_version_type = 999
+
+    with pytest.raises(TypeError, match='Version of sklearn associated with loaded object is not a string.*'):
+        _io_helpers.warn_if_loaded_sklearn_object_version_different_to_current_version(
+            loaded_sklearn_object_version=mock_incorrect_version_type,
+            filename_or_path=mock_filename_or_path
+        )
+
+
+def test_current_sklearn_version_without_package_metadata(monkeypatch):
+    """The sklearn version is read from sklearn itself if its package metadata cannot be found."""
+
+    def version_without_metadata(distribution_name):
+        raise _io_helpers.metadata.PackageNotFoundError(distribution_name)
+
+    monkeypatch.setattr(_io_helpers.metadata, 'version', version_without_metadata)
+
+    # The version is cached after it is first read
+    _io_helpers.current_sklearn_version.cache_clear()
+    try:
+        assert _io_helpers.current_sklearn_version() == sklearn.__version__
+    finally:
+        _io_helpers.current_sklearn_version.cache_clear()
+
+
+def test_move_exclusively_without_hard_links(tmp_path, monkeypatch):
+    """
+    On filesystems without hard links, the target only appears once complete and is never replaced if it exists or is
+    being written by another writer.
+    """
+
+    def link_not_supported(source, target):
+        raise OSError('Hard links are not supported')
+
+    monkeypatch.setattr(_io_helpers.os, 'link', link_not_supported)
+
+    target = tmp_path / 'scaler.pkl'
+    first_source = tmp_path / '.first.tmp'
+    second_source = tmp_path / '.second.tmp'
+    first_source.write_bytes(b'first')
+    second_source.write_bytes(b'second')
+
+    _io_helpers.move_exclusively(str(first_source), str(target))
+
+    assert target.read_bytes() == b'first'
+    assert sorted(file.name for file in tmp_path.iterdir()) == ['.second.tmp', 'scaler.pkl']
+
+    with pytest.raises(FileExistsError, match='File .* already exists.*'):
+        _io_helpers.move_exclusively(str(second_source), str(target))
+
+    assert target.read_bytes() == b'first'
+
+    # Lock held by another writer
+    target.unlink()
+    (tmp_path / '.scaler.pkl.lock').touch()
+
+    with pytest.raises(FileExistsError, match='File .* is being written by another writer.*'):
+        _io_helpers.move_exclusively(str(second_source), str(target))
+
+    assert not target.exists()
+    assert second_source.read_bytes() == b'second'
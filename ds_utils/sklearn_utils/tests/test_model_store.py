@@ -0,0 +1,147 @@
+"""
+Testing for the content-addressed store of sklearn objects.
+"""
+
+# Third party imports
+import numpy as np
+from pyfakefs.pytest_plugin import fs
+import pytest
+from sklearn import linear_model, pipeline, preprocessing
+
+# Local application imports
+from ds_utils.sklearn_utils import model_store
+
+
+@pytest.fixture
+def fitted_scaler():
+    """Scaler whose fitted arrays are large enough to be stored as separate blobs."""
+    return preprocessing.StandardScaler().fit(np.arange(2000, dtype=float).reshape(2, 1000))
+
+
+def test_model_store_reuses_blobs_shared_between_models(fs, fitted_scaler):
+    """
+    Sub-estimators and arrays already in the store are not written again, and each model loads with its own values.
+    """
+
+    store = model_store.ModelStore('/model_store')
+
+    first_pipeline = pipeline.make_pipeline(fitted_scaler, linear_model.LinearRegression().fit([[0], [1]], [0, 1]))
+    second_pipeline = pipeline.make_pipeline(fitted_scaler, linear_model.LinearRegression().fit([[0], [1]], [1, 0]))
+
+    first_statistics = store.save('first', first_pipeline)
+    second_statistics = store.save('second', second_pipeline)
+
+    # Scaler and its mean_, var_ and scale_ arrays are reused
+    assert first_statistics['blobs_reused'] == 0
+    assert second_statistics['blobs_reused'] == 4
+    assert second_statistics['blobs_written'] == first_statistics['blobs_written'] - 4
+    assert store.names() == ['first', 'second']
+
+    loaded_pipeline, _ = store.load('second')
+
+    np.testing.assert_array_equal(loaded_pipeline[0].scale_, fitted_scaler.scale_)
+    assert loaded_pipeline[1].coef_ == second_pipeline[1].coef_
+
+
+def test_model_store_load_preserves_shared_references(tmp_path, fitted_scaler):
+    """
+    Estimator referenced several times within an object is loaded as a single object, and its arrays can be
+    memory-mapped.
+    """
+
+    store = model_store.ModelStore(str(tmp_path))
+    store.save('scalers', {'a': fitted_scaler, 'b': fitted_scaler})
+
+    loaded_scalers, _ = store.load('scalers', mmap_mode='r')
+
+    assert loaded_scalers['a'] is loaded_scalers['b']
+    assert not loaded_scalers['a'].mean_.flags.writeable
+    np.testing.assert_array_equal(loaded_scalers['a'].mean_, fitted_scaler.mean_)
+
+
+def test_model_store_save_handles_existing_model_and_invalid_name(fs, fitted_scaler):
+    """
+    Exception is raised if a model already exists and overwrite mode is not set, or the name is not a filename.
+    """
+
+    store = model_store.ModelStore('/model_store')
+    store.save('scaler', fitted_scaler)
+
+    with pytest.raises(FileExistsError, match='Model scaler already exists.*'):
+        store.save('scaler', preprocessing.MinMaxScaler())
+
+    store.save('scaler', preprocessing.MinMaxScaler(), overwrite=True)
+    assert isinstance(store.load('scaler')[0], preprocessing.MinMaxScaler)
+
+    for invalid_name in ['', '.hidden', 'nested/scaler']:
+        with pytest.raises(ValueError, match='Model name .* must be a filename.*'):
+            store.save(invalid_name, fitted_scaler)
+
+
+def test_model_store_delete_and_collect_garbage(fs, fitted_scaler):
+    """
+    Deleting or overwriting a model keeps its blobs until they are collected, and only blobs which are no longer
+    referenced by any model (and are old enough) are removed.
+    """
+
+    store = model_store.ModelStore('/model_store')
+
+    store.save('first', pipeline.make_pipeline(fitted_scaler, preprocessing.MinMaxScaler()))
+    store.save('second', pipeline.make_pipeline(fitted_scaler, preprocessing.MaxAbsScaler()))
+    store.save('first', linear_model.LinearRegression(), overwrite=True)
+    store.delete('second')
+
+    with pytest.raises(FileNotFoundError):
+        store.delete('second')
+
+    assert store.names() == ['first']
+
+    # Blobs have only just been written, so could belong to a model still being saved
+    assert store.collect_garbage()['blobs_removed'] == 0
+
+    # Both pipelines, their final steps, and their shared scaler (with its three arrays) are now unreferenced
+    statistics = store.collect_garbage(min_age_seconds=0)
+    assert statistics['blobs_removed'] == 8
+    assert statistics['bytes_removed'] > 3 * fitted_scaler.mean_.nbytes
+    assert statistics['blobs_kept'] == 1
+
+    assert isinstance(store.load('first')[0], linear_model.LinearRegression)
+
+
+def test_model_store_collect_garbage_keeps_shared_blobs(tmp_path, fitted_scaler):
+    """
+    Blobs still referenced by another model, including those nested within sub-estimators, are not removed.
+    """
+
+    store = model_store.ModelStore(str(tmp_path))
+
+    store.save('first', pipeline.make_pipeline(fitted_scaler, preprocessing.MinMaxScaler()))
+    store.save('second', pipeline.make_pipeline(fitted_scaler, preprocessing.MaxAbsScaler()))
+    store.delete('first')
+
+    statistics = store.collect_garbage(min_age_seconds=0)
+
+    # Only the first pipeline and its final step are removed
+    assert statistics['blobs_removed'] == 2
+
+    loaded_pipeline, _ = store.load('second')
+    np.testing.assert_array_equal(loaded_pipeline[0].scale_, fitted_scaler.scale_)
+
+
+def test_model_store_save_flushes_directories(tmp_path, monkeypatch, fitted_scaler):
+    """
+    The directories holding new blobs are flushed before the reference to the object, which is flushed before save
+    returns.
+    """
+
+    flushed_directories = []
+    monkeypatch.setattr(model_store._io_helpers, 'fsync_directory', flushed_directories.append)
+
+    store = model_store.ModelStore(str(tmp_path))
+    store.save('scaler', fitted_scaler)
+
+    *blob_directories, models_directory = flushed_directories
+
+    assert models_directory == str(tmp_path / 'models')
+    assert blob_directories
+    assert all(directory.startswith(str(tmp_path / 'blobs')) for directory in blob_directories)
@@ -3,11 +3,16 @@ Testing for saving and loading sklearn objects.
 """
 
 # Standard library imports
+from concurrent import futures
 import os
 from os import path
 import pickle
+import re
+import threading
+import time
 
 # Third party imports
+import numpy as np
 import sklearn
 from sklearn import preprocessing
 from pyfakefs.pytest_plugin import fs
@@ -115,31 +120,473 @@ def test_save_pickled_sklearn_object_and_version_handles_existing_file(fs, sklea
     assert overwritten_file_last_modified_time > existing_file_last_modified_time
 
 
-def test__warn_if_loaded_sklearn_object_version_different_to_current_version():
+def test_save_and_load_sklearn_object_in_artifact_format(fs, sklearn_current_version):
     """
-    User is made aware if the version associated with the loaded sklearn object is different to the version of sklearn
-    they are using, or that the version was not originally saved correctly.
+    Object saved in the artifact format is loaded with the same fitted values and version, and the format is detected
+    automatically.
     """
 
-    mock_filename_or_path = '/mock_filename.pkl'
-    mock_different_sklearn_version = 'mock_different_sklearn_version'
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+    file_path = '/artifacts/scaler'
 
-    # Warning should be raised if the version associated with the loaded sklearn object is different to the current
-    # sklearn version
-    with pytest.warns(
-            UserWarning,
-            match='The version of sklearn used when saving the original sklearn object is different.*'
-    ):
-        sk_io._warn_if_loaded_sklearn_object_version_different_to_current_version(
-            loaded_sklearn_object_version=mock_different_sklearn_version,
-            filename_or_path=mock_filename_or_path,
+    sk_io.save_pickled_sklearn_object_and_version(
+        sklearn_object=fitted_scaler,
+        filename_or_path=file_path,
+        file_format='artifact',
+    )
+
+    loaded_sklearn_object, loaded_sklearn_version = sk_io.load_pickled_sklearn_object_and_version(
+        filename_or_path=file_path
+    )
+
+    np.testing.assert_array_equal(loaded_sklearn_object.mean_, fitted_scaler.mean_)
+    np.testing.assert_array_equal(loaded_sklearn_object.scale_, fitted_scaler.scale_)
+    assert loaded_sklearn_version == sklearn_current_version
+
+    with pytest.raises(ValueError, match='`file_format` must be one of.*'):
+        sk_io.save_pickled_sklearn_object_and_version(
+            sklearn_object=fitted_scaler,
+            filename_or_path=file_path,
+            overwrite=True,
+            file_format='parquet',
+        )
+
+
+def test_save_pickled_sklearn_object_and_version_is_atomic(fs, monkeypatch, sklearn_scaler_object):
+    """
+    Existing file is left intact, and no temporary files are left behind, if saving fails part of the way through.
+    """
+
+    sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, '/models/scaler.pkl')
+    with open('/models/scaler.pkl', 'rb') as original_file:
+        original_contents = original_file.read()
+
+    def crash_part_way_through(sklearn_object_and_version, target_destination):
+        target_destination.write(b'partial pickle')
+        raise MemoryError('Crashed while pickling.')
+
+    monkeypatch.setattr(sk_io.pickle, 'dump', crash_part_way_through)
+
+    with pytest.raises(MemoryError):
+        sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, '/models/scaler.pkl', overwrite=True)
+
+    with open('/models/scaler.pkl', 'rb') as saved_file:
+        assert saved_file.read() == original_contents
+    assert os.listdir('/models') == ['scaler.pkl']
+
+
+def test_save_pickled_sklearn_object_and_version_creates_exclusively(tmp_path, sklearn_scaler_object):
+    """
+    Exactly one of many concurrent writers to the same file succeeds when not overwriting.
+    """
+
+    def save(_):
+        try:
+            sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, str(tmp_path / 'contested.pkl'))
+            return 'saved'
+        except FileExistsError:
+            return 'exists'
+
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        outcomes = list(executor.map(save, range(16)))
+
+    assert outcomes.count('saved') == 1
+    assert os.listdir(tmp_path) == ['contested.pkl']
+
+
+@pytest.mark.parametrize('mmap_mode, arrays_are_writeable', [('r', False), ('c', True)])
+def test_load_pickled_sklearn_object_and_version_memory_maps_artifact(tmp_path, mmap_mode, arrays_are_writeable):
+    """
+    Arrays within an object saved in the artifact format are memory-mapped from the file, read-only or copy-on-write as
+    requested, without modifying the file itself.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+    file_path = str(tmp_path / 'scaler')
+
+    sk_io.save_pickled_sklearn_object_and_version(
+        sklearn_object=fitted_scaler,
+        filename_or_path=file_path,
+        file_format='artifact',
+    )
+
+    loaded_sklearn_object, _ = sk_io.load_pickled_sklearn_object_and_version(
+        filename_or_path=file_path,
+        mmap_mode=mmap_mode,
+    )
+
+    np.testing.assert_array_equal(loaded_sklearn_object.mean_, fitted_scaler.mean_)
+    assert loaded_sklearn_object.mean_.flags.writeable == arrays_are_writeable
+
+    if arrays_are_writeable:
+        loaded_sklearn_object.mean_[:] = 0
+        reloaded_sklearn_object, _ = sk_io.load_pickled_sklearn_object_and_version(filename_or_path=file_path)
+        np.testing.assert_array_equal(reloaded_sklearn_object.mean_, fitted_scaler.mean_)
+
+    with pytest.raises(ValueError, match='`mmap_mode` must be one of.*'):
+        sk_io.load_pickled_sklearn_object_and_version(filename_or_path=file_path, mmap_mode='w+')
+
+
+@pytest.mark.parametrize('compression', ['zlib', 'lzma', 'bz2'])
+def test_save_and_load_sklearn_object_in_compressed_artifact_format(fs, compression):
+    """
+    Compressed artifact is smaller than the uncompressed one and is decompressed automatically when loading, but cannot
+    be memory-mapped.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.zeros((10, 1000)))
+
+    for file_path, file_compression in [('/uncompressed', None), ('/compressed', compression)]:
+        sk_io.save_pickled_sklearn_object_and_version(
+            sklearn_object=fitted_scaler,
+            filename_or_path=file_path,
+            file_format='artifact',
+            compression=file_compression,
         )
 
-    # Exception should be raised if the version is not a string, and likely was saved incorrectly
-    mock_incorrect_version_type = 999
+    assert os.stat('/compressed').st_size < os.stat('/uncompressed').st_size
+
+    loaded_sklearn_object, _ = sk_io.load_pickled_sklearn_object_and_version(filename_or_path='/compressed')
+
+    np.testing.assert_array_equal(loaded_sklearn_object.var_, fitted_scaler.var_)
+    assert loaded_sklearn_object.var_.flags.writeable
+
+    with pytest.raises(ValueError, match='.*cannot be memory-mapped.*'):
+        sk_io.load_pickled_sklearn_object_and_version(filename_or_path='/compressed', mmap_mode='r')
+
+    with pytest.raises(ValueError, match='`compression` can only be used.*'):
+        sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/pickle', compression=compression)
+
+    with pytest.raises(ValueError, match='Compression codec must be one of.*'):
+        sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/rar', file_format='artifact', compression='rar')
+
+    assert not path.exists('/pickle') and not path.exists('/rar')
+
+
+def test_read_sklearn_artifact_metadata(fs, sklearn_current_version):
+    """
+    Metadata describing the object and the environment it was saved in is read from an artifact, while plain pickles
+    have no metadata to read.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+
+    sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/scaler.artifact', file_format='artifact')
+    sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/scaler.pkl')
+
+    metadata = sk_io.read_sklearn_artifact_metadata('/scaler.artifact')
+
+    assert metadata['sklearn_version'] == sklearn_current_version
+    assert metadata['dependency_versions']['numpy'] == np.__version__
+    assert metadata['object_class'] == 'sklearn.preprocessing._data.StandardScaler'
+    assert metadata['codec'] is None
+    assert metadata['n_buffers'] >= 3  # mean_, var_ and scale_
+    assert metadata['buffer_bytes'] >= 3 * fitted_scaler.mean_.nbytes
+    assert metadata['stored_bytes'] == metadata['pickle_bytes'] + metadata['buffer_bytes']
+    assert metadata['checksum'].startswith('blake2b:')
+
+    with pytest.raises(ValueError, match='File is not a valid sklearn artifact.*'):
+        sk_io.read_sklearn_artifact_metadata('/scaler.pkl')
+
+
+@pytest.fixture
+def empty_model_cache():
+    """Start with an empty model cache of the default size, and restore it afterwards."""
+
+    sk_io.clear_model_cache()
+    yield
+    sk_io.configure_model_cache()
+    sk_io.clear_model_cache()
+
+
+def test_load_pickled_sklearn_object_and_version_uses_cache(fs, sklearn_scaler_object, empty_model_cache):
+    """
+    Cached object is returned while the file is unchanged, reloaded when the file changes, and evicted once the cache
+    exceeds its maximum size.
+    """
+
+    for file_path in ['/first.pkl', '/second.pkl']:
+        sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, file_path)
+
+    first_load, _ = sk_io.load_pickled_sklearn_object_and_version('/first.pkl', use_cache=True)
+    second_load, _ = sk_io.load_pickled_sklearn_object_and_version('/first.pkl', use_cache=True)
+    uncached_load, _ = sk_io.load_pickled_sklearn_object_and_version('/first.pkl')
+
+    assert second_load is first_load
+    assert uncached_load is not first_load
+    assert sk_io.model_cache_info()['hits'] == 1
+    assert sk_io.model_cache_info()['misses'] == 1
+    assert sk_io.model_cache_info()['current_bytes'] == path.getsize('/first.pkl')
+
+    # Modified file is loaded again, replacing the previous version
+    sk_io.save_pickled_sklearn_object_and_version(preprocessing.MinMaxScaler(), '/first.pkl', overwrite=True)
+    reloaded, _ = sk_io.load_pickled_sklearn_object_and_version('/first.pkl', use_cache=True)
+
+    assert isinstance(reloaded, preprocessing.MinMaxScaler)
+    assert sk_io.model_cache_info()['size'] == 1
+
+    # Least recently used object is evicted once both no longer fit
+    sk_io.configure_model_cache(max_bytes=path.getsize('/first.pkl') + path.getsize('/second.pkl') - 1)
+    sk_io.load_pickled_sklearn_object_and_version('/second.pkl', use_cache=True)
+
+    assert sk_io.model_cache_info()['size'] == 1
+    assert sk_io.model_cache_info()['evictions'] == 1
+
+    with pytest.raises(ValueError, match='The `max_bytes` of the cache cannot be negative.'):
+        sk_io.configure_model_cache(max_bytes=-1)
+
+
+def test_load_pickled_sklearn_object_and_version_cache_only_returns_verified_objects_when_verifying(
+        fs, empty_model_cache
+):
+    """
+    An object cached without verification is not returned when verification is requested, so corruption since it was
+    cached (even without a change in modification time or size) is still detected.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+    sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/model', file_format='artifact')
+    sk_io.load_pickled_sklearn_object_and_version('/model', use_cache=True)
+
+    # Flip a bit in the last array, keeping the modification time and size of the file
+    file_status = os.stat('/model')
+    with open('/model', 'r+b') as corrupted_file:
+        corrupted_file.seek(-1, os.SEEK_END)
+        last_byte = corrupted_file.read(1)
+        corrupted_file.seek(-1, os.SEEK_END)
+        corrupted_file.write(bytes([last_byte[0] ^ 1]))
+    os.utime('/model', ns=(file_status.st_atime_ns, file_status.st_mtime_ns))
+
+    with pytest.raises(ValueError, match='.*is corrupted: its checksum does not match.*'):
+        sk_io.load_pickled_sklearn_object_and_version('/model', use_cache=True, verify=True)
+
+    assert sk_io.model_cache_info()['hits'] == 0
+
+
+def test_load_pickled_sklearn_object_and_version_cache_is_single_flight(
+        tmp_path, monkeypatch, sklearn_scaler_object, empty_model_cache
+):
+    """
+    Concurrent requests for the same uncached file wait for a single load, and share the same object.
+    """
+
+    file_path = str(tmp_path / 'scaler.pkl')
+    sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, file_path)
+
+    load_count = 0
+    load_count_lock = threading.Lock()
+    load_without_cache = sk_io._load_sklearn_object_and_version
+
+    def slow_load(*args):
+        nonlocal load_count
+        with load_count_lock:
+            load_count += 1
+        time.sleep(0.2)
+        return load_without_cache(*args)
+
+    monkeypatch.setattr(sk_io, '_load_sklearn_object_and_version', slow_load)
+
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        loaded_objects = list(executor.map(
+            lambda _: sk_io.load_pickled_sklearn_object_and_version(file_path, use_cache=True)[0],
+            range(8),
+        ))
+
+    assert load_count == 1
+    assert all(loaded_object is loaded_objects[0] for loaded_object in loaded_objects)
+
+
+def test_save_and_load_pickled_sklearn_objects_and_versions_in_bulk(fs, sklearn_current_version):
+    """
+    Many objects are saved and loaded in parallel, with failures (and version warnings) reported for individual files
+    without stopping the rest of the batch.
+    """
+
+    fitted_scalers = {
+        f'/segments/segment_{segment}.pkl': preprocessing.StandardScaler().fit([[segment], [segment + 1]])
+        for segment in range(10)
+    }
+    fs.create_file('/segments/segment_0.pkl', contents='pre-existing file')
+
+    failures = sk_io.save_pickled_sklearn_objects_and_versions(fitted_scalers, max_workers=4)
+
+    assert list(failures) == ['/segments/segment_0.pkl']
+    assert isinstance(failures['/segments/segment_0.pkl'], FileExistsError)
+
+    with open('/segments/old_version.pkl', 'wb') as target_destination:
+        pickle.dump((preprocessing.StandardScaler(), 'mock_different_sklearn_version'), target_destination)
+
+    paths_to_load = list(fitted_scalers)[1:] + ['/segments/old_version.pkl', '/segments/missing.pkl']
+
+    with pytest.warns(UserWarning, match='The version of sklearn used when saving the original sklearn object.*'):
+        loaded, failures = sk_io.load_pickled_sklearn_objects_and_versions(paths_to_load, max_workers=4)
+
+    assert list(loaded) == paths_to_load[:-1]
+    assert loaded['/segments/segment_9.pkl'][0].mean_ == fitted_scalers['/segments/segment_9.pkl'].mean_
+    assert loaded['/segments/segment_9.pkl'][1] == sklearn_current_version
+    assert list(failures) == ['/segments/missing.pkl']
+    assert isinstance(failures['/segments/missing.pkl'], FileNotFoundError)
+
+
+def test_load_pickled_sklearn_objects_and_versions_checks_files_as_when_loaded_individually(fs, empty_model_cache):
+    """
+    Each file loaded in bulk is checked (and verified, and cached) in the same way as when loaded individually, so the
+    same files are accepted and rejected.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+
+    for file_path in ['/models/intact', '/models/corrupted', '/models/version']:
+        sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, file_path, file_format='artifact')
+    sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/models/plain.pkl')
+
+    # Flip a bit in the last array of one artifact, and change the format version of another
+    with open('/models/corrupted', 'r+b') as corrupted_file:
+        corrupted_file.seek(-1, os.SEEK_END)
+        last_byte = corrupted_file.read(1)
+        corrupted_file.seek(-1, os.SEEK_END)
+        corrupted_file.write(bytes([last_byte[0] ^ 1]))
+
+    with open('/models/version', 'r+b') as version_file:
+        version_file.seek(8)
+        version_file.write((1).to_bytes(2, 'little'))
+
+    paths_to_load = ['/models/intact', '/models/corrupted', '/models/version', '/models/plain.pkl']
+
+    for verify in [False, True]:
+        loaded, failures = sk_io.load_pickled_sklearn_objects_and_versions(paths_to_load, verify=verify)
+
+        for file_path in paths_to_load:
+            if file_path in failures:
+                with pytest.raises(type(failures[file_path]), match=re.escape(str(failures[file_path]))):
+                    sk_io.load_pickled_sklearn_object_and_version(file_path, verify=verify)
+            else:
+                sk_io.load_pickled_sklearn_object_and_version(file_path, verify=verify)
+
+        assert 'only version 2 is supported' in str(failures['/models/version'])
+
+    assert list(loaded) == ['/models/intact']
+    assert 'checksum does not match' in str(failures['/models/corrupted'])
+    assert 'has no checksum' in str(failures['/models/plain.pkl'])
+
+    for _ in range(2):
+        loaded, _ = sk_io.load_pickled_sklearn_objects_and_versions(['/models/intact'], use_cache=True)
+
+    assert sk_io.model_cache_info()['hits'] == 1
+    assert loaded['/models/intact'][0] is sk_io.load_pickled_sklearn_object_and_version('/models/intact',
+                                                                                         use_cache=True)[0]
+
 
-    with pytest.raises(TypeError, match='Version of sklearn associated with loaded object is not a string.*'):
-        sk_io._warn_if_loaded_sklearn_object_version_different_to_current_version(
-            loaded_sklearn_object_version=mock_incorrect_version_type,
-            filename_or_path=mock_filename_or_path
+def test_save_and_load_pickled_sklearn_objects_and_versions_in_processes(tmp_path):
+    """
+    Objects are saved and loaded in a pool of processes in the same way as in a pool of threads.
+    """
+
+    fitted_scalers = {
+        str(tmp_path / f'segment_{segment}'): preprocessing.StandardScaler().fit([[segment], [segment + 1]])
+        for segment in range(4)
+    }
+
+    failures = sk_io.save_pickled_sklearn_objects_and_versions(
+        fitted_scalers,
+        file_format='artifact',
+        max_workers=2,
+        use_processes=True,
+    )
+    loaded, load_failures = sk_io.load_pickled_sklearn_objects_and_versions(
+        list(fitted_scalers),
+        max_workers=2,
+        use_processes=True,
+    )
+
+    assert failures == {} and load_failures == {}
+    assert [loaded[file_path][0].mean_ for file_path in fitted_scalers] == [[0.5], [1.5], [2.5], [3.5]]
+
+
+def test_verify_sklearn_artifacts(fs, sklearn_scaler_object):
+    """
+    Corrupted and truncated artifacts are detected, both when loading and when scanning a directory, while intact
+    artifacts are verified and other files are skipped.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+
+    for file_path in ['/models/intact', '/models/nested/corrupted', '/models/truncated']:
+        sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, file_path, file_format='artifact')
+    sk_io.save_pickled_sklearn_object_and_version(sklearn_scaler_object, '/models/plain.pkl')
+
+    # Flip a bit in the last array, and remove the end of another file
+    with open('/models/nested/corrupted', 'r+b') as corrupted_file:
+        corrupted_file.seek(-1, os.SEEK_END)
+        last_byte = corrupted_file.read(1)
+        corrupted_file.seek(-1, os.SEEK_END)
+        corrupted_file.write(bytes([last_byte[0] ^ 1]))
+
+    os.truncate('/models/truncated', path.getsize('/models/truncated') - 8)
+
+    sk_io.load_pickled_sklearn_object_and_version('/models/intact', verify=True)
+
+    with pytest.raises(ValueError, match='.*is corrupted: its checksum does not match.*'):
+        sk_io.load_pickled_sklearn_object_and_version('/models/nested/corrupted', verify=True)
+
+    with pytest.raises(ValueError, match=".*was not saved in the 'artifact' format, so has no checksum.*"):
+        sk_io.load_pickled_sklearn_object_and_version('/models/plain.pkl', verify=True)
+
+    verified, failures = sk_io.verify_sklearn_artifacts('/models', max_workers=2)
+
+    assert verified == ['/models/intact']
+    assert sorted(failures) == ['/models/nested/corrupted', '/models/truncated']
+    assert 'shorter than described by its header' in str(failures['/models/truncated'])
+
+    verified, failures = sk_io.verify_sklearn_artifacts('/models', recursive=False)
+
+    assert verified == ['/models/intact'] and list(failures) == ['/models/truncated']
+
+    with pytest.raises(ValueError, match='Checksum algorithm must be one of.*'):
+        sk_io.save_pickled_sklearn_object_and_version(
+            fitted_scaler, '/models/md5', file_format='artifact', checksum_algorithm='md5'
         )
+
+
+def test_verify_sklearn_artifacts_covers_metadata_and_header(fs):
+    """
+    Changes to the metadata or header of an artifact are detected by its checksum, as well as changes to its blocks,
+    and artifacts saved with another version of the format are rejected.
+    """
+
+    fitted_scaler = preprocessing.StandardScaler().fit(np.arange(20, dtype=float).reshape(10, 2))
+    sk_io.save_pickled_sklearn_object_and_version(fitted_scaler, '/models/intact', file_format='artifact')
+
+    with open('/models/intact', 'rb') as intact_file:
+        intact_contents = intact_file.read()
+
+    tampered_contents = {
+        # Same lengths, so that each section can still be read
+        '/models/metadata': intact_contents.replace(b'StandardScaler"', b'StandardScalar"', 1),
+        '/models/header': intact_contents.replace(b'{"blocks": [[0, ', b'{"blocks": [[0 ,', 1),
+        '/models/version': intact_contents[:8] + (1).to_bytes(2, 'little') + intact_contents[10:],
+    }
+
+    for file_path, contents in tampered_contents.items():
+        assert contents != intact_contents
+        with open(file_path, 'wb') as tampered_file:
+            tampered_file.write(contents)
+
+    verified, failures = sk_io.verify_sklearn_artifacts('/models')
+
+    assert verified == ['/models/intact']
+    assert 'checksum does not match' in str(failures['/models/metadata'])
+    assert 'only version 2 is supported' in str(failures['/models/version'])
+    assert 'checksum does not match' in str(failures['/models/header'])
+
+
+def test_importing_sk_io_does_not_import_heavy_dependencies(modules_imported_by):
+    """
+    sklearn is only imported once an object is loaded or saved, rather than to read its version, so that importing
+    the module (e.g. in a command line tool) is fast.
+    """
+
+    imported_modules, import_times = modules_imported_by('from ds_utils.sklearn_utils import model_store, sk_io')
+
+    assert imported_modules.isdisjoint({'sklearn', 'pandas', 'scipy'}), import_times
+
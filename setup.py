@@ -10,20 +10,25 @@ setuptools.setup(
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Topic :: Scientific/Engineering :: Information Analysis',
     ],
     description='Utility library for common Data Science tasks which are not handled by existing libraries',
+    extras_require={
+        # Reading and writing Parquet files e.g. in hypothesis_testing.set_up_experiment.create_sample_groups_from_file
+        'parquet': ["pyarrow"],
+    },
     install_requires=[
         "pandas",
         "scikit-learn",
+        "scipy",
         "statsmodels",
     ],
     keywords=['data', 'science', 'utilities'],
     license='MIT',
     name=package_name,
     packages=setuptools.find_packages(),
-    python_requires='>=3.7',
+    python_requires='>=3.8',
     url='https://github.com/osulki01/ds_utils',
     version=version,
 )